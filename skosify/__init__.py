@@ -1,7 +1,56 @@
 # encoding=utf-8
-from .skosify import skosify
-from .config import config
-from . import infer, check
+"""Skosify: SKOS converter for RDFS/OWL/SKOS vocabularies.
+
+Submodules are imported only when first used, so that importing the package
+(e.g. for command line parsing) does not load rdflib.
+"""
+
+import importlib
+import sys
+import types
 
 __version__ = '2.3.0'  # Use bumpversion to update
-__all__ = ['skosify', 'config', 'infer', 'check']
+__all__ = ['skosify', 'validate', 'config', 'infer', 'check']
+
+_LAZY_SUBMODULES = ('infer', 'check')
+
+
+def skosify(*sources, **config):
+    """Convert, extend, and check SKOS vocabulary."""
+    from .skosify import skosify as _skosify
+    return _skosify(*sources, **config)
+
+
+def validate(*sources, **config):
+    """Check SKOS vocabulary without modifying it and return the number of
+    problems found."""
+    from .validate import validate as _validate
+    return _validate(*sources, **config)
+
+
+def config(file=None):
+    """Get default configuration and optional settings from config file.
+
+    - file: can be a filename or a file object
+    """
+    from .config import config as _config
+    return _config(file)
+
+
+class _LazyModule(types.ModuleType):
+    """Module type of this package that imports submodules on first access."""
+
+    def __getattr__(self, name):
+        if name in _LAZY_SUBMODULES:
+            return importlib.import_module('.' + name, __name__)
+        raise AttributeError("module %r has no attribute %r" % (__name__, name))
+
+    def __setattr__(self, name, value):
+        # importing the skosify.skosify, skosify.validate and skosify.config
+        # submodules must not replace the functions of the same name
+        if name in ('skosify', 'validate', 'config') and isinstance(value, types.ModuleType):
+            return
+        super(_LazyModule, self).__setattr__(name, value)
+
+
+sys.modules[__name__].__class__ = _LazyModule
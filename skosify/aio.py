@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+"""Asyncio interface for converting vocabularies within an event loop.
+
+The input files are read and decompressed concurrently in the executor, and
+the processing phases also run in the executor, so that the event loop is
+free to serve other tasks meanwhile. The output is serialized in the
+executor into a bounded queue, from which it is streamed in chunks.
+
+Example::
+
+    voc = await skosify_async('first.ttl.gz', 'second.ttl.gz', label='Voc')
+    await write_async(voc, 'voc.ttl')
+"""
+
+import asyncio
+import functools
+import io
+import logging
+import sys
+import threading
+
+from .rdftools.extsort import BUFFER_SIZE
+from .rdftools.io import (
+    open_input, compress_output, compression_of, input_format, output_format,
+    parse_data, serialize,
+)
+
+
+async def _run(executor, func, *args):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, functools.partial(func, *args))
+
+
+def _read_file(source):
+    f = open_input(source)
+    try:
+        return f.read()
+    finally:
+        f.close()
+
+
+class BufferSource(object):
+    """An input file read into memory, parsed when read by read_rdf."""
+
+    def __init__(self, name, data, infmt=None):
+        self.name = name
+        self.data = data
+        self.infmt = infmt
+
+    def __str__(self):
+        return self.name
+
+    def read_into(self, rdf):
+        fmt = input_format(self.name, self.infmt)
+        logging.debug("Parsing input file %s (format: %s)", self.name, fmt)
+        parse_data(rdf, self.data, fmt, self.name)
+
+
+async def read_source(source, infmt=None, executor=None):
+    """Read and decompress an input file in the executor and return it as a
+    BufferSource. Other sources (graphs, stdin, SPARQL endpoints) are
+    returned as is, to be read by the processing."""
+    if isinstance(source, str) and source != '-':
+        data = await _run(executor, _read_file, source)
+        return BufferSource(source, data, infmt)
+    return source
+
+
+async def skosify_async(*sources, skosifier=None, executor=None, **config):
+    """Convert, extend, and check SKOS vocabulary without blocking the event
+    loop. The input files are read concurrently, and the processing is done
+    in the given executor (by default, the event loop's thread pool).
+
+    The configuration is given as keyword arguments, as for skosify(), or
+    as a prepared skosify.skosify.Skosifier.
+    """
+    from .skosify import Skosifier
+
+    if skosifier is None:
+        skosifier = Skosifier(**config)
+    infmt = skosifier.config.from_format
+    inputs = await asyncio.gather(*(read_source(source, infmt, executor) for source in sources))
+    return await _run(executor, skosifier.skosify, *inputs)
+
+
+class _QueueWriter(io.RawIOBase):
+    """Writable file that puts the written data on an asyncio queue from
+    another thread, waiting while the queue is full."""
+
+    def __init__(self, queue, loop, stopped):
+        self.queue = queue
+        self.loop = loop
+        self.stopped = stopped
+
+    def writable(self):
+        return True
+
+    def put(self, item):
+        asyncio.run_coroutine_threadsafe(self.queue.put(item), self.loop).result()
+
+    def write(self, data):
+        if self.stopped.is_set():
+            raise IOError("Output stream was closed")
+        self.put(bytes(data))
+        return len(data)
+
+
+async def serialize_async(rdf, fmt='turtle', compression=None, executor=None, queued=4):
+    """Serialize the graph in the executor and yield the output as chunks
+    of bytes, optionally compressed ("gz", "bz2" or "xz"). At most queued
+    chunks are buffered ahead of the consumer."""
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue(queued)
+    stopped = threading.Event()
+    raw = _QueueWriter(queue, loop, stopped)
+
+    def produce():
+        out = io.BufferedWriter(raw, BUFFER_SIZE)
+        if compression:
+            out = compress_output(out, compression)
+        try:
+            serialize(rdf, out, fmt)
+            out.close()
+        finally:
+            if not stopped.is_set():
+                raw.put(None)  # end of output
+
+    future = loop.run_in_executor(executor, produce)
+    try:
+        while True:
+            chunk = await queue.get()
+            if chunk is None:
+                break
+            yield chunk
+        await future  # raise the error of a failed serialization
+    finally:
+        if not future.done():
+            # the consumer stopped early: let the producer fail and finish
+            stopped.set()
+            while not queue.empty():
+                queue.get_nowait()
+            await asyncio.wait([future])
+            future.exception()  # the expected "closed" error
+
+
+async def write_async(rdf, target, fmt=None, compression=None, executor=None):
+    """Serialize the graph into a file, to stdout if target is "-", or to an
+    asyncio.StreamWriter, without blocking the event loop.
+
+    As with write_rdf, the format and compression are determined by the file
+    name unless given; a StreamWriter gets uncompressed Turtle by default.
+    """
+    if not isinstance(target, str):
+        async for chunk in serialize_async(rdf, fmt or 'turtle', compression, executor):
+            target.write(chunk)
+            await target.drain()
+        return
+
+    fmt = output_format(target, fmt)
+    if compression is None:
+        compression = compression_of(target)
+    logging.debug("Writing output file %s (format: %s)", target, fmt)
+    if target == '-':
+        out = sys.stdout.buffer
+    else:
+        out = await _run(executor, open, target, 'wb')
+    try:
+        async for chunk in serialize_async(rdf, fmt, compression, executor):
+            await _run(executor, out.write, chunk)
+    finally:
+        if target == '-':
+            await _run(executor, out.flush)
+        else:
+            await _run(executor, out.close)
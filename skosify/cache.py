@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+"""Reuse of previous results when neither the input nor the configuration
+has changed.
+
+A run is identified by a fingerprint of the input bytes (or of the triples,
+for Graph sources) and of the configuration values that affect the result.
+The results are kept in a cache directory with one subdirectory per
+fingerprint; the least recently used entries are removed when there are
+more than a given number of them.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+
+from rdflib import Graph
+
+from . import __version__
+from .config import Config
+from .rdftools.extsort import BUFFER_SIZE
+from .rdftools.io import read_ntriples
+from .rdftools.ntriples import format_triple
+
+DEFAULT_CACHE_SIZE = 20
+
+# options that don't affect the resulting graph
+IGNORED_OPTIONS = (
+    'memory_profile', 'profile', 'change_report', 'change_delta', 'diagnostics',
+    'diagnostics_samples', 'deterministic', 'sharded', 'parallel_checks',
+    'workers', 'cache_dir', 'cache_size',
+)
+
+
+def _normalize(value):
+    """Return a representation of a config value that doesn't depend on the
+    order of dict items."""
+    if isinstance(value, dict):
+        return sorted((repr(k), _normalize(v)) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    return repr(value)
+
+
+def _hash_file(digest, filename):
+    with open(filename, 'rb') as f:
+        while True:
+            data = f.read(BUFFER_SIZE)
+            if not data:
+                break
+            digest.update(data)
+
+
+def _hash_graph(digest, rdf):
+    # the sum of the triple hashes doesn't depend on the order of triples
+    total = 0
+    for triple in rdf:
+        line = format_triple(triple).encode('utf-8')
+        total += int.from_bytes(hashlib.blake2b(line, digest_size=16).digest(), 'big')
+    digest.update(b'graph %d %d\n' % (len(rdf), total % (1 << 128)))
+
+
+def fingerprint(sources, config):
+    """Return a hex fingerprint of the sources and the Config, or None if
+    a source can't be fingerprinted (stdin or a SPARQL endpoint)."""
+    from .skosify import read_query
+
+    digest = hashlib.blake2b()
+    digest.update(('skosify %s\n' % __version__).encode('utf-8'))
+    for key in sorted(vars(Config())):
+        if key in IGNORED_OPTIONS:
+            continue
+        value = getattr(config, key)
+        if key.endswith('_query') and value:
+            value = read_query(value)  # the contents of @file queries count
+        digest.update(('%s=%s\n' % (key, _normalize(value))).encode('utf-8'))
+        if key == 'rewrite_map' and value:
+            _hash_file(digest, value)
+
+    for source in sources:
+        if isinstance(source, Graph):
+            _hash_graph(digest, source)
+        elif isinstance(source, str) and source != '-':
+            digest.update(('file %s\n' % source).encode('utf-8'))
+            _hash_file(digest, source)
+        else:
+            return None
+    return digest.hexdigest()
+
+
+def run_key(sources, config):
+    """Return the fingerprint of a run for caching its result, or None if
+    the result should not be cached: when profiles or change reports are
+    requested, which need a real run, when a dct:modified timestamp is set,
+    which changes on every run, or when the sources can't be
+    fingerprinted."""
+    if config.memory_profile or config.profile or config.change_report:
+        logging.debug("Not using cached results, as reports were requested")
+        return None
+    if config.set_modified:
+        logging.debug("Not using cached results, as the modification time is set")
+        return None
+    key = fingerprint(sources, config)
+    if key is None:
+        logging.debug("Not using cached results for stdin or SPARQL input")
+    return key
+
+
+class RunCache(object):
+    """A directory of previous results, keeping at most size entries."""
+
+    def __init__(self, directory, size=DEFAULT_CACHE_SIZE):
+        self.directory = directory
+        self.size = int(size)
+        os.makedirs(directory, exist_ok=True)
+
+    def _entry(self, key):
+        return os.path.join(self.directory, key)
+
+    def lookup(self, key, name):
+        """Return the path of a file stored for the key, or None. The entry
+        is marked as recently used."""
+        path = os.path.join(self._entry(key), name)
+        if not os.path.exists(path):
+            return None
+        os.utime(self._entry(key))
+        return path
+
+    def store(self, key, name, write):
+        """Store a file for the key, written by calling write(filename)."""
+        entry = self._entry(key)
+        os.makedirs(entry, exist_ok=True)
+        fd, tmpname = tempfile.mkstemp(dir=entry)
+        os.close(fd)
+        try:
+            write(tmpname)
+            os.replace(tmpname, os.path.join(entry, name))
+        except BaseException:
+            os.remove(tmpname)
+            raise
+        os.utime(entry)
+        self.prune()
+
+    def prune(self):
+        """Remove the least recently used entries beyond the size limit."""
+        entries = [os.path.join(self.directory, name) for name in os.listdir(self.directory)]
+        entries = [e for e in entries if os.path.isdir(e)]
+        entries.sort(key=os.path.getmtime, reverse=True)
+        for entry in entries[self.size:]:
+            logging.debug("Removing cached result %s", entry)
+            shutil.rmtree(entry, ignore_errors=True)
+
+    def load_graph(self, key):
+        """Return the graph stored for the key, or None."""
+        triples = self.lookup(key, 'graph.nt')
+        namespaces = self.lookup(key, 'namespaces.json')
+        if triples is None or namespaces is None:
+            return None
+        rdf = Graph()
+        with open(namespaces, encoding='utf-8') as f:
+            for prefix, uri in json.load(f):
+                rdf.bind(prefix, uri, override=True)
+        return read_ntriples(triples, rdf)
+
+    def store_graph(self, key, rdf):
+        """Store the graph for the key."""
+        def write_namespaces(filename):
+            with open(filename, 'w', encoding='utf-8') as f:
+                json.dump([(prefix, str(uri)) for prefix, uri in rdf.namespaces()], f)
+
+        def write_triples(filename):
+            with open(filename, 'w', encoding='utf-8', newline='\n', buffering=BUFFER_SIZE) as f:
+                for triple in rdf:
+                    f.write(format_triple(triple))
+
+        self.store(key, 'namespaces.json', write_namespaces)
+        self.store(key, 'graph.nt', write_triples)
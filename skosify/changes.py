@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+"""Reports of the changes made to the graph by skosify.
+
+The triples of the graph are copied into a set at each phase boundary, so
+that the added and removed triples are found with set differences instead
+of comparing the graphs.
+"""
+
+import logging
+from collections import Counter
+
+from .rdftools.ntriples import format_term
+
+
+def snapshot(rdf):
+    """Return the set of triples of the graph."""
+    return set(rdf)
+
+
+def diff(old, new):
+    """Compare two snapshots and return the lists of added and removed
+    triples."""
+    return list(new - old), list(old - new)
+
+
+def diff_graphs(old, new):
+    """Return the lists of triples added to and removed from the graph old
+    to get the graph new. Blank nodes are compared by identifier."""
+    return diff(snapshot(old), snapshot(new))
+
+
+def count_by_predicate(added, removed):
+    """Return a dict mapping each predicate to a pair of the numbers of
+    added and removed triples."""
+    plus = Counter(p for s, p, o in added)
+    minus = Counter(p for s, p, o in removed)
+    return dict((p, (plus[p], minus[p])) for p in set(plus) | set(minus))
+
+
+def write_patch(added, removed, out):
+    """Write the changes in RDF Patch format: D lines for the removed
+    triples and A lines for the added ones, in sorted order."""
+    for op, triples in (('D', removed), ('A', added)):
+        lines = sorted('%s %s %s %s .\n' % (op, format_term(s), format_term(p), format_term(o))
+                       for s, p, o in triples)
+        out.writelines(lines)
+
+
+class ChangeReport(object):
+    """Record the changes made in each phase and write a summary report,
+    and optionally the full input/output delta as an RDF Patch."""
+
+    def __init__(self, report, delta=None):
+        self.report = report
+        self.delta = delta
+        self.input = None
+        self.previous = None
+        self.current = None
+        self.phases = []
+
+    def _close_phase(self, rdf):
+        if rdf is None:
+            return
+        snap = snapshot(rdf)
+        if self.input is None:
+            self.input = snap
+        elif self.current is not None:
+            added, removed = diff(self.previous, snap)
+            self.phases.append((self.current, count_by_predicate(added, removed)))
+        self.previous = snap
+
+    def phase(self, name, rdf):
+        """Record the changes made in the previous phase and start the given
+        one."""
+        self._close_phase(rdf)
+        self.current = name
+
+    def finish(self, rdf):
+        """Record the changes of the last phase and write the report."""
+        self._close_phase(rdf)
+        added, removed = diff(self.input or set(), self.previous or set())
+        with open(self.report, 'w', encoding='utf-8') as f:
+            self.write_report(f, count_by_predicate(added, removed), rdf)
+        logging.info("Wrote change report to %s", self.report)
+        if self.delta is not None:
+            with open(self.delta, 'w', encoding='utf-8') as f:
+                write_patch(added, removed, f)
+            logging.info("Wrote %d added and %d removed triples to %s",
+                         len(added), len(removed), self.delta)
+
+    def close(self):
+        """Release the snapshots."""
+        self.input = self.previous = None
+
+    def write_report(self, out, total, rdf):
+        """Write a plain text report of the changes from input to output
+        and in each phase."""
+        def name(pred):
+            try:
+                return rdf.namespace_manager.normalizeUri(pred)
+            except Exception:
+                return format_term(pred)
+
+        def write_counts(title, counts):
+            plus = sum(a for a, r in counts.values())
+            minus = sum(r for a, r in counts.values())
+            out.write("%s: +%d -%d\n" % (title, plus, minus))
+            for pred in sorted(counts, key=lambda p: (-sum(counts[p]), p)):
+                out.write("  %-40s +%d -%d\n" % ((name(pred),) + counts[pred]))
+            out.write("\n")
+
+        write_counts("Input to output", total)
+        for phase, counts in self.phases:
+            if counts:
+                write_counts(phase, counts)
@@ -4,28 +4,39 @@
 import logging
 from rdflib.namespace import RDF, SKOS
 from .rdftools.namespace import SKOSEXT
-from .rdftools import localname, find_prop_overlap
+from .rdftools import localname, find_prop_overlap, ordered, progress
+from . import diagnostics
 
 
-def _hierarchy_cycles_visit(rdf, node, parent, break_cycles, status):
+def _hierarchy_cycles_visit(rdf, node, parent, break_cycles, status, changed=None, visited=None):
     if status.get(node) is None:
         status[node] = 1  # entered
-        for child in sorted(rdf.subjects(SKOS.broader, node)):
+        if visited is not None:
+            visited.add()
+        children = rdf.subjects(SKOS.broader, node)
+        # when breaking cycles, the visiting order decides which relation
+        # is removed, so it must be deterministic
+        for child in sorted(children) if break_cycles else ordered(children):
             _hierarchy_cycles_visit(
-                rdf, child, node, break_cycles, status)
+                rdf, child, node, break_cycles, status, changed, visited)
         status[node] = 2  # set this node as completed
     elif status.get(node) == 1:  # has been entered but not yet done
         if break_cycles:
-            logging.warning("Hierarchy cycle removed at %s -> %s",
-                            localname(parent), localname(node))
+            diagnostics.warning(
+                'hierarchy-cycle',
+                "Hierarchy cycle removed at %s -> %s",
+                localname(parent), localname(node))
             rdf.remove((node, SKOS.broader, parent))
             rdf.remove((node, SKOS.broaderTransitive, parent))
             rdf.remove((node, SKOSEXT.broaderGeneric, parent))
             rdf.remove((node, SKOSEXT.broaderPartitive, parent))
             rdf.remove((parent, SKOS.narrower, node))
             rdf.remove((parent, SKOS.narrowerTransitive, node))
+            if changed is not None:
+                changed.add(node)
         else:
-            logging.warning(
+            diagnostics.warning(
+                'hierarchy-cycle',
                 "Hierarchy cycle detected at %s -> %s, "
                 "but not removed because break_cycles is not active",
                 localname(parent), localname(node))
@@ -33,27 +44,35 @@ def _hierarchy_cycles_visit(rdf, node, parent, break_cycles, status):
         pass
 
 
-def hierarchy_cycles(rdf, fix=False):
+def hierarchy_cycles(rdf, fix=False, changed=None):
     """Check if the graph contains skos:broader cycles and optionally break these.
 
     :param Graph rdf: An rdflib.graph.Graph object.
     :param bool fix: Fix the problem by removing any skos:broader that overlaps
         with skos:broaderTransitive.
+    :param set changed: If given, the concepts whose skos:broader relations
+        were removed are added to it.
     """
-    top_concepts = sorted(rdf.subject_objects(SKOS.hasTopConcept))
+    top_concepts = rdf.subject_objects(SKOS.hasTopConcept)
+    top_concepts = sorted(top_concepts) if fix else ordered(top_concepts)
+    concepts = rdf.subjects(RDF.type, SKOS.Concept)
+    concepts = sorted(concepts) if fix else ordered(concepts)
+    visited = progress.step('concepts', len(concepts))
     status = {}
     for cs, root in top_concepts:
         _hierarchy_cycles_visit(
-            rdf, root, None, fix, status=status)
+            rdf, root, None, fix, status, changed, visited)
 
     # double check that all concepts were actually visited in the search,
     # and visit remaining ones if necessary
     recheck_top_concepts = False
-    for conc in sorted(rdf.subjects(RDF.type, SKOS.Concept)):
+    for conc in concepts:
         if conc not in status:
             recheck_top_concepts = True
             _hierarchy_cycles_visit(
-                rdf, conc, None, fix, status=status)
+                rdf, conc, None, fix, status, changed, visited)
+    if visited is not None:
+        visited.close()
     return recheck_top_concepts
 
 
@@ -66,10 +85,12 @@ def disjoint_relations(rdf, fix=False):
     :param bool fix: Fix the problem by removing skos:related relations that
         overlap with skos:broaderTransitive.
     """
-    for conc1, conc2 in sorted(rdf.subject_objects(SKOS.related)):
-        if conc2 in sorted(rdf.transitive_objects(conc1, SKOS.broader)):
+    pairs = ordered(rdf.subject_objects(SKOS.related))
+    for conc1, conc2 in progress.iterate(pairs, 'related pairs'):
+        if conc2 in rdf.transitive_objects(conc1, SKOS.broader):
             if fix:
-                logging.warning(
+                diagnostics.warning(
+                    'disjoint-relations',
                     "Concepts %s and %s connected by both "
                     "skos:broaderTransitive and skos:related, "
                     "removing skos:related",
@@ -77,7 +98,8 @@ def disjoint_relations(rdf, fix=False):
                 rdf.remove((conc1, SKOS.related, conc2))
                 rdf.remove((conc2, SKOS.related, conc1))
             else:
-                logging.warning(
+                diagnostics.warning(
+                    'disjoint-relations',
                     "Concepts %s and %s connected by both "
                     "skos:broaderTransitive and skos:related, "
                     "but keeping it because keep_related is enabled",
@@ -91,13 +113,19 @@ def hierarchical_redundancy(rdf, fix=False):
     :param bool fix: Fix the problem by removing skos:broader relations between
         concepts that are otherwise connected by skos:broaderTransitive.
     """
-    for conc, parent1 in sorted(rdf.subject_objects(SKOS.broader)):
-        for parent2 in sorted(rdf.objects(conc, SKOS.broader)):
+    # when fixing, removing a relation may make another one non-redundant,
+    # so the order must be deterministic
+    broaders = rdf.subject_objects(SKOS.broader)
+    broaders = sorted(broaders) if fix else ordered(broaders)
+    for conc, parent1 in progress.iterate(broaders, 'broader pairs'):
+        parents = rdf.objects(conc, SKOS.broader)
+        for parent2 in sorted(parents) if fix else ordered(parents):
             if parent1 == parent2:
                 continue  # must be different
             if parent2 in rdf.transitive_objects(parent1, SKOS.broader):
                 if fix:
-                    logging.warning(
+                    diagnostics.warning(
+                        'hierarchical-redundancy',
                         "Eliminating redundant hierarchical relationship: "
                         "%s skos:broader %s",
                         conc, parent2)
@@ -106,7 +134,8 @@ def hierarchical_redundancy(rdf, fix=False):
                     rdf.remove((parent2, SKOS.narrower, conc))
                     rdf.remove((parent2, SKOS.narrowerTransitive, conc))
                 else:
-                    logging.warning(
+                    diagnostics.warning(
+                        'hierarchical-redundancy',
                         "Redundant hierarchical relationship "
                         "%s skos:broader %s found, but not eliminated "
                         "because eliminate_redundancy is not set",
@@ -141,15 +170,17 @@ def preflabel_uniqueness(rdf, policy='all'):
     else:
         policies = policy
 
-    for p in policies:
-        if p not in policy_fn:
-            logging.critical("Unknown preflabel-policy: %s", policy)
-            return
+    # 'all' can't be combined with other policies
+    if list(policies) != ['all']:
+        for p in policies:
+            if p not in policy_fn:
+                logging.critical("Unknown preflabel-policy: %s", policy)
+                return
 
     def key_fn(label):
         return [policy_fn[p](label) for p in policies] + [str(label)]
 
-    for res in sorted(resources):
+    for res in progress.iterate(ordered(resources), 'resources'):
         prefLabels = {}
         for label in rdf.objects(res, SKOS.prefLabel):
             lang = label.language
@@ -159,15 +190,17 @@ def preflabel_uniqueness(rdf, policy='all'):
         for lang, labels in prefLabels.items():
             if len(labels) > 1:
                 if policies[0] == 'all':
-                    logging.warning(
+                    diagnostics.warning(
+                        'preflabel-uniqueness',
                         "Resource %s has more than one prefLabel@%s, "
                         "but keeping all of them due to preflabel-policy=all.",
                         res, lang)
                     continue
 
-                chosen = sorted(labels, key=key_fn)[0]
+                chosen = min(labels, key=key_fn)
 
-                logging.warning(
+                diagnostics.warning(
+                    'preflabel-uniqueness',
                     "Resource %s has more than one prefLabel@%s: "
                     "choosing %s (policy: %s)",
                     res, lang, chosen, str(policy))
@@ -188,12 +221,14 @@ def label_overlap(rdf, fix=False):
     """
     def label_warning(res, label, keep, remove):
         if fix:
-            logging.warning(
+            diagnostics.warning(
+                'label-overlap',
                 "Resource %s has '%s'@%s as both %s and %s; removing %s",
                 res, label, label.language, keep, remove, remove
             )
         else:
-            logging.warning(
+            diagnostics.warning(
+                'label-overlap',
                 "Resource %s has '%s'@%s as both %s and %s",
                 res, label, label.language, keep, remove
             )
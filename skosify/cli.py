@@ -2,11 +2,12 @@
 """Provides skosify as command line client."""
 
 from skosify import skosify
-from .rdftools import write_rdf
 from .config import Config
 
 import optparse
 import logging
+import sys
+import time
 
 
 def get_option_parser(defaults):
@@ -31,6 +32,38 @@ def get_option_parser(defaults):
                       action="store_false", help='Hide debug output.')
     parser.add_option('-O', '--log', type='string',
                       help='Log file name. Default is to use standard error.')
+    parser.add_option('--diagnostics', type='choice',
+                      choices=['summary', 'full'],
+                      help='How to log problems found in the data: '
+                           '"summary" logs a few examples of each kind of '
+                           'problem and the number of further occurrences, '
+                           '"full" logs every occurrence. '
+                           'Default is "summary".')
+    parser.add_option('--diagnostics-samples', type='int',
+                      help='Number of examples to log for each kind of '
+                           'problem in summary mode. Default is 5.')
+    parser.add_option('--progress', action='store_true',
+                      help='Show the current processing phase, the number '
+                           'of items processed and the processing rate on '
+                           'standard error.')
+    parser.add_option('--no-progress', dest='progress', action='store_false',
+                      help="Don't show progress (default).")
+    parser.add_option('--memory-profile', type='string',
+                      help='Record memory usage at each processing phase '
+                           'and write a report to the given file.')
+    parser.add_option('--profile', type='string', metavar='DIR',
+                      help='Profile the function calls of each processing '
+                           'phase and write pstats files, collapsed stacks '
+                           'for flame graphs and a summary of the functions '
+                           'with the most self time to the given directory.')
+    parser.add_option('--change-report', type='string',
+                      help='Write a summary of the triples added and removed, '
+                           'by predicate and by processing phase, to the '
+                           'given file.')
+    parser.add_option('--change-delta', type='string',
+                      help='With --change-report, also write all the triples '
+                           'added and removed to the given file in RDF Patch '
+                           'format.')
 
     group = optparse.OptionGroup(parser, "Input and Output Options")
     group.add_option('-f', '--from-format', type='string',
@@ -42,7 +75,22 @@ def get_option_parser(defaults):
                      help='Output format. '
                            'Default is to detect format '
                            'based on file extension. '
-                           'Possible values: xml, n3, turtle, nt...')
+                           'Possible values: xml, n3, turtle, nt... '
+                           'Use nt-canonical for sorted N-Triples with '
+                           'stable blank node labels, suitable for '
+                           'version control.')
+    group.add_option('-z', '--compress', type='choice', dest='compression',
+                     choices=['gz', 'bz2', 'xz'],
+                     help='Compress the output with gzip (gz), bzip2 (bz2) '
+                          'or xz. Default is to detect compression based on '
+                          'the output file extension. Compressed input is '
+                          'always detected automatically.')
+    group.add_option('--split-output', action="store_true",
+                     help='Write each concept scheme into a separate file, '
+                          'named by inserting the local name of the scheme '
+                          'into the output file name, e.g. '
+                          'voc-conceptscheme.ttl. Resources not in any '
+                          'scheme are written to e.g. voc-other.ttl.')
     group.add_option('--update-query', type='string',
                      help='SPARQL update query. '
                      'This query is executed against the input '
@@ -64,12 +112,30 @@ def get_option_parser(defaults):
                      'or "@filename". '
                      'Use at your own risk - output may not be '
                      'SKOS at all.')
+    group.add_option('--out-of-core', action="store_true",
+                     help='Process N-Triples input into N-Triples output '
+                          'using external sorting on disk instead of '
+                          'loading the whole vocabulary into memory. '
+                          'Only mappings, label cleanup and SKOS '
+                          'enrichments are performed in this mode.')
+    group.add_option('--validate', action="store_true",
+                     help='Only check the input for hierarchy cycles, '
+                          'overlapping skos:related and skos:broader, '
+                          'hierarchical redundancy and label conflicts, '
+                          'without converting it or writing output. Exits '
+                          'with status 1 if problems were found and 2 if '
+                          'the input could not be read.')
     group.add_option('-I', '--infer', action="store_true",
                      help='Perform RDFS subclass/subproperty inference '
                           'before transforming input.')
     group.add_option('-i', '--no-infer', dest="infer", action="store_false",
                      help="Don't perform RDFS subclass/subproperty inference "
                           "before transforming input.")
+    group.add_option('--rewrite-map', type='string',
+                     help='File of URI rewrites applied after the '
+                          'inferences: an old and a new URI on each line. '
+                          'An old URI ending with * rewrites all URIs in '
+                          'that namespace.')
     parser.add_option_group(group)
 
     group = optparse.OptionGroup(
@@ -177,25 +243,102 @@ def get_option_parser(defaults):
                           "by a traversal from the main vocabulary graph.")
     parser.add_option_group(group)
 
+    group = optparse.OptionGroup(parser, "Performance Options")
+    group.add_option('--deterministic', action="store_true",
+                     help="Process resources in sorted order, so that log "
+                          "messages appear in the same order on every run "
+                          "(default).")
+    group.add_option('--no-deterministic', dest='deterministic',
+                     action="store_false",
+                     help="Don't sort resources where the order only affects "
+                          "the order of log messages. Faster for large "
+                          "vocabularies; the output is the same.")
+    group.add_option('--sharded', action="store_true",
+                     help="Perform the enrichments and checks separately for "
+                          "each group of linked concept schemes and concept "
+                          "hierarchies, in parallel worker processes.")
+    group.add_option('--no-sharded', dest='sharded', action="store_false",
+                     help="Process the whole vocabulary at once (default).")
+    group.add_option('--parallel-checks', action="store_true",
+                     help="Run the checks that only report problems "
+                          "concurrently in worker processes. Has no effect "
+                          "with --break-cycles or --eliminate-redundancy.")
+    group.add_option('--no-parallel-checks', dest='parallel_checks',
+                     action="store_false",
+                     help="Run the checks one after another (default).")
+    group.add_option('--cache-dir', type='string',
+                     help="Directory for keeping the results of previous "
+                          "runs. If the input files and the configuration "
+                          "have not changed, the output is written from the "
+                          "previous result instead of processing the input "
+                          "again.")
+    group.add_option('--cache-size', type='int',
+                     help="Number of previous results to keep in the cache "
+                          "directory. Default is 20.")
+    group.add_option('-j', '--workers', type='int',
+                     help="Number of worker processes for sharded "
+                          "processing and parallel checks. Default is the "
+                          "number of CPUs.")
+    parser.add_option_group(group)
+
     return parser
 
 
+class ProgressDisplay(object):
+    """Show progress events on a single line of a terminal, or as separate
+    lines at most every interval seconds if the stream is not a terminal."""
+
+    def __init__(self, stream, interval=10):
+        self.stream = stream
+        self.tty = stream.isatty()
+        self.interval = interval
+        self.last = None
+        self.width = 0
+
+    def format(self, event):
+        """Return a line of text describing the event."""
+        if event.step is None:
+            return event.phase
+        if event.total:
+            done = "%d/%d %s (%d%%)" % (event.done, event.total, event.step,
+                                        100 * event.done // event.total)
+        else:
+            done = "%d %s" % (event.done, event.step)
+        return "%s: %s, %.0f/s" % (event.phase, done, event.rate)
+
+    def __call__(self, event):
+        line = self.format(event)
+        if self.tty:
+            # the next log message overwrites the line
+            self.stream.write("\r%s%s\r" % (line, " " * (self.width - len(line))))
+            self.width = len(line)
+        else:
+            now = time.time()
+            if event.step is not None and self.last is not None and now - self.last < self.interval:
+                return
+            self.last = now
+            self.stream.write(line + "\n")
+        self.stream.flush()
+
+
 def main():
     """Read command line parameters and make a transform based on them."""
 
-    config = Config()
-
     # additional options for command line client only
-    defaults = vars(config)
-    defaults['to_format'] = None
-    defaults['output'] = '-'
-    defaults['log'] = None
-    defaults['debug'] = False
+    defaults = {
+        'output': '-',
+        'log': None,
+        'debug': False,
+        'out_of_core': False,
+        'validate': False,
+        'compression': None,
+        'split_output': False,
+        'progress': False,
+    }
 
+    # Parse the command line before creating the Config, which loads rdflib.
+    # Options not given on the command line are left as None.
     options, remainingArgs = get_option_parser(defaults).parse_args()
-    for key in vars(options):
-        if hasattr(config, key):
-            setattr(config, key, getattr(options, key))
 
     # configure logging, messages to stderr by default
     logformat = '%(levelname)s: %(message)s'
@@ -210,21 +353,57 @@ def main():
 
     output = options.output
 
+    config = Config()
+    for key, value in defaults.items():
+        setattr(config, key, value)
+
     # read config file as defaults and override from command line arguments
     if options.config is not None:
         config.read_and_parse_config_file(options.config)
-        options, remainingArgs = get_option_parser(vars(config)).parse_args()
-        for key in vars(options):
-            if hasattr(config, key):
-                setattr(config, key, getattr(options, key))
+    for key, value in vars(options).items():
+        if value is not None and hasattr(config, key):
+            setattr(config, key, value)
 
     if remainingArgs:
         inputfiles = remainingArgs
     else:
         inputfiles = ['-']
 
-    voc = skosify(*inputfiles, **vars(config))
-    write_rdf(voc, output, config.to_format)
+    if config.validate:
+        from .validate import validate
+        try:
+            problems = validate(*inputfiles, **vars(config))
+        except Exception as e:
+            logging.critical("Parsing failed. Exception: %s", str(e))
+            sys.exit(2)
+        if problems:
+            logging.info("Validation found %d problems", problems)
+            sys.exit(1)
+        logging.info("Validation found no problems")
+        return
+
+    if options.out_of_core:
+        from .outofcore import skosify_ntriples
+        if config.split_output:
+            logging.critical("Split output is not supported in out-of-core mode.")
+            sys.exit(1)
+        try:
+            kwargs = dict(vars(config), output=output)
+            skosify_ntriples(*inputfiles, **kwargs)
+        except ValueError as e:
+            logging.critical(str(e))
+            sys.exit(1)
+        return
+
+    if config.split_output and output == '-':
+        logging.critical("Split output needs an output file name (--output).")
+        sys.exit(1)
+
+    from .rdftools import write_rdf
+    progress = ProgressDisplay(sys.stderr) if config.progress else None
+    voc = skosify(*inputfiles, **dict(vars(config), progress=progress))
+    write_rdf(voc, output, config.to_format, config.compression,
+              split=config.split_output, workers=config.workers)
 
 
 if __name__ == '__main__':
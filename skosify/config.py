@@ -1,22 +1,24 @@
 # -*- coding: utf-8 -*-
 """Store skosify configuration and read config file."""
 
+import copy
 import logging
 from io import StringIO
-from copy import copy
-from rdflib.namespace import URIRef, Namespace, RDF, RDFS, OWL, SKOS, DC, DCTERMS, XSD
 
 from configparser import ConfigParser
 
+# rdflib is imported only when a Config is created, so that this module
+# can be loaded quickly e.g. for command line parsing
+
 # default namespaces to register in the graph
 DEFAULT_NAMESPACES = {
-    'rdf': RDF,
-    'rdfs': RDFS,
-    'owl': OWL,
-    'skos': SKOS,
-    'dc': DC,
-    'dct': DCTERMS,
-    'xsd': XSD,
+    'rdf': 'http://www.w3.org/1999/02/22-rdf-syntax-ns#',
+    'rdfs': 'http://www.w3.org/2000/01/rdf-schema#',
+    'owl': 'http://www.w3.org/2002/07/owl#',
+    'skos': 'http://www.w3.org/2004/02/skos/core#',
+    'dc': 'http://purl.org/dc/elements/1.1/',
+    'dct': 'http://purl.org/dc/terms/',
+    'xsd': 'http://www.w3.org/2001/XMLSchema#',
 }
 
 DEFAULT_SECTIONS = u"""
@@ -28,6 +30,8 @@ DEFAULT_SECTIONS = u"""
 
 [relations]
 
+[rewrite]
+
 [options]
 
 """
@@ -41,6 +45,24 @@ def config(file=None):
     return vars(Config(file))
 
 
+def make_config(config=None, **options):
+    """Return a new Config with the given options overriding the values of
+    config, which may be a Config object, a dict of options as returned by
+    config(), or a config file name or file object. Unknown options are
+    ignored."""
+    if isinstance(config, dict):
+        options = dict(config, **options)
+        config = None
+    if isinstance(config, Config):
+        config = copy.copy(config)
+    else:
+        config = Config(config)
+    for key in options:
+        if hasattr(config, key):
+            setattr(config, key, options[key])
+    return config
+
+
 class Config(object):
     """Internal class to store and access configuration."""
 
@@ -70,14 +92,34 @@ class Config(object):
         self.update_query = None
         self.construct_query = None
         self.post_update_query = None
+        self.memory_profile = None
+        self.profile = None
+        self.change_report = None
+        self.change_delta = None
+        self.diagnostics = 'summary'
+        self.diagnostics_samples = 5
+        self.deterministic = True
+        self.sharded = False
+        self.parallel_checks = False
+        self.cache_dir = None
+        self.cache_size = 20
+        self.workers = 0
 
         # mappings
         self.types = {}
         self.literals = {}
         self.relations = {}
 
+        # URI rewriting: old URI to new URI, and old namespace to new
+        # namespace, plus a file of further rewrites
+        self.rewrite_uris = {}
+        self.rewrite_namespaces = {}
+        self.rewrite_map = None
+
         # namespaces
-        self.namespaces = copy(DEFAULT_NAMESPACES)
+        from rdflib.namespace import Namespace
+        self.namespaces = dict((prefix, Namespace(uri))
+                               for prefix, uri in DEFAULT_NAMESPACES.items())
 
         if file is not None:
             self.read_and_parse_config_file(file)
@@ -104,6 +146,7 @@ class Config(object):
             cfgparser.read(file)
 
     def parse_config(self, cfgparser):
+        from rdflib.namespace import Namespace
 
         # parse namespaces from configuration file
         for prefix, uri in cfgparser.items('namespaces'):
@@ -124,13 +167,29 @@ class Config(object):
             self.relations[expand_curielike(self.namespaces, key)] = \
                 expand_mapping_target(self.namespaces, val)
 
+        # parse URI rewrites from configuration file; a key ending with *
+        # rewrites all URIs in a namespace
+        for key, val in cfgparser.items('rewrite'):
+            old = expand_curielike(self.namespaces, key)
+            new = expand_uri(self.namespaces, val)
+            if new is None:
+                logging.warning("Missing rewrite target for %s", key)
+            elif old.endswith('*'):
+                self.rewrite_namespaces[old[:-1]] = new
+            else:
+                self.rewrite_uris[old] = new
+
         # parse options from configuration file
         for opt, val in cfgparser.items('options'):
-            if not hasattr(self, opt) or opt in ['types', 'literals', 'relations', 'namespaces']:
+            if not hasattr(self, opt) or opt in ['types', 'literals', 'relations', 'namespaces',
+                                                 'rewrite_uris', 'rewrite_namespaces']:
                 logging.warning('Ignoring unknown configuration option: %s', opt)
                 continue
-            if getattr(self, opt) in (True, False):  # is a Boolean option
+            default = getattr(self, opt)
+            if isinstance(default, bool):
                 setattr(self, opt, cfgparser.getboolean('options', opt))
+            elif isinstance(default, int):
+                setattr(self, opt, cfgparser.getint('options', opt))
             else:
                 setattr(self, opt, val)
 
@@ -139,6 +198,7 @@ def expand_curielike(namespaces, curie):
     """Expand a CURIE (or a CURIE-like string with a period instead of colon
     as separator) into URIRef. If the provided curie is not a CURIE, return it
     unchanged."""
+    from rdflib.namespace import URIRef
 
     if curie == '':
         return None
@@ -161,6 +221,19 @@ def expand_curielike(namespaces, curie):
         return URIRef(curie)
 
 
+def expand_uri(namespaces, val):
+    """Expand a CURIE-like string, or a full URI optionally enclosed in angle
+    brackets, into URIRef."""
+    from rdflib.namespace import URIRef
+
+    val = val.strip()
+    if val.startswith('<') and val.endswith('>'):
+        return URIRef(val[1:-1])
+    if '://' in val:
+        return URIRef(val)
+    return expand_curielike(namespaces, val)
+
+
 def expand_mapping_target(namespaces, val):
     """Expand a mapping target, expressed as a comma-separated list of
     CURIE-like strings potentially prefixed with ^ to express inverse
@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+"""Aggregated reporting of problems found in the processed data.
+
+Transforms and checks report each problem they find through warning() or
+info(), together with a short identifier for the kind of problem. Outside a
+Diagnostics context the message is logged immediately. Inside one, the
+problems are counted by kind and only a bounded number of examples is kept,
+so that dirty input data doesn't produce millions of log records. The
+messages are formatted only when they are actually logged.
+"""
+
+import logging
+import sys
+import threading
+from collections import OrderedDict
+
+# number of example messages kept for each kind of problem
+DEFAULT_SAMPLES = 5
+
+MODES = ('summary', 'full')
+
+_local = threading.local()
+
+
+def active():
+    """Return the innermost active Diagnostics collector, or None."""
+    stack = getattr(_local, 'stack', None)
+    if stack:
+        return stack[-1]
+    return None
+
+
+def report(level, kind, msg, *args):
+    """Report a problem of the given kind, with a logging-style message."""
+    collector = active()
+    if collector is None:
+        logging.log(level, msg, *args)
+    else:
+        collector.record(level, kind, msg, args)
+
+
+def merge(results):
+    """Report problems collected elsewhere, e.g. in a worker process, as
+    returned by Diagnostics.results()."""
+    collector = active()
+    for kind, level, count, examples in results:
+        for msg, args in examples:
+            report(level, kind, msg, *args)
+        if collector is not None and count > len(examples):
+            collector.register(level, kind)
+            collector.counts[kind] += count - len(examples)
+
+
+def worker_samples():
+    """Return the number of examples that the collectors of worker processes
+    should keep for merge(): as many as the active collector keeps in
+    summary mode, otherwise all of them."""
+    collector = active()
+    if collector is not None and collector.mode == 'summary':
+        return collector.samples
+    return sys.maxsize
+
+
+def warning(kind, msg, *args):
+    """Report a problem with level WARNING."""
+    report(logging.WARNING, kind, msg, *args)
+
+
+def info(kind, msg, *args):
+    """Report a problem with level INFO."""
+    report(logging.INFO, kind, msg, *args)
+
+
+class Diagnostics(object):
+    """Collect reported problems while active as a context manager.
+
+    In 'summary' mode the problems are counted by kind, and a summary with
+    up to samples example messages per kind is logged when the context is
+    left. In 'full' mode every problem is logged immediately, as without
+    a collector, but the counts are still kept. With log_summary=False
+    nothing is logged when the context is left; the collected problems can
+    then be passed on with results().
+    """
+
+    def __init__(self, mode='summary', samples=DEFAULT_SAMPLES, log_summary=True):
+        if mode not in MODES:
+            raise ValueError("Unknown diagnostics mode: %s" % mode)
+        self.mode = mode
+        self.samples = int(samples)
+        self.log_summary = log_summary
+        self.counts = OrderedDict()
+        self.levels = {}
+        self.examples = {}
+
+    def __enter__(self):
+        if getattr(_local, 'stack', None) is None:
+            _local.stack = []
+        _local.stack.append(self)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        _local.stack.remove(self)
+        if self.mode == 'summary' and self.log_summary:
+            self.summarize()
+        return False
+
+    def register(self, level, kind):
+        """Start counting problems of a kind, if not counted yet."""
+        if kind not in self.counts:
+            self.counts[kind] = 0
+            self.levels[kind] = level
+            self.examples[kind] = []
+
+    def record(self, level, kind, msg, args):
+        """Record one reported problem."""
+        self.register(level, kind)
+        self.counts[kind] += 1
+        if self.mode == 'full':
+            logging.log(level, msg, *args)
+        elif len(self.examples[kind]) < self.samples:
+            self.examples[kind].append((msg, args))
+
+    def results(self):
+        """Return the collected problems as a list of (kind, level, count,
+        examples) tuples, to be reported elsewhere with merge()."""
+        return [(kind, self.levels[kind], count, self.examples[kind])
+                for kind, count in self.counts.items()]
+
+    def total(self):
+        """Return the total number of reported problems."""
+        return sum(self.counts.values())
+
+    def summarize(self):
+        """Log the number of problems of each kind and the kept examples."""
+        for kind, count in self.counts.items():
+            level = self.levels[kind]
+            if not logging.getLogger().isEnabledFor(level):
+                continue
+            for msg, args in self.examples[kind]:
+                logging.log(level, msg, *args)
+            if count > len(self.examples[kind]):
+                logging.log(level, "%s: %d more similar messages not shown",
+                            kind, count - len(self.examples[kind]))
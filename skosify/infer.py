@@ -3,6 +3,7 @@
 
 import logging
 from rdflib import Namespace, RDF, RDFS
+from .rdftools import ordered
 
 SKOS = Namespace("http://www.w3.org/2004/02/skos/core#")
 
@@ -126,7 +127,7 @@ def rdfs_properties(rdf):
                 superprops[s].add(sp)
 
     # add the superproperty relationships
-    for p, sps in sorted(superprops.items()):
+    for p, sps in ordered(superprops.items()):
         logging.debug("setting superproperties: %s -> %s", p, str(sps))
         for s, o in rdf.subject_objects(p):
             for sp in sps:
@@ -0,0 +1,309 @@
+# -*- coding: utf-8 -*-
+"""Out-of-core skosify for N-Triples input and output.
+
+The data is never loaded into an rdflib Graph. Instead the input lines are
+sorted by subject on disk, each subject is transformed together with its own
+triples, and the results (including inferred inverse relations) are sorted
+again with duplicates removed. Memory use is bounded by the sort chunk size
+and the number of triples of a single subject.
+
+Only the transforms that can be decided from the triples of one subject at a
+time are supported: type, literal and relation mappings, label cleanup and
+the SKOS relation enrichments. Phases that need the whole graph (concept
+scheme setup, collections, aggregate and deprecated concepts, cleanup, top
+concepts and the hierarchy and label checks) are not performed.
+"""
+
+import io
+import itertools
+import logging
+import time
+
+from rdflib import Literal
+from rdflib.namespace import RDF, RDFS, SKOS
+from rdflib.util import guess_format
+
+from .config import Config, make_config
+from . import diagnostics
+from .rdftools.namespace import SKOSEXT
+from .rdftools.extsort import external_sort, DEFAULT_CHUNK_SIZE
+from .rdftools.io import open_input, open_output, uncompressed_name
+from .rdftools.ntriples import parse_line, subject_key, format_triple
+from .skosify import compile_mapping, in_general_ns
+
+# options which need the whole graph in memory; these must keep their
+# default values in out-of-core mode
+UNSUPPORTED_OPTIONS = (
+    'update_query', 'construct_query', 'post_update_query', 'infer',
+    'transitive', 'aggregates', 'cleanup_classes', 'cleanup_properties',
+    'cleanup_unreachable', 'break_cycles', 'eliminate_redundancy',
+    'set_modified', 'namespace', 'label', 'rewrite_uris',
+    'rewrite_namespaces', 'rewrite_map',
+)
+
+NTRIPLES_FORMATS = ('nt', 'ntriples', 'nt11')
+
+AFFECTED_TYPES = (SKOS.Concept, SKOS.Collection, SKOSEXT.DeprecatedConcept)
+
+LABEL_PROPERTIES = (
+    SKOS.prefLabel, SKOS.altLabel, SKOS.hiddenLabel,
+    SKOSEXT.candidateLabel, SKOS.note, SKOS.scopeNote,
+    SKOS.definition, SKOS.example, SKOS.historyNote,
+    SKOS.editorialNote, SKOS.changeNote, RDFS.label)
+
+
+def check_config(config):
+    """Raise ValueError if the given Config uses features that are not
+    supported in out-of-core mode."""
+    defaults = Config()
+    problems = [opt for opt in UNSUPPORTED_OPTIONS
+                if getattr(config, opt) != getattr(defaults, opt)]
+    if problems:
+        raise ValueError(
+            "Options not supported in out-of-core mode: %s" % ', '.join(problems))
+
+    for t, targets in config.types.items():
+        if targets[0][0] is None:
+            raise ValueError(
+                "Deleting instances of type %s is not supported "
+                "in out-of-core mode" % t)
+
+    if config.from_format and config.from_format not in NTRIPLES_FORMATS:
+        raise ValueError("Out-of-core mode requires N-Triples input, not %s" %
+                         config.from_format)
+    if config.to_format and config.to_format not in NTRIPLES_FORMATS:
+        raise ValueError("Out-of-core mode requires N-Triples output, not %s" %
+                         config.to_format)
+
+
+class _Mapper(object):
+    """Lookups in a type, literal or relation mapping, logging the result
+    only once for each URI."""
+
+    def __init__(self, mapping, kind):
+        self.mapping = compile_mapping(mapping)
+        self.kind = kind
+        self.logged = set()
+
+    def get(self, uri):
+        """Return the mapping targets for the URI, or None if unmapped."""
+        targets = self.mapping.targets(uri)
+        if uri not in self.logged:
+            self.logged.add(uri)
+            if targets is not None:
+                logging.debug("transform %s %s -> %s", self.kind, uri, str(targets))
+            else:
+                logging.info("Don't know what to do with %s %s", self.kind, uri)
+        return targets
+
+
+def _transform_subject(triples, config, typemapper, literalmapper, relationmapper):
+    """Apply the type, literal, relation and label transforms to the triples
+    of a single subject."""
+
+    types = []
+    others = []
+    for s, p, o in triples:
+        if p == RDF.type:
+            if o in config.types or not in_general_ns(o):
+                targets = typemapper.get(o)
+                if targets is not None:
+                    types.extend(uri for uri, _ in targets)
+                    continue
+            types.append(o)
+        else:
+            others.append((s, p, o))
+
+    subj = triples[0][0]
+    result = [(subj, RDF.type, t) for t in types]
+    affected = any(t in AFFECTED_TYPES for t in types)
+
+    for s, p, o in others:
+        if affected and isinstance(o, Literal):
+            if p in config.literals or not in_general_ns(p):
+                targets = literalmapper.get(p)
+                if targets is not None:
+                    result.extend((s, uri, o) for uri, _ in targets if uri is not None)
+                    continue
+        elif affected:
+            if p in config.relations or not in_general_ns(p):
+                targets = relationmapper.get(p)
+                if targets is not None:
+                    for uri, inverse in targets:
+                        if uri is None:
+                            continue
+                        result.append((o, uri, s) if inverse else (s, uri, o))
+                    continue
+        result.append((s, p, o))
+
+    return _transform_labels(result, config.default_language)
+
+
+def _transform_labels(triples, defaultlanguage):
+    """Clean up label whitespace and language tags, and turn
+    skosext:candidateLabel values into prefLabels or altLabels."""
+    result = []
+    candidates = []
+    for s, p, o in triples:
+        if p in LABEL_PROPERTIES and isinstance(o, Literal):
+            if len(o.strip()) < len(o):
+                diagnostics.warning(
+                    'label-whitespace',
+                    "Stripping whitespace from label of %s: '%s'", s, o)
+                o = Literal(o.strip(), o.language)
+            if defaultlanguage and o.language is None:
+                diagnostics.warning(
+                    'label-default-language',
+                    "Setting default language of '%s' to %s",
+                    o, defaultlanguage)
+                o = Literal(o, defaultlanguage)
+        if p == SKOSEXT.candidateLabel:
+            candidates.append((s, p, o))
+        else:
+            result.append((s, p, o))
+
+    preflangs = set(o.language for s, p, o in result if p == SKOS.prefLabel)
+    for s, p, o in candidates:
+        if o.language not in preflangs:
+            result.append((s, SKOS.prefLabel, o))
+        else:
+            result.append((s, SKOS.altLabel, o))
+    return result
+
+
+def _infer_from_triple(triple, enrich_mappings, narrower):
+    """Return the triples directly inferred from the given triple and whether
+    the triple itself should be kept, following enrich_relations."""
+    s, p, o = triple
+    if p == SKOS.related:
+        return [(o, SKOS.related, s)], True
+    if p in (SKOSEXT.broaderGeneric, SKOSEXT.broaderPartitive):
+        return [(s, SKOS.broader, o)], True
+    if p == SKOS.broader:
+        return ([(o, SKOS.narrower, s)] if narrower else []), True
+    if p == SKOS.narrower:
+        return [(o, SKOS.broader, s)], narrower
+    if p in (SKOS.broaderTransitive, SKOS.narrowerTransitive):
+        return [], False
+    if p == SKOS.hasTopConcept:
+        return [(o, SKOS.topConceptOf, s)], True
+    if p == SKOS.topConceptOf:
+        return [(o, SKOS.hasTopConcept, s), (s, SKOS.inScheme, o)], True
+    if enrich_mappings:
+        if p == SKOS.relatedMatch:
+            return [(o, SKOS.relatedMatch, s), (s, SKOS.related, o)], True
+        if p in (SKOS.closeMatch, SKOS.exactMatch):
+            return [(o, p, s)], True
+        if p == SKOS.broadMatch:
+            return [(s, SKOS.broader, o)] + \
+                ([(o, SKOS.narrowMatch, s)] if narrower else []), True
+        if p == SKOS.narrowMatch:
+            return [(o, SKOS.broadMatch, s)], narrower
+    return [], True
+
+
+def _enrich_triple(triple, enrich_mappings, narrower):
+    """Return the given triple together with all the triples that can be
+    inferred from it alone.
+
+    The original triple is left out if it should be removed from the output.
+    """
+    seen = set([triple])
+    to_search = [triple]
+    result = []
+    while to_search:
+        t = to_search.pop()
+        inferred, keep = _infer_from_triple(t, enrich_mappings, narrower)
+        if keep:
+            result.append(t)
+        for i in inferred:
+            if isinstance(i[0], Literal):
+                continue  # a literal can't be a subject
+            if i not in seen:
+                seen.add(i)
+                to_search.append(i)
+    return result
+
+
+def _read_lines(sources, from_format):
+    """Read N-Triples lines from the sources, normalized for sorting."""
+    for idx, source in enumerate(sources):
+        fmt = from_format or guess_format(uncompressed_name(source) if source != '-' else '')
+        if source != '-' and fmt not in NTRIPLES_FORMATS:
+            raise ValueError("Out-of-core mode requires N-Triples input, "
+                             "but %s does not look like N-Triples" % source)
+        logging.debug("Reading input file %s", source)
+        f = io.TextIOWrapper(open_input(source), encoding='utf-8-sig')
+        try:
+            for line in f:
+                if len(sources) > 1:
+                    # keep blank nodes of different sources apart
+                    triple = parse_line(line, bnode_prefix='s%db' % idx)
+                    if triple is not None:
+                        yield format_triple(triple)
+                else:
+                    key = subject_key(line)
+                    if key is not None:
+                        yield key
+        finally:
+            if source == '-':
+                f.detach()  # leave stdin open
+            else:
+                f.close()
+
+
+def skosify_ntriples(*sources, **config):
+    """Convert N-Triples sources to SKOS with bounded memory, writing
+    N-Triples output.
+
+    Accepts the same options as skosify(), plus output (output file name,
+    default "-" for stdout), compression (gz, bz2 or xz; by default
+    according to the output file extension), chunk_size (number of lines to
+    sort in memory) and tmpdir (directory for temporary sort files). Raises
+    ValueError if an option requires processing the whole graph in memory.
+
+    Returns the number of triples written.
+    """
+
+    output = config.pop('output', '-')
+    compression = config.pop('compression', None)
+    chunk_size = config.pop('chunk_size', DEFAULT_CHUNK_SIZE)
+    tmpdir = config.pop('tmpdir', None)
+
+    config = make_config(**config)
+    check_config(config)
+    if output != '-' and not config.to_format and \
+       guess_format(uncompressed_name(output)) not in NTRIPLES_FORMATS:
+        raise ValueError("Out-of-core mode requires N-Triples output, "
+                         "but %s does not look like N-Triples" % output)
+
+    starttime = time.time()
+    typemapper = _Mapper(config.types, 'type')
+    literalmapper = _Mapper(config.literals, 'literal')
+    relationmapper = _Mapper(config.relations, 'relation')
+
+    def transformed_lines():
+        lines = external_sort(_read_lines(sources, config.from_format),
+                              chunk_size=chunk_size, tmpdir=tmpdir)
+        triples = (parse_line(line) for line in lines)
+        for subj, group in itertools.groupby(triples, key=lambda t: t[0]):
+            for triple in _transform_subject(
+                    list(group), config, typemapper, literalmapper, relationmapper):
+                for t in _enrich_triple(triple, config.enrich_mappings, config.narrower):
+                    yield format_triple(t)
+
+    out = io.TextIOWrapper(open_output(output, compression), encoding='utf-8', newline='\n')
+
+    count = 0
+    try:
+        with diagnostics.Diagnostics(config.diagnostics, config.diagnostics_samples):
+            for line in external_sort(transformed_lines(), chunk_size=chunk_size,
+                                      unique=True, tmpdir=tmpdir):
+                out.write(line)
+                count += 1
+    finally:
+        out.close()
+
+    logging.debug("out-of-core processing took %d seconds", time.time() - starttime)
+    logging.info("Wrote %d triples to %s", count, output)
+    return count
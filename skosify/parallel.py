@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+"""Concurrent execution of read-only checks.
+
+When the checks only report problems without fixing them, they don't
+depend on each other and can run at the same time. The triples that the
+checks look at are extracted once into an immutable snapshot, which is
+handed to the worker processes when they start (without copying, where
+processes are forked). Each worker builds a graph of just the predicates
+its check needs. The problems found are reported in the order of the
+checks, so the result doesn't depend on which check finishes first.
+
+In skosify(), the label overlap check always fixes the problems it finds,
+so it runs concurrently only in the read-only skosify.validate.
+"""
+
+import logging
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from rdflib import Graph
+from rdflib.namespace import RDF, SKOS
+
+from . import check, diagnostics
+from .rdftools import deterministic_order
+from .rdftools.io import worker_count
+
+# the check functions by name, with the predicates they read
+CHECKS = {
+    'hierarchy_cycles': (check.hierarchy_cycles,
+                         (RDF.type, SKOS.hasTopConcept, SKOS.broader)),
+    'disjoint_relations': (check.disjoint_relations,
+                           (SKOS.related, SKOS.broader)),
+    'hierarchical_redundancy': (check.hierarchical_redundancy,
+                                (SKOS.broader,)),
+    'preflabel_uniqueness': (check.preflabel_uniqueness,
+                             (SKOS.prefLabel,)),
+    'label_overlap': (check.label_overlap,
+                      (SKOS.prefLabel, SKOS.altLabel, SKOS.hiddenLabel)),
+}
+
+# snapshot of the graph in a worker process, set by _init_worker
+_snapshot = None
+
+
+def snapshot(rdf, predicates):
+    """Return a dict mapping each predicate to a tuple of (subject, object)
+    pairs. Of rdf:type only the skos:Concept instances are included."""
+    result = {}
+    for pred in predicates:
+        if pred == RDF.type:
+            result[pred] = tuple((s, SKOS.Concept) for s in rdf.subjects(RDF.type, SKOS.Concept))
+        else:
+            result[pred] = tuple(rdf.subject_objects(pred))
+    return result
+
+
+def _init_worker(data):
+    global _snapshot
+    _snapshot = data
+
+
+def _run_check(name, args, samples, deterministic):
+    """Run one check on a graph built from the snapshot, in a worker."""
+    func, predicates = CHECKS[name]
+    rdf = Graph()
+    for pred in predicates:
+        rdf.addN((s, pred, o, rdf) for s, o in _snapshot[pred])
+    with deterministic_order(deterministic), \
+            diagnostics.Diagnostics('summary', samples, log_summary=False) as diag:
+        value = func(rdf, *args)
+    return value, diag.results()
+
+
+def run_checks(rdf, checks, workers=0, deterministic=True):
+    """Run the given read-only checks concurrently in worker processes.
+
+    checks is a list of (name, args) tuples, where name is a key of CHECKS
+    and args are the arguments of the check function after the graph. The
+    checks must not be asked to fix anything. Returns the list of values
+    returned by the checks.
+    """
+    starttime = time.time()
+    predicates = set()
+    for name, args in checks:
+        predicates.update(CHECKS[name][1])
+    data = snapshot(rdf, predicates)
+
+    samples = diagnostics.worker_samples()
+    with ProcessPoolExecutor(max_workers=worker_count(workers, len(checks)), initializer=_init_worker,
+                             initargs=(data,)) as executor:
+        futures = [executor.submit(_run_check, name, args, samples, deterministic)
+                   for name, args in checks]
+        results = [future.result() for future in futures]
+
+    values = []
+    for value, problems in results:
+        diagnostics.merge(problems)
+        values.append(value)
+    logging.debug("parallel checks took %f seconds", time.time() - starttime)
+    return values
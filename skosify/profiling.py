@@ -0,0 +1,250 @@
+# -*- coding: utf-8 -*-
+"""Optional per-phase profiling of skosify runs.
+
+Profilers are notified at every phase boundary of skosify() through
+phase(name, rdf) and at the end of the run through finish(rdf). Their
+close() is called after finish(), or instead of it if the run fails.
+"""
+
+import cProfile
+import logging
+import os
+import pstats
+import re
+import sys
+import time
+import tracemalloc
+from collections import defaultdict
+
+from rdflib import URIRef, BNode, Literal
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+# number of top allocation sites to include in the report for each phase
+TOP_ALLOCATIONS = 10
+
+# number of functions with the most self time to summarise for each phase
+TOP_FUNCTIONS = 15
+
+# call stacks deeper than this are cut off in the collapsed stack output
+MAX_STACK_DEPTH = 100
+
+
+def peak_rss():
+    """Return the peak resident set size of this process in bytes, or None
+    if it cannot be determined on this platform."""
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == 'darwin':
+        return rss  # reported in bytes
+    return rss * 1024  # reported in kilobytes
+
+
+def count_terms(rdf):
+    """Count the distinct term objects used in the graph by term type.
+
+    Terms are counted by object identity, so equal terms that are stored as
+    separate Python objects are counted separately.
+    """
+    seen = {URIRef: set(), Literal: set(), BNode: set()}
+    for triple in rdf:
+        for term in triple:
+            for termtype, ids in seen.items():
+                if isinstance(term, termtype):
+                    ids.add(id(term))
+                    break
+    return dict((termtype.__name__, len(ids)) for termtype, ids in seen.items())
+
+
+def _size(value):
+    if value is None:
+        return 'n/a'
+    if value < 1048576:
+        return '%.1f kB' % (value / 1024.0)
+    return '%.1f MB' % (value / 1048576.0)
+
+
+class MemoryProfiler(object):
+    """Record memory usage at each phase boundary and write a report."""
+
+    def __init__(self, report, top=TOP_ALLOCATIONS):
+        self.report = report
+        self.top = top
+        self.records = []
+        self.current = None
+        self.started_tracing = not tracemalloc.is_tracing()
+        if self.started_tracing:
+            tracemalloc.start()
+
+    def _close_phase(self, rdf):
+        if self.current is None:
+            return
+        name, starttime = self.current
+        current, peak = tracemalloc.get_traced_memory()
+        stats = tracemalloc.take_snapshot().statistics('lineno')[:self.top]
+        self.records.append({
+            'phase': name,
+            'seconds': time.time() - starttime,
+            'peak_rss': peak_rss(),
+            'traced_current': current,
+            'traced_peak': peak,
+            'triples': len(rdf) if rdf is not None else None,
+            'terms': count_terms(rdf) if rdf is not None else {},
+            'top': stats,
+        })
+        if hasattr(tracemalloc, 'reset_peak'):  # Python 3.9+
+            tracemalloc.reset_peak()
+        self.current = None
+
+    def phase(self, name, rdf):
+        """Finish measuring the previous phase and start the given one."""
+        self._close_phase(rdf)
+        self.current = (name, time.time())
+
+    def finish(self, rdf):
+        """Finish measuring the last phase and write the report."""
+        self._close_phase(rdf)
+        self.close()
+        with open(self.report, 'w', encoding='utf-8') as f:
+            self.write_report(f)
+        logging.info("Wrote memory profile to %s", self.report)
+
+    def close(self):
+        """Stop tracing memory allocations, if this profiler started it."""
+        if self.started_tracing:
+            tracemalloc.stop()
+            self.started_tracing = False
+
+    def write_report(self, out):
+        """Write a plain text report of the recorded phases."""
+        for rec in self.records:
+            out.write("%s\n" % rec['phase'])
+            out.write("  duration:          %.2f s\n" % rec['seconds'])
+            out.write("  peak RSS:          %s\n" % _size(rec['peak_rss']))
+            out.write("  traced memory:     %s (peak %s)\n" %
+                      (_size(rec['traced_current']), _size(rec['traced_peak'])))
+            if rec['triples'] is not None:
+                out.write("  triples:           %d\n" % rec['triples'])
+            for termtype, count in sorted(rec['terms'].items()):
+                out.write("  %-18s %d\n" % (termtype + ' objects:', count))
+            out.write("  top allocations:\n")
+            for stat in rec['top']:
+                frame = stat.traceback[0]
+                out.write("    %s  %s:%d (%d blocks)\n" %
+                          (_size(stat.size), frame.filename, frame.lineno, stat.count))
+            out.write("\n")
+
+
+def _label(func):
+    """Return a readable name for a function in pstats."""
+    filename, lineno, name = func
+    if filename == '~':  # built-in function
+        return name
+    return '%s (%s:%d)' % (name, os.path.basename(filename), lineno)
+
+
+def collapsed_stacks(stats):
+    """Return a dict mapping call stacks, as tuples of function names, to
+    the self time spent in them in microseconds.
+
+    cProfile records only the callers of each function, not whole stacks,
+    so the time of a function called from several places is divided
+    between its callers in proportion to the time spent in the calls.
+    """
+    callees = defaultdict(dict)
+    for func, (cc, nc, tt, ct, callers) in stats.stats.items():
+        for caller, edge in callers.items():
+            callees[caller][func] = edge[3]  # cumulative time of the calls
+    result = defaultdict(float)
+
+    def visit(func, stack, share):
+        tt, ct = stats.stats[func][2:4]
+        stack = stack + (func,)
+        result[stack] += tt * share * 1e6
+        if len(stack) >= MAX_STACK_DEPTH:
+            return
+        for callee, edge_ct in callees[func].items():
+            callee_ct = stats.stats[callee][3]
+            if callee in stack or callee_ct <= 0:
+                continue
+            callee_share = share * edge_ct / callee_ct
+            if callee_ct * callee_share >= 1e-6:  # skip calls under 1 us
+                visit(callee, stack, callee_share)
+
+    for func, (cc, nc, tt, ct, callers) in stats.stats.items():
+        if not callers:
+            visit(func, (), 1.0)
+    return result
+
+
+def write_collapsed(stats, out):
+    """Write the call stacks of the pstats.Stats in the collapsed stack
+    format used by flame graph tools: the function names separated by
+    semicolons and the self time in microseconds on each line."""
+    lines = []
+    for stack, usecs in collapsed_stacks(stats).items():
+        if usecs >= 1:
+            lines.append('%s %d\n' % (';'.join(_label(func) for func in stack), usecs))
+    out.writelines(sorted(lines))
+
+
+class CallProfiler(object):
+    """Profile the function calls of each phase with cProfile, writing a
+    pstats file and a collapsed stack file for each phase and a summary of
+    the functions with the most self time into the given directory."""
+
+    def __init__(self, directory, top=TOP_FUNCTIONS):
+        self.directory = directory
+        self.top = top
+        self.phases = []
+        self.current = None
+        self.profile = None
+        os.makedirs(directory, exist_ok=True)
+
+    def _close_phase(self):
+        if self.profile is None:
+            return
+        self.profile.disable()
+        slug = re.sub(r'[^a-z0-9]+', '-', self.current.lower()).strip('-')
+        base = os.path.join(self.directory, '%02d-%s' % (len(self.phases) + 1, slug))
+        self.profile.dump_stats(base + '.pstats')
+        stats = pstats.Stats(self.profile)
+        with open(base + '.folded', 'w', encoding='utf-8') as f:
+            write_collapsed(stats, f)
+        self.phases.append((self.current, stats))
+        self.profile = None
+
+    def phase(self, name, rdf):
+        """Finish profiling the previous phase and start the given one."""
+        self._close_phase()
+        self.current = name
+        self.profile = cProfile.Profile()
+        self.profile.enable()
+
+    def finish(self, rdf):
+        """Finish profiling the last phase and write the summary."""
+        self._close_phase()
+        summary = os.path.join(self.directory, 'summary.txt')
+        with open(summary, 'w', encoding='utf-8') as f:
+            self.write_summary(f)
+        logging.info("Wrote profiles of %d phases to %s", len(self.phases), self.directory)
+
+    def close(self):
+        """Stop profiling, discarding the phase in progress if the run
+        failed."""
+        if self.profile is not None:
+            self.profile.disable()
+            self.profile = None
+
+    def write_summary(self, out):
+        """Write the functions with the most self time in each phase."""
+        for name, stats in self.phases:
+            out.write("%s: %.3f s\n" % (name, stats.total_tt))
+            rows = sorted(stats.stats.items(), key=lambda item: item[1][2], reverse=True)
+            for func, (cc, nc, tt, ct, callers) in rows[:self.top]:
+                out.write("  %9.3f s %10d calls  %s\n" % (tt, nc, _label(func)))
+            out.write("\n")
@@ -2,9 +2,11 @@
 """Utility module with generic RDF methods not specific to SKOS."""
 
 from .io import read_rdf, write_rdf
-from .access import localname, find_prop_overlap
-from .modify import replace_subject, replace_predicate, replace_object, replace_uri, delete_uri
+from .access import localname, find_prop_overlap, ordered, deterministic_order
+from .modify import replace_subject, replace_predicate, replace_object, replace_uri, delete_uri, delete_uris, \
+    rewrite_uris
 
 __all__ = ['read_rdf', 'write_rdf', 'localname', 'find_prop_overlap',
+           'ordered', 'deterministic_order',
            'replace_subject', 'replace_predicate', 'replace_object',
-           'replace_uri', 'delete_uri']
+           'replace_uri', 'delete_uri', 'delete_uris', 'rewrite_uris']
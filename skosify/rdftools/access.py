@@ -1,14 +1,45 @@
 # -*- coding: utf-8 -*-
 """Generic RDF utility methods to extract data."""
 
+import threading
+from contextlib import contextmanager
+
+from . import progress
+
+_local = threading.local()
+
 
 def localname(uri):
     """Determine the presumable local name (after namespace) of an URI."""
     return uri.split('/')[-1].split('#')[-1]
 
 
+@contextmanager
+def deterministic_order(enabled=True):
+    """Enable or disable sorting in ordered() within the context."""
+    previous = getattr(_local, 'deterministic', True)
+    _local.deterministic = enabled
+    try:
+        yield
+    finally:
+        _local.deterministic = previous
+
+
+def ordered(iterable):
+    """Return the items of iterable as a list, sorted unless deterministic
+    ordering has been disabled with deterministic_order(False).
+
+    Use this where the order only affects e.g. the order of log messages,
+    not the result. The list is a snapshot, so the graph may be modified
+    while iterating over it.
+    """
+    if getattr(_local, 'deterministic', True):
+        return sorted(iterable)
+    return list(iterable)
+
+
 def find_prop_overlap(rdf, prop1, prop2):
     """Generate (subject,object) pairs connected by two properties."""
-    for s, o in sorted(rdf.subject_objects(prop1)):
+    for s, o in progress.iterate(ordered(rdf.subject_objects(prop1)), 'labels'):
         if (s, prop2, o) in rdf:
             yield (s, o)
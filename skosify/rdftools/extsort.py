@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+"""External merge sort for streams of text lines."""
+
+import heapq
+import logging
+import os
+import tempfile
+
+# number of lines kept in memory before a sorted run is written to disk
+DEFAULT_CHUNK_SIZE = 1000000
+# maximum number of runs merged at the same time
+MERGE_FAN_IN = 64
+# buffer size used for run files
+BUFFER_SIZE = 1 << 20
+
+
+def _write_run(lines, tmpdir):
+    fd, path = tempfile.mkstemp(prefix='skosify-sort-', suffix='.txt', dir=tmpdir)
+    with open(fd, 'w', encoding='utf-8', newline='\n', buffering=BUFFER_SIZE) as f:
+        f.writelines(lines)
+    return path
+
+
+def _read_run(path):
+    with open(path, 'r', encoding='utf-8', newline='\n', buffering=BUFFER_SIZE) as f:
+        for line in f:
+            yield line
+
+
+def _unique(lines):
+    previous = None
+    for line in lines:
+        if line != previous:
+            yield line
+            previous = line
+
+
+def external_sort(lines, chunk_size=DEFAULT_CHUNK_SIZE, unique=False, tmpdir=None):
+    """Sort newline-terminated lines, spilling sorted runs to disk.
+
+    At most chunk_size lines are held in memory at once. The sorted lines are
+    generated lazily; the temporary run files are removed once the generator
+    is exhausted or closed. If unique is True, duplicate lines are dropped.
+
+    """
+    runs = []
+    try:
+        chunk = []
+        for line in lines:
+            chunk.append(line)
+            if len(chunk) >= chunk_size:
+                chunk.sort()
+                runs.append(_write_run(_unique(chunk) if unique else chunk, tmpdir))
+                chunk = []
+        chunk.sort()
+
+        if not runs:
+            # everything fit in memory
+            for line in (_unique(chunk) if unique else chunk):
+                yield line
+            return
+
+        if chunk:
+            runs.append(_write_run(_unique(chunk) if unique else chunk, tmpdir))
+        del chunk
+        logging.debug("external sort: merging %d sorted runs", len(runs))
+
+        # merge in several levels if there are too many runs to keep open
+        while len(runs) > MERGE_FAN_IN:
+            group = runs[:MERGE_FAN_IN]
+            merged = heapq.merge(*[_read_run(path) for path in group])
+            runs = runs[MERGE_FAN_IN:] + [_write_run(_unique(merged) if unique else merged, tmpdir)]
+            for path in group:
+                os.remove(path)
+
+        merged = heapq.merge(*[_read_run(path) for path in runs])
+        for line in (_unique(merged) if unique else merged):
+            yield line
+    finally:
+        for path in runs:
+            if os.path.exists(path):
+                os.remove(path)
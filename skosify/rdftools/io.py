@@ -1,39 +1,257 @@
 # -*- coding: utf-8 -*-
 """Generic RDF utility methods to parse and serialize RDF."""
 
+import bz2
+import codecs
+import gzip
+import io
 import logging
+import lzma
+import mmap
+import os
+import pathlib
+import re
 import sys
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 
-from rdflib import Graph
+from rdflib import Graph, BNode
+from rdflib.namespace import RDF, SKOS
 from rdflib.util import guess_format
 
+from . import progress
+from .access import localname
+from .ntriples import write_canonical, iter_buffer_triples
+from .extsort import BUFFER_SIZE
+
+# output formats written by write_canonical, mapped to whether quads are written
+CANONICAL_FORMATS = {
+    'nt-canonical': False,
+    'nquads-canonical': True,
+}
+
+NTRIPLES_FORMATS = ('nt', 'nt11', 'ntriples')
+
+# compressed file types by extension, with the modules to open them
+COMPRESSIONS = {
+    'gz': gzip,
+    'bz2': bz2,
+    'xz': lzma,
+}
+
+# magic bytes at the start of compressed input
+COMPRESSION_MAGIC = (
+    (b'\x1f\x8b', gzip),
+    (b'BZh', bz2),
+    (b'\xfd7zXZ\x00', lzma),
+)
+
+
+def compression_of(filename):
+    """Return the compression type ("gz", "bz2" or "xz") indicated by the
+    file name extension, or None."""
+    ext = filename.rsplit('.', 1)[-1].lower()
+    if ext in COMPRESSIONS and '.' in filename:
+        return ext
+    return None
+
+
+def uncompressed_name(filename):
+    """Return the file name without a compression extension, for guessing
+    the RDF format."""
+    if compression_of(filename):
+        return filename.rsplit('.', 1)[0]
+    return filename
+
+
+def open_input(source):
+    """Open a file name, or stdin if source is "-", for reading bytes.
+
+    gzip, bz2 and xz compressed data is detected by its magic bytes and
+    decompressed while reading.
+    """
+    if source == '-':
+        raw = sys.stdin.buffer
+    else:
+        raw = open(source, 'rb', buffering=BUFFER_SIZE)
+    head = raw.peek(6)
+    for magic, module in COMPRESSION_MAGIC:
+        if head.startswith(magic):
+            logging.debug("Decompressing %s input from %s", module.__name__, source)
+            return _CompressedInput(module.open(raw, 'rb'), raw, source != '-')
+    return raw
+
+
+def open_output(filename, compression=None):
+    """Open a file name, or stdout if filename is "-", for writing bytes.
+
+    The output is compressed with the given compression type ("gz", "bz2"
+    or "xz"), or by default the one indicated by the file name extension.
+    Closing the returned file does not close stdout.
+    """
+    if compression is None:
+        compression = compression_of(filename)
+    if filename == '-':
+        # In Python 3 raw bytes must be written to stdout.buffer
+        raw = sys.stdout.buffer
+        if not compression:
+            return _Unclosable(raw)
+    else:
+        raw = open(filename, 'wb', buffering=BUFFER_SIZE)
+    if not compression:
+        return raw
+    logging.debug("Compressing output to %s with %s", filename, compression)
+    return compress_output(raw, compression, filename != '-')
+
+
+def compress_output(raw, compression, close_raw=True):
+    """Wrap a binary file for writing data compressed with the given
+    compression type ("gz", "bz2" or "xz"). Closing the returned file also
+    closes the wrapped one if close_raw is True, and flushes it otherwise."""
+    try:
+        module = COMPRESSIONS[compression]
+    except KeyError:
+        raise ValueError("Unknown compression: %s" % compression)
+    return _CompressedOutput(module.open(raw, 'wb'), raw, close_raw)
+
+
+def is_compressed(filename):
+    """Return True if the file starts with gzip, bz2 or xz magic bytes."""
+    with open(filename, 'rb') as f:
+        head = f.read(6)
+    return any(head.startswith(magic) for magic, _ in COMPRESSION_MAGIC)
+
+
+def is_ntriples_file(source, infmt):
+    """Return True if the source is an uncompressed N-Triples file, which
+    can be read with read_ntriples or iter_ntriples."""
+    return (source != '-' and input_format(source, infmt) in NTRIPLES_FORMATS and
+            not is_compressed(source))
+
+
+def iter_ntriples(filename):
+    """Generate the triples of an uncompressed N-Triples file.
+
+    The file is memory-mapped and tokenized straight from the mapped
+    buffer, without decoding it into lines of text first.
+    """
+    with open(filename, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return  # empty files can't be mapped
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            for triple in progress.iterate(iter_buffer_triples(buf), 'triples'):
+                yield triple
+
+
+def read_ntriples(filename, rdf=None):
+    """Parse an uncompressed N-Triples file into the graph rdf (by default
+    a new Graph) and return the graph."""
+    if rdf is None:
+        rdf = Graph()
+    rdf.addN((s, p, o, rdf) for s, p, o in iter_ntriples(filename))
+    return rdf
+
+
+class _Unclosable(io.BufferedIOBase):
+    """Writable wrapper that flushes but does not close the wrapped file."""
+
+    def __init__(self, raw):
+        self.raw = raw
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        return self.raw.write(data)
+
+    def close(self):
+        if not self.closed:
+            self.raw.flush()
+        super(_Unclosable, self).close()
+
+
+class _CompressedInput(io.BufferedReader):
+    """Buffered decompressing reader that also closes the underlying file."""
+
+    def __init__(self, decompressor, raw, close_raw):
+        super(_CompressedInput, self).__init__(decompressor, BUFFER_SIZE)
+        self._source = raw
+        self._close_source = close_raw
+
+    def close(self):
+        if self.closed:
+            return
+        super(_CompressedInput, self).close()
+        if self._close_source:
+            self._source.close()
+
+
+class _CompressedOutput(io.BufferedWriter):
+    """Buffered compressing writer that also closes the underlying file."""
+
+    def __init__(self, compressor, raw, close_raw):
+        super(_CompressedOutput, self).__init__(compressor, BUFFER_SIZE)
+        self._target = raw
+        self._close_target = close_raw
+
+    def close(self):
+        if self.closed:
+            return
+        super(_CompressedOutput, self).close()
+        if self._close_target:
+            self._target.close()
+        else:
+            self._target.flush()
+
+
+def input_format(source, infmt):
+    """Return the RDF format of an input file: infmt if given, otherwise
+    guessed from the file name extension, ignoring compression."""
+    if infmt:
+        return infmt
+    return guess_format(uncompressed_name(source)) or 'xml'
+
+
+def parse_data(rdf, data, fmt, name=None):
+    """Parse uncompressed RDF data in bytes into the graph. Relative IRIs
+    are resolved against the file name, if given."""
+    if fmt in NTRIPLES_FORMATS:
+        rdf.addN((s, p, o, rdf) for s, p, o in iter_buffer_triples(data))
+        return
+    if data.startswith(codecs.BOM_UTF8):
+        data = data[len(codecs.BOM_UTF8):]
+    base = pathlib.Path(name).absolute().as_uri() if name else None
+    rdf.parse(data=data, format=fmt, publicID=base)
+
 
 def read_rdf(sources, infmt):
-    """Read a list of RDF files and/or RDF graphs. May raise an Exception."""
+    """Read a list of RDF files and/or RDF graphs. May raise an Exception.
+
+    A source may also be an object with a read_into(graph) method, such as
+    a skosify.sparqldump.SparqlSource, which adds its triples to the graph.
+    """
     rdf = Graph()
 
     for source in sources:
         if isinstance(source, Graph):
-            for triple in source:
+            for triple in progress.iterate(source, 'triples'):
                 rdf.add(triple)
             continue
 
-        if source == '-':
-            f = sys.stdin
-        else:
-            if sys.version_info[0] >= 3:
-                # Python 3+ - force UTF-8
-                f = open(source, 'r', encoding='utf-8-sig')
-            else:
-                f = open(source, 'r')
+        if hasattr(source, 'read_into'):
+            logging.debug("Reading input from %s", source)
+            source.read_into(rdf)
+            continue
 
-        if infmt:
-            fmt = infmt
-        else:
-            # determine format based on file extension
-            fmt = guess_format(source)
-            if not fmt:
-                fmt = 'xml'  # default
+        if is_ntriples_file(source, infmt):
+            logging.debug("Reading N-Triples file %s", source)
+            read_ntriples(source, rdf)
+            continue
+
+        fmt = input_format(source, infmt)
+
+        # force UTF-8
+        f = io.TextIOWrapper(open_input(source), encoding='utf-8-sig')
 
         if fmt == 'nt' and sys.version_info[0] >= 3:
             # Avoid using N-Triples parser on Python 3
@@ -42,28 +260,174 @@ def read_rdf(sources, infmt):
             fmt = 'n3'
 
         logging.debug("Parsing input file %s (format: %s)", source, fmt)
-        rdf.parse(f, format=fmt)
+        try:
+            if source == '-':
+                rdf.parse(f, format=fmt, publicID='file:///dev/stdin')
+            else:
+                rdf.parse(f, format=fmt)
+        finally:
+            if source != '-':
+                f.close()
+            elif not f.closed:
+                f.detach()  # leave stdin open
 
     return rdf
 
 
-def write_rdf(rdf, filename, fmt):
+def _bnode_schemes(rdf, bnode, member):
+    """Return the concept schemes of the named resources that refer to the
+    blank node, directly or through other blank nodes."""
+    schemes = []
+    seen = set([bnode])
+    to_search = [bnode]
+    while to_search:
+        for s in rdf.subjects(None, to_search.pop()):
+            if isinstance(s, BNode):
+                if s not in seen:
+                    seen.add(s)
+                    to_search.append(s)
+                continue
+            for cs in member.get(s, ()):
+                if cs not in schemes:
+                    schemes.append(cs)
+    return schemes
+
+
+def split_by_scheme(rdf):
+    """Divide the triples of the graph by concept scheme in one pass.
+
+    Each concept scheme gets its own triples and those of the resources
+    that are skos:inScheme it, including the blank nodes they refer to. A
+    resource in several schemes is included in each of them. Returns an
+    OrderedDict mapping each concept scheme, in sorted order, to a list of
+    triples; the triples not belonging to any scheme are under the key None.
+    """
+    schemes = sorted(rdf.subjects(RDF.type, SKOS.ConceptScheme))
+    member = dict((cs, [cs]) for cs in schemes)
+    for s, cs in rdf.subject_objects(SKOS.inScheme):
+        if cs in member and s != cs:
+            member.setdefault(s, [])
+            if cs not in member[s]:
+                member[s].append(cs)
+
+    parts = OrderedDict((cs, []) for cs in schemes)
+    parts[None] = []
+    bnode_member = {}
+    for triple in rdf:
+        s = triple[0]
+        owners = member.get(s)
+        if owners is None and isinstance(s, BNode):
+            if s not in bnode_member:
+                bnode_member[s] = _bnode_schemes(rdf, s, member)
+            owners = bnode_member[s]
+        for cs in owners or (None,):
+            parts[cs].append(triple)
+    return parts
+
+
+def split_filename(filename, name):
+    """Insert a name before the extensions of a file name, e.g.
+    split_filename("voc.ttl.gz", "scheme") returns "voc-scheme.ttl.gz"."""
+    inner = uncompressed_name(filename)
+    stem, ext = os.path.splitext(inner)
+    return '%s-%s%s%s' % (stem, name, ext, filename[len(inner):])
+
+
+def _write_part(triples, namespaces, filename, fmt, compression):
+    rdf = Graph()
+    for prefix, ns in namespaces:
+        rdf.bind(prefix, ns, override=True)
+    rdf.addN((s, p, o, rdf) for s, p, o in triples)
+    write_rdf(rdf, filename, fmt, compression)
+    return filename
+
+
+def worker_count(workers, jobs=None):
+    """Return the number of worker processes to use for the given number of
+    jobs: workers, or the number of CPUs if it is 0, but no more than the
+    number of jobs."""
+    workers = int(workers) or os.cpu_count() or 1
+    if jobs is not None:
+        workers = min(workers, jobs)
+    return workers
+
+
+def write_split(rdf, filename, fmt, compression=None, workers=0):
+    """Write each concept scheme into its own file, as divided by
+    split_by_scheme(), serializing the files in parallel processes.
+
+    The files are named after the local names of the schemes, e.g.
+    "voc-conceptscheme.ttl" for the output file name "voc.ttl". Triples
+    not belonging to any scheme are written to "voc-other.ttl". Returns the
+    list of file names written.
+    """
     if filename == '-':
-        # In Python 3 raw bytes must be written to stdout.buffer
-        # This works in Python 2.7 as well
-        out = sys.stdout.buffer
-    else:
-        out = open(filename, 'wb')
+        raise ValueError("Split output needs an output file name")
+    namespaces = list(rdf.namespaces())
 
-    if not fmt:
-        # determine output format
-        fmt = 'xml'  # default
-        if filename.endswith('n3'):
-            fmt = 'n3'
-        if filename.endswith('nt'):
-            fmt = 'nt'
-        if filename.endswith('ttl'):
-            fmt = 'turtle'
+    jobs = []
+    used = set()
+    for cs, triples in split_by_scheme(rdf).items():
+        if not triples:
+            continue
+        name = re.sub(r'[^\w.-]', '_', localname(cs)) if cs is not None else 'other'
+        name = name or 'scheme'
+        unique = name
+        counter = 1
+        while unique in used:
+            counter += 1
+            unique = '%s-%d' % (name, counter)
+        used.add(unique)
+        jobs.append((triples, namespaces, split_filename(filename, unique), fmt, compression))
+
+    workers = worker_count(workers, len(jobs))
+    if workers < 2:
+        return [_write_part(*job) for job in jobs]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(_write_part, *job) for job in jobs]
+        return [future.result() for future in futures]
+
+
+def write_rdf(rdf, filename, fmt, compression=None, split=False, workers=0):
+    """Serialize the graph into a file, or to stdout if filename is "-".
+
+    Besides the rdflib serialization formats, fmt may be "nt-canonical" or
+    "nquads-canonical" for sorted output with stable blank node labels.
+    The output is compressed if compression ("gz", "bz2" or "xz") is given
+    or the file name has one of these extensions. If split is True, each
+    concept scheme is written into a separate file using write_split().
+    """
+    if split:
+        return write_split(rdf, filename, fmt, compression, workers)
 
+    out = open_output(filename, compression)
+    fmt = output_format(filename, fmt)
     logging.debug("Writing output file %s (format: %s)", filename, fmt)
-    rdf.serialize(destination=out, format=fmt)
+    try:
+        serialize(rdf, out, fmt)
+    finally:
+        out.close()
+
+
+def output_format(filename, fmt):
+    """Return the RDF format for an output file: fmt if given, otherwise
+    determined by the file name extension, ignoring compression."""
+    if fmt:
+        return fmt
+    fmt = 'xml'  # default
+    name = uncompressed_name(filename)
+    if name.endswith('n3'):
+        fmt = 'n3'
+    if name.endswith('nt'):
+        fmt = 'nt'
+    if name.endswith('ttl'):
+        fmt = 'turtle'
+    return fmt
+
+
+def serialize(rdf, out, fmt):
+    """Serialize the graph in the given format into a binary file."""
+    if fmt in CANONICAL_FORMATS:
+        write_canonical(rdf, out, quads=CANONICAL_FORMATS[fmt])
+    else:
+        rdf.serialize(destination=out, format=fmt)
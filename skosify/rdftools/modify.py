@@ -1,6 +1,10 @@
 # -*- coding: utf-8 -*-
 
-from rdflib import RDF
+from rdflib import RDF, URIRef
+
+# rewriting up to len(rdf) / INDEX_LOOKUP_LIMIT URIs is done with index
+# lookups for each of them, more with a single pass over the whole graph
+INDEX_LOOKUP_LIMIT = 20
 
 
 def replace_subject(rdf, fromuri, touri):
@@ -95,4 +99,69 @@ def replace_uri(rdf, fromuri, touri):
 
 def delete_uri(rdf, uri):
     """Delete all occurrences of uri in the given model."""
-    replace_uri(rdf, uri, None)
+    delete_uris(rdf, (uri,))
+
+
+def delete_uris(rdf, uris, subjects_only=False):
+    """Delete all triples mentioning any of the given URIs (or blank nodes)
+    from the given model, or only the triples where one of them is the
+    subject if subjects_only is True.
+
+    The triples are removed by pattern, so that the store finds and removes
+    the matching triples in one call for each URI and position, instead of
+    each triple being looked up and removed separately.
+    """
+    for uri in set(uris):
+        rdf.remove((uri, None, None))
+        if not subjects_only:
+            rdf.remove((None, uri, None))
+            rdf.remove((None, None, uri))
+
+
+def rewrite_uris(rdf, mapping, namespaces=None):
+    """Rewrite URIs in the subject, predicate and object positions of the
+    triples in the given model.
+
+    mapping is a dict of old URIs to new URIs, and namespaces a dict of old
+    namespace URIs to new ones; a URI not found in mapping is rewritten by
+    the longest matching namespace. Returns the number of rewritten triples.
+    """
+    mapping = dict((URIRef(old), URIRef(new)) for old, new in mapping.items())
+    rules = sorted(((str(old), str(new)) for old, new in (namespaces or {}).items()),
+                   key=lambda rule: len(rule[0]), reverse=True)
+    rewritten = {}
+
+    def rewrite(term):
+        if not isinstance(term, URIRef):
+            return term
+        try:
+            return rewritten[term]
+        except KeyError:
+            pass
+        new = mapping.get(term, term)
+        if new is term:
+            for old, target in rules:
+                if term.startswith(old):
+                    new = URIRef(target + term[len(old):])
+                    break
+        rewritten[term] = new
+        return new
+
+    if rules or len(mapping) * INDEX_LOOKUP_LIMIT >= len(rdf):
+        triples = rdf
+    else:
+        triples = set()
+        for uri in mapping:
+            triples.update(rdf.triples((uri, None, None)))
+            triples.update(rdf.triples((None, uri, None)))
+            triples.update(rdf.triples((None, None, uri)))
+
+    changes = []
+    for s, p, o in triples:
+        new = (rewrite(s), rewrite(p), rewrite(o))
+        if new != (s, p, o):
+            changes.append(((s, p, o), new))
+    for old, new in changes:
+        rdf.remove(old)
+    rdf.addN((s, p, o, rdf) for _, (s, p, o) in changes)
+    return len(changes)
@@ -0,0 +1,291 @@
+# -*- coding: utf-8 -*-
+"""Line-oriented N-Triples parsing and serialization helpers.
+
+These work on one line at a time so that N-Triples data can be processed
+as a stream, without loading it into an rdflib Graph."""
+
+import hashlib
+import re
+
+from rdflib import URIRef, BNode, Literal
+from rdflib.plugins.parsers.ntriples import unquote
+
+from .extsort import external_sort, DEFAULT_CHUNK_SIZE, BUFFER_SIZE
+
+_IRI = r'<([^>]*)>'
+_BNODE = r'_:([^\s.<"]+(?:\.+[^\s.<"]+)*)'
+_LITERAL = r'"((?:[^"\\]|\\.)*)"(?:@([A-Za-z]+(?:-[A-Za-z0-9]+)*)|\^\^<([^>]*)>)?'
+
+_TRIPLE = re.compile(
+    r'\s*(?:' + _IRI + '|' + _BNODE + r')\s*' +
+    _IRI + r'\s*(?:' + _IRI + '|' + _BNODE + '|' + _LITERAL + r')' +
+    r'\s*\.\s*(?:#.*)?$')
+
+_SUBJECT = re.compile(r'\s*(<[^>]*>|_:[^\s<]+)\s*')
+
+# the same grammar on bytes, matching one line at a time in a larger buffer
+_WS = rb'[ \t]*'
+_EOL = rb'[ \t\r]*(?:#[^\n]*)?(?:\n|\Z)'
+_TRIPLE_BYTES = re.compile(
+    _WS + rb'(?:' + _IRI.encode() + b'|' + _BNODE.encode() + b')' + _WS +
+    _IRI.encode() + _WS + rb'(?:' + _IRI.encode() + b'|' + _BNODE.encode() +
+    b'|' + _LITERAL.encode() + b')' + _WS + rb'\.' + _EOL)
+_EMPTY_BYTES = re.compile(_EOL)
+_BOM = b'\xef\xbb\xbf'
+
+_LITERAL_ESCAPES = {'\\': '\\\\', '"': '\\"', '\n': '\\n', '\r': '\\r'}
+_LITERAL_ESCAPE_RE = re.compile(r'[\\"\n\r]')
+
+
+def _uri(value):
+    if '\\' in value:
+        value = unquote(value)
+    return URIRef(value)
+
+
+def parse_line(line, bnode_prefix=''):
+    """Parse one line of N-Triples into a (subject, predicate, object)
+    tuple of rdflib terms.
+
+    Returns None for blank and comment lines. Raises ValueError if the line
+    is not valid N-Triples. If bnode_prefix is given, it is prepended to all
+    blank node labels, which keeps blank nodes from different files apart.
+
+    """
+    m = _TRIPLE.match(line)
+    if m is None:
+        stripped = line.strip()
+        if stripped == '' or stripped.startswith('#'):
+            return None
+        raise ValueError("Invalid N-Triples line: %s" % stripped)
+    (s_iri, s_bnode, p_iri, o_iri, o_bnode,
+     o_lex, o_lang, o_datatype) = m.groups()
+
+    if s_iri is not None:
+        s = _uri(s_iri)
+    else:
+        s = BNode(bnode_prefix + s_bnode)
+    p = _uri(p_iri)
+    if o_iri is not None:
+        o = _uri(o_iri)
+    elif o_bnode is not None:
+        o = BNode(bnode_prefix + o_bnode)
+    else:
+        if '\\' in o_lex:
+            o_lex = unquote(o_lex)
+        if o_datatype is not None:
+            o = Literal(o_lex, datatype=_uri(o_datatype))
+        else:
+            o = Literal(o_lex, lang=o_lang)
+    return (s, p, o)
+
+
+def iter_buffer_triples(buf, bnodes=None):
+    """Parse N-Triples directly from a bytes-like buffer, such as an mmap,
+    yielding (subject, predicate, object) tuples of rdflib terms.
+
+    No line strings are created: only the term slices are copied out of the
+    buffer and decoded. Equal IRIs are returned as the same URIRef object,
+    and each blank node label gets one fresh BNode. To share the blank nodes
+    between several buffers, pass the same dict as bnodes. Raises ValueError
+    with the line number if the data is not valid N-Triples.
+    """
+    iris = {}
+    if bnodes is None:
+        bnodes = {}
+
+    def iri(raw):
+        try:
+            return iris[raw]
+        except KeyError:
+            term = iris[raw] = _uri(raw.decode('utf-8'))
+            return term
+
+    def bnode(raw):
+        try:
+            return bnodes[raw]
+        except KeyError:
+            term = bnodes[raw] = BNode()
+            return term
+
+    match_triple = _TRIPLE_BYTES.match
+    match_empty = _EMPTY_BYTES.match
+    pos = len(_BOM) if buf[:len(_BOM)] == _BOM else 0
+    end = len(buf)
+    while pos < end:
+        m = match_triple(buf, pos)
+        if m is None:
+            m = match_empty(buf, pos)
+            if m is None:
+                lineno = buf[:pos].count(b'\n') + 1
+                raise ValueError("Invalid N-Triples on line %d" % lineno)
+            pos = m.end()
+            continue
+        pos = m.end()
+        (s_iri, s_bnode, p_iri, o_iri, o_bnode,
+         o_lex, o_lang, o_datatype) = m.groups()
+
+        s = iri(s_iri) if s_iri is not None else bnode(s_bnode)
+        if o_iri is not None:
+            o = iri(o_iri)
+        elif o_bnode is not None:
+            o = bnode(o_bnode)
+        else:
+            lex = o_lex.decode('utf-8')
+            if '\\' in lex:
+                lex = unquote(lex)
+            if o_datatype is not None:
+                o = Literal(lex, datatype=iri(o_datatype))
+            else:
+                o = Literal(lex, lang=o_lang.decode('ascii') if o_lang else None)
+        yield (s, iri(p_iri), o)
+
+
+def subject_key(line):
+    """Return the line with its subject token separated by a single space
+    from the rest of the triple, or None for blank and comment lines.
+
+    Sorting lines normalized like this groups them by subject without having
+    to parse them completely.
+
+    """
+    m = _SUBJECT.match(line)
+    if m is None:
+        stripped = line.strip()
+        if stripped == '' or stripped.startswith('#'):
+            return None
+        raise ValueError("Invalid N-Triples line: %s" % stripped)
+    subject = m.group(1)
+    if '\\' in subject:
+        # escaped IRIs must be normalized, or the same subject could end up
+        # in two different groups
+        subject = format_term(_uri(subject[1:-1]))
+    return subject + ' ' + line[m.end():].strip() + '\n'
+
+
+def _escape_literal(match):
+    return _LITERAL_ESCAPES[match.group(0)]
+
+
+def format_term(term):
+    """Serialize an rdflib term in N-Triples syntax."""
+    if isinstance(term, Literal):
+        quoted = '"' + _LITERAL_ESCAPE_RE.sub(_escape_literal, str(term)) + '"'
+        if term.language is not None:
+            return quoted + '@' + term.language
+        if term.datatype is not None:
+            return '%s^^<%s>' % (quoted, term.datatype)
+        return quoted
+    if isinstance(term, BNode):
+        return '_:%s' % term
+    return '<%s>' % term
+
+
+def format_triple(triple):
+    """Serialize a triple as a line of N-Triples, including the newline."""
+    s, p, o = triple
+    return '%s %s %s .\n' % (format_term(s), format_term(p), format_term(o))
+
+
+def canonical_bnode_labels(rdf):
+    """Compute stable labels for the blank nodes of the graph.
+
+    Each blank node is labelled by a hash of its neighbourhood: the triples
+    it occurs in, with other blank nodes represented by the hashes of their
+    own neighbourhoods from the previous round. The rounds are repeated
+    until they don't tell any more blank nodes apart, so the labels don't
+    depend on the blank node identifiers assigned by the parser. Blank nodes
+    whose neighbourhoods can't be told apart are numbered in order of their
+    original identifiers.
+
+    Returns a dict mapping each BNode to its label.
+    """
+    bnodes = set()
+    for s, p, o in rdf:
+        if isinstance(s, BNode):
+            bnodes.add(s)
+        if isinstance(o, BNode):
+            bnodes.add(o)
+    if not bnodes:
+        return {}
+
+    signatures = dict((b, '') for b in bnodes)
+    distinct = 1
+    # each round that doesn't end the loop splits at least one group of
+    # blank nodes, so there can't be more rounds than blank nodes
+    for _ in range(len(bnodes)):
+        def fmt(term, this):
+            if term == this:
+                return '_:self'
+            if isinstance(term, BNode):
+                return '_:' + signatures[term]
+            return format_term(term)
+
+        # the previous hash is included, so that groups are only ever split
+        parts = dict((b, [signatures[b]]) for b in bnodes)
+        for s, p, o in rdf:
+            if isinstance(s, BNode):
+                parts[s].append('> %s %s' % (format_term(p), fmt(o, s)))
+            if isinstance(o, BNode):
+                parts[o].append('< %s %s' % (fmt(s, o), format_term(p)))
+        signatures = dict(
+            (b, hashlib.sha1('\n'.join(sorted(parts[b])).encode('utf-8')).hexdigest())
+            for b in bnodes)
+        new_distinct = len(set(signatures.values()))
+        if new_distinct == distinct or new_distinct == len(bnodes):
+            break
+        distinct = new_distinct
+
+    labels = {}
+    counts = {}
+    for b in sorted(bnodes, key=lambda b: (signatures[b], str(b))):
+        label = 'c' + signatures[b][:16]
+        n = counts.get(label, 0)
+        counts[label] = n + 1
+        labels[b] = label if n == 0 else '%s_%d' % (label, n)
+    return labels
+
+
+def _canonical_lines(rdf, labels, quads):
+    def fmt(term):
+        if isinstance(term, BNode):
+            return '_:' + labels[term]
+        return format_term(term)
+
+    if quads and rdf.context_aware:
+        if hasattr(rdf, 'default_graph'):
+            default = rdf.default_graph.identifier
+        else:
+            default = rdf.default_context.identifier
+        for s, p, o, ctx in rdf.quads((None, None, None)):
+            name = getattr(ctx, 'identifier', ctx)
+            if name is None or name == default:
+                yield '%s %s %s .\n' % (fmt(s), fmt(p), fmt(o))
+            else:
+                yield '%s %s %s %s .\n' % (fmt(s), fmt(p), fmt(o), fmt(name))
+    else:
+        for s, p, o in rdf:
+            yield '%s %s %s .\n' % (fmt(s), fmt(p), fmt(o))
+
+
+def write_canonical(rdf, out, quads=False, chunk_size=DEFAULT_CHUNK_SIZE, tmpdir=None):
+    """Write the graph to the binary file object out as sorted N-Triples, or
+    N-Quads if quads is True, with stable blank node labels.
+
+    The lines are sorted with an external sort, so memory use is bounded by
+    chunk_size lines in addition to the graph itself. Output is collected
+    into large blocks before writing.
+    """
+    labels = canonical_bnode_labels(rdf)
+    block = []
+    size = 0
+    for line in external_sort(_canonical_lines(rdf, labels, quads),
+                              chunk_size=chunk_size, unique=True, tmpdir=tmpdir):
+        data = line.encode('utf-8')
+        block.append(data)
+        size += len(data)
+        if size >= BUFFER_SIZE:
+            out.write(b''.join(block))
+            block = []
+            size = 0
+    out.write(b''.join(block))
@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+"""Progress reporting for long-running loops.
+
+A Progress tracker is activated as a context manager, like a Diagnostics
+collector, and also serves as a skosify() monitor to follow the phases.
+Loops over many items wrap their iterable with iterate(), or count their
+items with a Step returned by step(). Outside a Progress context iterate()
+returns the iterable as is and step() returns None, so the hooks cost
+nothing unless progress was requested. Inside one, the clock is read only
+every CHECK_EVERY items and the callback is called at most once per
+interval, plus once at the end of each phase and loop.
+"""
+
+import threading
+import time
+from collections import namedtuple
+
+# number of items processed between reading the clock
+CHECK_EVERY = 100
+
+# minimum number of seconds between progress events
+DEFAULT_INTERVAL = 0.5
+
+ProgressEvent = namedtuple('ProgressEvent', 'phase step done total rate')
+ProgressEvent.__doc__ = """Progress of a phase: the number of items done in
+the current step (e.g. "triples", "concepts"), out of total if known, and
+the rate in items per second. At the start of a phase, step is None."""
+
+_local = threading.local()
+
+
+def active():
+    """Return the innermost active Progress tracker, or None."""
+    stack = getattr(_local, 'stack', None)
+    if stack:
+        return stack[-1]
+    return None
+
+
+def step(name, total=None):
+    """Start counting the items of a step of the current phase. Return a
+    Step, or None if progress is not being tracked."""
+    tracker = active()
+    if tracker is None:
+        return None
+    return Step(tracker, name, total)
+
+
+def iterate(iterable, name, total=None):
+    """Return an iterator over iterable which counts its items as a step of
+    the current phase, or iterable itself if progress is not being tracked.
+    By default the total is the length of iterable, if it has one."""
+    tracker = active()
+    if tracker is None:
+        return iterable
+    if total is None and hasattr(iterable, '__len__'):
+        total = len(iterable)
+    return _iterate(Step(tracker, name, total), iterable)
+
+
+def _iterate(counter, iterable):
+    for item in iterable:
+        yield item
+        counter.add()
+    counter.close()
+
+
+class Step(object):
+    """Counter of the items processed in one loop."""
+
+    def __init__(self, tracker, name, total=None):
+        self.tracker = tracker
+        self.name = name
+        self.total = total
+        self.done = 0
+        self.starttime = time.monotonic()
+        self.next_check = CHECK_EVERY
+
+    def add(self, count=1):
+        """Count processed items."""
+        self.done += count
+        if self.done >= self.next_check:
+            self.next_check = self.done + CHECK_EVERY
+            self.tracker.update(self)
+
+    def close(self):
+        """Report the final count of the step."""
+        self.tracker.update(self, force=True)
+
+    def rate(self, now):
+        """Return the number of items processed per second."""
+        elapsed = now - self.starttime
+        return self.done / elapsed if elapsed > 0 else 0.0
+
+
+class Progress(object):
+    """Call callback with a ProgressEvent at every phase boundary and at
+    most every interval seconds while a step is counting items."""
+
+    def __init__(self, callback, interval=DEFAULT_INTERVAL):
+        self.callback = callback
+        self.interval = interval
+        self.current = None
+        self.last = time.monotonic()
+
+    def __enter__(self):
+        if getattr(_local, 'stack', None) is None:
+            _local.stack = []
+        _local.stack.append(self)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        _local.stack.remove(self)
+        return False
+
+    def update(self, counter, force=False):
+        """Report the progress of a step, unless reported too recently."""
+        now = time.monotonic()
+        if not force and now - self.last < self.interval:
+            return
+        self.last = now
+        self.callback(ProgressEvent(self.current, counter.name, counter.done,
+                                    counter.total, counter.rate(now)))
+
+    def phase(self, name, rdf):
+        """Report the start of a phase."""
+        self.current = name
+        self.last = time.monotonic()
+        self.callback(ProgressEvent(name, None, 0, None, 0.0))
+
+    def finish(self, rdf):
+        """Nothing to do at the end of the run."""
+
+    def close(self):
+        """Nothing to clean up."""
@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+"""Sharded processing of the enrichment and check phases.
+
+The resources of the graph are divided into connected components along the
+relations that the enrichments and checks follow: the hierarchical and
+associative relations and the concept scheme membership. A concept scheme
+thus ends up in the same component as its concepts, together with every
+other scheme it is linked to. The components are packed into shards, each
+shard is processed in a separate worker process, and the resulting triples
+are merged into the graph again.
+
+Every triple belongs to the shard of its subject. The inferences and fixes
+only remove triples within a component, so the merged result is the same as
+when processing the whole graph at once. Triples inferred across
+components, such as the inverse of a skos:exactMatch, are simply merged.
+"""
+
+import heapq
+import logging
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from rdflib import Graph, Literal
+from rdflib.namespace import SKOS
+
+from . import diagnostics
+from .rdftools import deterministic_order
+from .rdftools.io import worker_count
+from .rdftools.namespace import SKOSEXT
+
+LINK_PREDICATES = (
+    SKOS.broader, SKOS.narrower, SKOS.broaderTransitive,
+    SKOS.narrowerTransitive, SKOS.related, SKOSEXT.broaderGeneric,
+    SKOSEXT.broaderPartitive, SKOS.hasTopConcept, SKOS.topConceptOf,
+    SKOS.inScheme,
+)
+
+# mapping relations that the enrichments turn into hierarchical and
+# associative relations
+MAPPING_LINK_PREDICATES = (SKOS.broadMatch, SKOS.narrowMatch, SKOS.relatedMatch)
+
+
+def components(rdf, predicates):
+    """Return a dict mapping each resource linked by one of the predicates
+    to a representative resource of its connected component."""
+    parent = {}
+
+    def find(node):
+        root = parent.setdefault(node, node)
+        while root != parent[root]:
+            parent[root] = parent[parent[root]]  # path halving
+            root = parent[root]
+        return root
+
+    for pred in predicates:
+        for s, o in rdf.subject_objects(pred):
+            if isinstance(o, Literal):
+                continue
+            s_root, o_root = find(s), find(o)
+            if s_root != o_root:
+                parent[s_root] = o_root
+
+    return dict((node, find(node)) for node in parent)
+
+
+def partition(rdf, shards, enrich_mappings=True):
+    """Divide the triples of the graph into at most the given number of
+    shards of connected components, balanced by number of triples.
+
+    Returns a list of lists of triples.
+    """
+    predicates = LINK_PREDICATES
+    if enrich_mappings:
+        predicates += MAPPING_LINK_PREDICATES
+    roots = components(rdf, predicates)
+
+    groups = {}
+    first = {}
+    for triple in rdf:
+        root = roots.get(triple[0], triple[0])
+        if root in groups:
+            groups[root].append(triple)
+            first[root] = min(first[root], triple[0])
+        else:
+            groups[root] = [triple]
+            first[root] = triple[0]
+
+    # largest components first, to the least loaded shard
+    loads = [(0, idx) for idx in range(shards)]
+    result = [[] for _ in range(shards)]
+    for root in sorted(groups, key=lambda r: (-len(groups[r]), first[r])):
+        load, idx = heapq.heappop(loads)
+        result[idx].extend(groups[root])
+        heapq.heappush(loads, (load + len(groups[root]), idx))
+    return [triples for triples in result if triples]
+
+
+def _enrich(rdf, config):
+    from .skosify import enrich_relations
+    enrich_relations(rdf, config.enrich_mappings,
+                     config.narrower, config.transitive)
+
+
+def _check(rdf, config):
+    from .skosify import check_hierarchy, check_labels
+    check_hierarchy(rdf, config.break_cycles,
+                    config.keep_related, config.mark_top_concepts,
+                    config.eliminate_redundancy)
+    check_labels(rdf, config.preflabel_policy)
+
+
+PHASES = {
+    'enrich': _enrich,
+    'check': _check,
+}
+
+
+def _process_shard(phase, triples, config, samples):
+    """Run a phase on the triples of one shard in a worker process."""
+    rdf = Graph()
+    rdf.addN((s, p, o, rdf) for s, p, o in triples)
+    with deterministic_order(config.deterministic), \
+            diagnostics.Diagnostics('summary', samples, log_summary=False) as diag:
+        PHASES[phase](rdf, config)
+    return list(rdf), diag.results()
+
+
+def process_sharded(rdf, config, phase):
+    """Run the given phase ("enrich" or "check") on the graph in shards
+    processed by worker processes, modifying the graph in place."""
+    workers = worker_count(config.workers)
+    if workers < 2:
+        PHASES[phase](rdf, config)
+        return
+
+    starttime = time.time()
+    shards = partition(rdf, workers, config.enrich_mappings)
+    logging.debug("%s phase: %d triples in %d shards", phase, len(rdf), len(shards))
+    if len(shards) < 2:
+        PHASES[phase](rdf, config)
+        return
+
+    # problems are collected in the workers and reported here
+    samples = diagnostics.worker_samples()
+    with ProcessPoolExecutor(max_workers=min(workers, len(shards))) as executor:
+        futures = [executor.submit(_process_shard, phase, triples, config, samples)
+                   for triples in shards]
+        del shards
+        results = [future.result() for future in futures]
+
+    rdf.remove((None, None, None))
+    for triples, problems in results:
+        rdf.addN((s, p, o, rdf) for s, p, o in triples)
+        diagnostics.merge(problems)
+
+    logging.debug("sharded %s phase took %f seconds", phase, time.time() - starttime)
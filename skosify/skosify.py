@@ -1,25 +1,77 @@
 # encoding=utf8
 
+import os
 import sys
+import contextlib
 import time
 import logging
 import datetime
+import functools
+from collections import defaultdict
 
 from rdflib import Graph, URIRef, BNode, Literal
 from rdflib.namespace import Namespace, RDF, RDFS, OWL, DC, DCTERMS, XSD, SKOS
 from .rdftools.namespace import SKOSEXT
 from .rdftools import (
     read_rdf,
-    replace_subject,
     replace_predicate,
     replace_object,
     replace_uri,
-    delete_uri,
-    localname
+    delete_uris,
+    rewrite_uris,
+    localname,
+    ordered,
+    deterministic_order,
+    progress,
 )
 
-from .config import Config
-from . import infer, check
+from .rdftools.progress import Progress
+from .config import make_config
+from . import infer, check, diagnostics
+
+
+class MappingMatcher(dict):
+    """A type, literal or relation mapping prepared for repeated lookups.
+
+    The mapping keys are URIs, local names, or local name suffixes prefixed
+    with *. The suffixes are sorted once, and the result of each lookup is
+    remembered. The mapping must not be modified after creation.
+    """
+
+    def __init__(self, mapping=()):
+        super(MappingMatcher, self).__init__(mapping)
+        # try to match longest first, so sort the suffixes by length
+        self.suffixes = sorted(((k[1:], v) for k, v in self.items() if k and k[0] == '*'),
+                               key=lambda i: len(i[0]), reverse=True)
+        self.cache = {}
+
+    def targets(self, uri):
+        """Return the targets the URI is mapped to, or None if unmapped."""
+        try:
+            return self.cache[uri]
+        except KeyError:
+            pass
+        # 1. try to match URI keys
+        result = dict.get(self, uri)
+        if result is None:
+            # 2. try to match local names
+            ln = localname(uri)
+            result = dict.get(self, ln)
+            if result is None:
+                # 3. try to match local names with * prefix
+                for suffix, v in self.suffixes:
+                    if ln.endswith(suffix):
+                        result = v
+                        break
+        self.cache[uri] = result
+        return result
+
+
+def compile_mapping(mapping):
+    """Return the mapping as a MappingMatcher."""
+    if isinstance(mapping, MappingMatcher):
+        return mapping
+    return MappingMatcher(mapping)
 
 
 def mapping_get(uri, mapping):
@@ -28,23 +80,10 @@ def mapping_get(uri, mapping):
     Throws KeyError if no matching mapping was found.
 
     """
-    ln = localname(uri)
-    # 1. try to match URI keys
-    for k, v in mapping.items():
-        if k == uri:
-            return v
-    # 2. try to match local names
-    for k, v in mapping.items():
-        if k == ln:
-            return v
-    # 3. try to match local names with * prefix
-    # try to match longest first, so sort the mapping by key length
-    lst = list(mapping.items())
-    lst.sort(key=lambda i: len(i[0]), reverse=True)
-    for k, v in lst:
-        if k[0] == '*' and ln.endswith(k[1:]):
-            return v
-    raise KeyError(uri)
+    result = compile_mapping(mapping).targets(uri)
+    if result is None:
+        raise KeyError(uri)
+    return result
 
 
 def mapping_match(uri, mapping):
@@ -53,11 +92,7 @@ def mapping_match(uri, mapping):
     Returns True if a match was found, False otherwise.
 
     """
-    try:
-        _ = mapping_get(uri, mapping)
-        return True
-    except KeyError:
-        return False
+    return compile_mapping(mapping).targets(uri) is not None
 
 
 def in_general_ns(uri):
@@ -79,14 +114,15 @@ def get_concept_scheme(rdf):
     Returns None if no skos:ConceptScheme is present.
     """
     # add explicit type
-    for s, o in sorted(rdf.subject_objects(SKOS.inScheme)):
+    for s, o in ordered(rdf.subject_objects(SKOS.inScheme)):
         if not isinstance(o, Literal):
             rdf.add((o, RDF.type, SKOS.ConceptScheme))
         else:
-            logging.warning(
+            diagnostics.warning(
+                'literal-inscheme',
                 "Literal value %s for skos:inScheme detected, ignoring.", o)
-    css = sorted(rdf.subjects(RDF.type, SKOS.ConceptScheme))
-    cs = next(iter(css), None)
+    css = list(rdf.subjects(RDF.type, SKOS.ConceptScheme))
+    cs = min(css) if css else None
     if len(css) > 1:
         logging.warning(
             "Multiple concept schemes found. "
@@ -129,8 +165,8 @@ def create_concept_scheme(rdf, ns, lname=''):
     ont = None
     if not ns:
         # see if there's an owl:Ontology and use that to determine namespace
-        onts = sorted(rdf.subjects(RDF.type, OWL.Ontology))
-        ont = next(iter(onts), None)
+        onts = list(rdf.subjects(RDF.type, OWL.Ontology))
+        ont = min(onts) if onts else None
 
         if len(onts) > 1:
             logging.warning(
@@ -185,7 +221,7 @@ def initialize_concept_scheme(rdf, cs, label, language, set_modified):
                 "Use --label option to set the concept scheme label.")
         else:
             logging.info(
-                "Unlabeled concept scheme detected. Setting label to '%s'" %
+                "Unlabeled concept scheme detected. Setting label to '%s'",
                 label)
             rdf.add((cs, RDFS.label, Literal(label, language)))
 
@@ -195,38 +231,118 @@ def initialize_concept_scheme(rdf, cs, label, language, set_modified):
         rdf.add((cs, DCTERMS.modified, Literal(curdate, datatype=XSD.dateTime)))
 
 
+@functools.lru_cache(maxsize=64)
+def _read_query_file(filename, mtime, size):
+    # the modification time and size are part of the cache key, so that
+    # changed files are read again
+    with open(filename) as f:
+        return f.read()
+
+
+def read_query(query):
+    """Return the query text, reading it from a file if the query is given
+    as @filename. Files are read again only when they have changed."""
+    if query[0] != '@':
+        return query
+    filename = query[1:]
+    st = os.stat(filename)
+    return _read_query_file(filename, st.st_mtime_ns, st.st_size)
+
+
+@functools.lru_cache(maxsize=64)
+def _prepare_query(kind, query, namespaces):
+    from rdflib.plugins.sparql import prepareQuery, prepareUpdate
+    prepare = prepareUpdate if kind == 'update' else prepareQuery
+    return prepare(query, initNs=dict(namespaces))
+
+
+def prepare_query(rdf, kind, query):
+    """Return a parsed and translated SPARQL query ("query") or update
+    ("update"), cached across runs.
+
+    Like rdf.query() and rdf.update() with a query string, the namespace
+    prefixes bound in the graph are available to the query, so they are
+    part of the cache key.
+    """
+    namespaces = tuple(sorted((prefix, str(ns)) for prefix, ns in rdf.namespaces()))
+    return _prepare_query(kind, read_query(query), namespaces)
+
+
 def transform_sparql_update(rdf, update_query):
     """Perform a SPARQL Update transformation on the RDF data."""
 
     logging.debug("performing SPARQL Update transformation")
-
-    if update_query[0] == '@':  # actual query should be read from file
-        update_query = open(update_query[1:]).read()
-
-    logging.debug("update query: %s", update_query)
-    rdf.update(update_query)
+    starttime = time.time()
+    update = prepare_query(rdf, 'update', update_query)
+    logging.debug("update query: %s", read_query(update_query))
+    rdf.update(update)
+    logging.debug("SPARQL Update took %f seconds", time.time() - starttime)
 
 
 def transform_sparql_construct(rdf, construct_query):
     """Perform a SPARQL CONSTRUCT query on the RDF data and return a new graph."""
 
     logging.debug("performing SPARQL CONSTRUCT transformation")
+    starttime = time.time()
+    query = prepare_query(rdf, 'query', construct_query)
+    logging.debug("CONSTRUCT query: %s", read_query(construct_query))
 
-    if construct_query[0] == '@':  # actual query should be read from file
-        construct_query = open(construct_query[1:]).read()
+    result = rdf.query(query)
+    if result.graph is not None:
+        newgraph = result.graph  # the result graph is new, adopt it as is
+    else:
+        newgraph = Graph()
+        newgraph.addN((s, p, o, newgraph) for s, p, o in result)
 
-    logging.debug("CONSTRUCT query: %s", construct_query)
+    logging.debug("SPARQL CONSTRUCT took %f seconds", time.time() - starttime)
+    return newgraph
 
-    newgraph = Graph()
-    for triple in rdf.query(construct_query):
-        newgraph.add(triple)
 
-    return newgraph
+def read_rewrite_map(filename):
+    """Read a file of URI rewrites, with an old and a new URI separated by
+    whitespace on each line. An old URI ending with * is a namespace whose
+    URIs are all rewritten. Returns a pair of dicts: the URI rewrites and
+    the namespace rewrites."""
+    uris = {}
+    namespaces = {}
+    with open(filename, encoding='utf-8') as f:
+        for lineno, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            parts = [part.strip('<>') for part in line.split()]
+            if len(parts) != 2:
+                raise ValueError("Invalid rewrite on line %d of %s" % (lineno, filename))
+            old, new = parts
+            if old.endswith('*'):
+                namespaces[old[:-1]] = URIRef(new)
+            else:
+                uris[URIRef(old)] = URIRef(new)
+    return uris, namespaces
+
+
+def transform_uris(rdf, urimap, nsmap, mapfile=None):
+    """Rewrite URIs using the given URI and namespace rewrites and those
+    read from the optional rewrite map file."""
+    if mapfile is not None:
+        uris, namespaces = read_rewrite_map(mapfile)
+        uris.update(urimap)
+        namespaces.update(nsmap)
+        urimap, nsmap = uris, namespaces
+
+    starttime = time.time()
+    count = rewrite_uris(rdf, urimap, nsmap)
+    logging.info("Rewrote %d triples using %d URI and %d namespace rewrites",
+                 count, len(urimap), len(nsmap))
+    logging.debug("rewriting URIs took %f seconds", time.time() - starttime)
+    return count
 
 
 def transform_concepts(rdf, typemap):
     """Transform Concepts into new types, as defined by the config file."""
 
+    typemap = compile_mapping(typemap)
+
     # find out all the types used in the model
     types = set()
     for s, o in rdf.subject_objects(RDF.type):
@@ -235,14 +351,13 @@ def transform_concepts(rdf, typemap):
         types.add(o)
 
     for t in sorted(types):
-        if mapping_match(t, typemap):
-            newval = mapping_get(t, typemap)
+        newval = typemap.targets(t)
+        if newval is not None:
             newuris = [v[0] for v in newval]
             logging.debug("transform class %s -> %s", t, str(newuris))
             if newuris[0] is None:  # delete all instances
-                for inst in rdf.subjects(RDF.type, t):
-                    delete_uri(rdf, inst)
-                delete_uri(rdf, t)
+                instances = list(rdf.subjects(RDF.type, t))
+                delete_uris(rdf, instances + [t])
             else:
                 replace_object(rdf, t, newuris, predicate=RDF.type)
         else:
@@ -254,6 +369,7 @@ def transform_literals(rdf, literalmap):
 
     affected_types = (SKOS.Concept, SKOS.Collection,
                       SKOSEXT.DeprecatedConcept)
+    literalmap = compile_mapping(literalmap)
 
     props = set()
     for t in affected_types:
@@ -264,8 +380,8 @@ def transform_literals(rdf, literalmap):
                     props.add(p)
 
     for p in sorted(props):
-        if mapping_match(p, literalmap):
-            newval = mapping_get(p, literalmap)
+        newval = literalmap.targets(p)
+        if newval is not None:
             newuris = [v[0] for v in newval]
             logging.debug("transform literal %s -> %s", p, str(newuris))
             replace_predicate(
@@ -279,6 +395,7 @@ def transform_relations(rdf, relationmap):
 
     affected_types = (SKOS.Concept, SKOS.Collection,
                       SKOSEXT.DeprecatedConcept)
+    relationmap = compile_mapping(relationmap)
 
     props = set()
     for t in affected_types:
@@ -289,8 +406,8 @@ def transform_relations(rdf, relationmap):
                     props.add(p)
 
     for p in sorted(props):
-        if mapping_match(p, relationmap):
-            newval = mapping_get(p, relationmap)
+        newval = relationmap.targets(p)
+        if newval is not None:
             logging.debug("transform relation %s -> %s", p, str(newval))
             replace_predicate(
                 rdf, p, newval, subjecttypes=affected_types)
@@ -305,12 +422,14 @@ def transform_labels(rdf, defaultlanguage):
             SKOSEXT.candidateLabel, SKOS.note, SKOS.scopeNote,
             SKOS.definition, SKOS.example, SKOS.historyNote,
             SKOS.editorialNote, SKOS.changeNote, RDFS.label):
-        for conc, label in sorted(rdf.subject_objects(labelProp)):
+        labels = ordered(rdf.subject_objects(labelProp))
+        for conc, label in progress.iterate(labels, 'labels'):
             if not isinstance(label, Literal):
                 continue
             # strip extra whitespace, if found
             if len(label.strip()) < len(label):
-                logging.warning(
+                diagnostics.warning(
+                    'label-whitespace',
                     "Stripping whitespace from label of %s: '%s'", conc, label)
                 newlabel = Literal(label.strip(), label.language)
                 rdf.remove((conc, labelProp, label))
@@ -318,7 +437,8 @@ def transform_labels(rdf, defaultlanguage):
                 label = newlabel
             # set default language
             if defaultlanguage and label.language is None:
-                logging.warning(
+                diagnostics.warning(
+                    'label-default-language',
                     "Setting default language of '%s' to %s",
                     label, defaultlanguage)
                 newlabel = Literal(label, defaultlanguage)
@@ -359,44 +479,104 @@ def transform_labels(rdf, defaultlanguage):
             rdf.add((conc, SKOS.altLabel, label))
 
 
+# relations that are removed from collections, as they're only meant to be
+# used for concepts (i.e. have rdfs:domain skos:Concept)
+# FIXME should maybe use some substitute for exactMatch for collections?
+COLLECTION_REMOVED_RELATIONS = (
+    SKOS.semanticRelation,
+    SKOS.broader, SKOS.narrower, SKOS.related,
+    SKOS.broaderTransitive, SKOS.narrowerTransitive,
+    SKOS.mappingRelation,
+    SKOS.closeMatch, SKOS.exactMatch,
+    SKOS.broadMatch, SKOS.narrowMatch, SKOS.relatedMatch,
+    SKOS.topConceptOf, SKOS.hasTopConcept,
+)
+
+
 def transform_collections(rdf):
-    for coll in sorted(rdf.subjects(RDF.type, SKOS.Collection)):
-        for prop in (SKOS.broader, SKOSEXT.broaderGeneric):
-            broaders = set(rdf.objects(coll, prop))
-            narrowers = set(rdf.subjects(prop, coll))
+    """Take collections out of the concept hierarchy, making their narrower
+    concepts members of them, and remove the concept relations of
+    collections.
+
+    Each relation is scanned once for the triples involving a collection,
+    which are then rewired in memory and changed in the graph in one go.
+    """
+    # nested collections are rewired differently depending on the order
+    # they are processed in, so it must always be deterministic
+    colls = sorted(rdf.subjects(RDF.type, SKOS.Collection))
+    if not colls:
+        return
+    collset = set(colls)
+    hierarchy = (SKOS.broader, SKOSEXT.broaderGeneric)
+
+    # triples involving collections: objects by subject and subjects by
+    # object, for each relation
+    index = {}
+    for prop in set(hierarchy + COLLECTION_REMOVED_RELATIONS):
+        objects, subjects = index[prop] = (defaultdict(set), defaultdict(set))
+        for s, o in rdf.subject_objects(prop):
+            if s in collset or o in collset:
+                objects[s].add(o)
+                subjects[o].add(s)
+
+    def triples():
+        return set((s, prop, o) for prop, (objects, _) in index.items()
+                   for s, objs in objects.items() for o in objs)
+
+    original = triples()
+    added = set()  # triples not involving collections
+
+    def remove(s, prop, o):
+        objects, subjects = index[prop]
+        objects[s].discard(o)
+        subjects[o].discard(s)
+
+    def add(s, prop, o):
+        if s in collset or o in collset:
+            objects, subjects = index[prop]
+            objects[s].add(o)
+            subjects[o].add(s)
+        else:
+            added.add((s, prop, o))
+
+    for coll in colls:
+        for prop in hierarchy:
+            objects, subjects = index[prop]
+            broaders = set(objects.get(coll, ()))
+            narrowers = set(subjects.get(coll, ()))
             # remove the Collection from the hierarchy
             for b in broaders:
-                rdf.remove((coll, prop, b))
+                remove(coll, prop, b)
             # replace the broader relationship with inverse skos:member
             for n in narrowers:
-                rdf.remove((n, prop, coll))
-                rdf.add((coll, SKOS.member, n))
+                remove(n, prop, coll)
+                added.add((coll, SKOS.member, n))
                 # add a direct broader relation to the broaders of the
                 # collection
                 for b in broaders:
-                    rdf.add((n, prop, b))
-
-        # avoid using SKOS semantic relations as they're only meant
-        # to be used for concepts (i.e. have rdfs:domain skos:Concept)
-        # FIXME should maybe use some substitute for exactMatch for
-        # collections?
-        for relProp in (SKOS.semanticRelation,
-                        SKOS.broader, SKOS.narrower, SKOS.related,
-                        SKOS.broaderTransitive, SKOS.narrowerTransitive,
-                        SKOS.mappingRelation,
-                        SKOS.closeMatch, SKOS.exactMatch,
-                        SKOS.broadMatch, SKOS.narrowMatch, SKOS.relatedMatch,
-                        SKOS.topConceptOf, SKOS.hasTopConcept):
-            for o in sorted(rdf.objects(coll, relProp)):
-                logging.warning(
+                    add(n, prop, b)
+
+        for relProp in COLLECTION_REMOVED_RELATIONS:
+            objects, subjects = index[relProp]
+            if not objects.get(coll) and not subjects.get(coll):
+                continue
+            for o in ordered(objects[coll]):
+                diagnostics.warning(
+                    'collection-relation',
                     "Removing concept relation %s -> %s from collection %s",
                     localname(relProp), o, coll)
-                rdf.remove((coll, relProp, o))
-            for s in sorted(rdf.subjects(relProp, coll)):
-                logging.warning(
+                remove(coll, relProp, o)
+            for s in ordered(subjects[coll]):
+                diagnostics.warning(
+                    'collection-relation',
                     "Removing concept relation %s <- %s from collection %s",
                     localname(relProp), s, coll)
-                rdf.remove((s, relProp, coll))
+                remove(s, relProp, coll)
+
+    result = triples()
+    for triple in original - result:
+        rdf.remove(triple)
+    rdf.addN((s, p, o, rdf) for s, p, o in (result - original) | added)
 
 
 def transform_aggregate_concepts(rdf, cs, relationmap, aggregates):
@@ -409,10 +589,11 @@ def transform_aggregate_concepts(rdf, cs, relationmap, aggregates):
         logging.debug("removing aggregate concepts")
 
     aggregate_concepts = []
+    deleted = set()
 
     relation = relationmap.get(
         OWL.equivalentClass, [(OWL.equivalentClass, False)])[0][0]
-    for conc, eq in rdf.subject_objects(relation):
+    for conc, eq in list(rdf.subject_objects(relation)):
         eql = rdf.value(eq, OWL.unionOf, None)
         if eql is None:
             continue
@@ -425,9 +606,10 @@ def transform_aggregate_concepts(rdf, cs, relationmap, aggregates):
         rdf.remove((eq, RDF.type, OWL.Class))
         rdf.remove((eq, OWL.unionOf, eql))
         # remove the rdf:List structure
-        delete_uri(rdf, eql)
+        deleted.add(eql)
         if not aggregates:
-            delete_uri(rdf, conc)
+            deleted.add(conc)
+    delete_uris(rdf, deleted)
 
     if len(aggregate_concepts) > 0:
         ns = cs.replace(localname(cs), '')
@@ -532,63 +714,80 @@ def enrich_relations(rdf, enrich_mappings, use_narrower, use_transitive):
     infer.skos_topConcept(rdf)
 
 
-def setup_top_concepts(rdf, mark_top_concepts):
+def setup_top_concepts(rdf, mark_top_concepts, concepts=None):
     """Determine the top concepts of each concept scheme and mark them using
-    hasTopConcept/topConceptOf."""
-
-    for cs in sorted(rdf.subjects(RDF.type, SKOS.ConceptScheme)):
-        for conc in sorted(rdf.subjects(SKOS.inScheme, cs)):
-            if (conc, RDF.type, SKOS.Concept) not in rdf:
-                continue  # not a Concept, so can't be a top concept
-            # check whether it's a top concept
-            broader = rdf.value(conc, SKOS.broader, None, any=True)
-            if broader is None:  # yes it is a top concept!
-                if (cs, SKOS.hasTopConcept, conc) not in rdf and \
-                   (conc, SKOS.topConceptOf, cs) not in rdf:
-                    if mark_top_concepts:
-                        logging.info(
-                            "Marking loose concept %s "
-                            "as top concept of scheme %s", conc, cs)
-                        rdf.add((cs, SKOS.hasTopConcept, conc))
-                        rdf.add((conc, SKOS.topConceptOf, cs))
-                    else:
-                        logging.debug(
-                            "Not marking loose concept %s as top concept "
-                            "of scheme %s, as mark_top_concepts is disabled",
-                            conc, cs)
+    hasTopConcept/topConceptOf. If concepts is given, only those concepts
+    are examined."""
+
+    # top concepts are the concepts without broader concepts
+    candidates = set(rdf.subjects(RDF.type, SKOS.Concept))
+    if concepts is not None:
+        candidates.intersection_update(concepts)
+    if not candidates:
+        return
+    candidates.difference_update(rdf.subjects(SKOS.broader, None, unique=True))
+    schemes = set(rdf.subjects(RDF.type, SKOS.ConceptScheme))
+    marked = set(rdf.subject_objects(SKOS.hasTopConcept))
+    marked.update((cs, conc) for conc, cs in rdf.subject_objects(SKOS.topConceptOf))
+
+    loose = [(cs, conc) for conc, cs in rdf.subject_objects(SKOS.inScheme)
+             if conc in candidates and cs in schemes and (cs, conc) not in marked]
+    for cs, conc in ordered(loose):
+        if mark_top_concepts:
+            diagnostics.info(
+                'loose-concept',
+                "Marking loose concept %s "
+                "as top concept of scheme %s", conc, cs)
+        else:
+            logging.debug(
+                "Not marking loose concept %s as top concept "
+                "of scheme %s, as mark_top_concepts is disabled",
+                conc, cs)
+    if mark_top_concepts:
+        rdf.addN((cs, SKOS.hasTopConcept, conc, rdf) for cs, conc in loose)
+        rdf.addN((conc, SKOS.topConceptOf, cs, rdf) for cs, conc in loose)
 
 
 def setup_concept_scheme(rdf, defaultcs):
     """Make sure all concepts have an inScheme property, using the given
     default concept scheme if necessary."""
-    for conc in rdf.subjects(RDF.type, SKOS.Concept):
-        # check concept scheme
-        cs = rdf.value(conc, SKOS.inScheme, None, any=True)
-        if cs is None:  # need to set inScheme
-            rdf.add((conc, SKOS.inScheme, defaultcs))
+    missing = set(rdf.subjects(RDF.type, SKOS.Concept))
+    missing.difference_update(rdf.subjects(SKOS.inScheme, None, unique=True))
+    rdf.addN((conc, SKOS.inScheme, defaultcs, rdf) for conc in missing)
 
 
 def cleanup_classes(rdf):
     """Remove unnecessary class definitions: definitions of SKOS classes or
        unused classes. If a class is also a skos:Concept or skos:Collection,
        remove the 'classness' of it but leave the Concept/Collection."""
+    # the definitions are removed all at once in the end, so the resources
+    # being removed must be ignored when checking whether a class is used
+    deleted = set()
+
+    def used(pred, cl):
+        return any(s not in deleted for s in rdf.subjects(pred, cl))
+
     for t in (OWL.Class, RDFS.Class):
+        # removing a class may leave another class unused, so the order
+        # affects the result and must always be deterministic
         for cl in sorted(rdf.subjects(RDF.type, t)):
+            if cl in deleted:
+                continue
             # SKOS classes may be safely removed
             if cl.startswith(str(SKOS)):
                 logging.debug("removing SKOS class definition: %s", cl)
-                replace_subject(rdf, cl, None)
+                deleted.add(cl)
                 continue
             # if there are instances of the class, keep the class def
-            if rdf.value(None, RDF.type, cl, any=True) is not None:
+            if used(RDF.type, cl):
                 continue
             # if the class is used in a domain/range/equivalentClass
             # definition, keep the class def
-            if rdf.value(None, RDFS.domain, cl, any=True) is not None:
+            if used(RDFS.domain, cl):
                 continue
-            if rdf.value(None, RDFS.range, cl, any=True) is not None:
+            if used(RDFS.range, cl):
                 continue
-            if rdf.value(None, OWL.equivalentClass, cl, any=True) is not None:
+            if used(OWL.equivalentClass, cl):
                 continue
 
             # if the class is also a skos:Concept or skos:Collection, only
@@ -599,7 +798,8 @@ def cleanup_classes(rdf):
                 rdf.remove((cl, RDF.type, t))
             else:  # remove it completely
                 logging.debug("removing unused class definition: %s", cl)
-                replace_subject(rdf, cl, None)
+                deleted.add(cl)
+    delete_uris(rdf, deleted, subjects_only=True)
 
 
 def cleanup_properties(rdf):
@@ -607,26 +807,34 @@ def cleanup_properties(rdf):
 
     Removes SKOS and DC property definitions and definitions of unused
     properties."""
+    # the definitions are removed all at once in the end, so the resources
+    # being removed must be ignored when checking whether a property is used
+    deleted = set()
     for t in (RDF.Property, OWL.DatatypeProperty, OWL.ObjectProperty,
               OWL.SymmetricProperty, OWL.TransitiveProperty,
               OWL.InverseFunctionalProperty, OWL.FunctionalProperty):
+        # removing a definition may leave another property unused, so the
+        # order affects the result and must always be deterministic
         for prop in sorted(rdf.subjects(RDF.type, t)):
+            if prop in deleted:
+                continue
             if prop.startswith(str(SKOS)):
                 logging.debug(
                     "removing SKOS property definition: %s", prop)
-                replace_subject(rdf, prop, None)
+                deleted.add(prop)
                 continue
             if prop.startswith(str(DC)):
                 logging.debug("removing DC property definition: %s", prop)
-                replace_subject(rdf, prop, None)
+                deleted.add(prop)
                 continue
 
             # if there are triples using the property, keep the property def
-            if len(list(rdf.subject_objects(prop))) > 0:
+            if any(s not in deleted for s in rdf.subjects(prop, None)):
                 continue
 
             logging.debug("removing unused property definition: %s", prop)
-            replace_subject(rdf, prop, None)
+            deleted.add(prop)
+    delete_uris(rdf, deleted, subjects_only=True)
 
 
 def find_reachable(rdf, res):
@@ -646,12 +854,15 @@ def find_reachable(rdf, res):
     # and much faster than BFS (using a FIFO).
     seen = set()			# used as the "closed" set
     to_search = set([res])  # used as the "open" set
+    visited = progress.step('resources')
 
     while len(to_search) > 0:
         res = to_search.pop()
         if res in seen:
             continue
         seen.add(res)
+        if visited is not None:
+            visited.add()
         # res as subject
         for p, o in rdf.predicate_objects(res):
             if isinstance(p, URIRef) and p not in seen:
@@ -670,6 +881,8 @@ def find_reachable(rdf, res):
                 to_search.add(s)
             if isinstance(p, URIRef) and p not in seen:
                 to_search.add(p)
+    if visited is not None:
+        visited.close()
 
     endtime = time.time()
     logging.debug("find_reachable took %f seconds", (endtime - starttime))
@@ -690,8 +903,7 @@ def cleanup_unreachable(rdf):
 
     logging.debug("deleting %s non-reachable resources", len(nonreachable))
 
-    for subj in nonreachable:
-        delete_uri(rdf, subj)
+    delete_uris(rdf, nonreachable)
 
 
 def check_labels(rdf, preflabel_policy):
@@ -712,14 +924,19 @@ def check_hierarchy(rdf, break_cycles, keep_related, mark_top_concepts,
         skos:broaderTransitive.
     :param bool fix_redundancy: Remove skos:broader between two concepts otherwise
         connected by skos:broaderTransitive.
+
+    The top concepts must have been set up with setup_top_concepts(); only
+    the concepts that lose their broader concepts in breaking cycles are
+    examined again.
     """
     starttime = time.time()
 
-    if check.hierarchy_cycles(rdf, break_cycles):
+    changed = set()
+    if check.hierarchy_cycles(rdf, break_cycles, changed):
         logging.info(
             "Some concepts not reached in initial cycle detection. "
             "Re-checking for loose concepts.")
-        setup_top_concepts(rdf, mark_top_concepts)
+        setup_top_concepts(rdf, mark_top_concepts, changed)
 
     check.disjoint_relations(rdf, not keep_related)
     check.hierarchical_redundancy(rdf, eliminate_redundancy)
@@ -728,14 +945,151 @@ def check_hierarchy(rdf, break_cycles, keep_related, mark_top_concepts,
     logging.debug("check_hierarchy took %f seconds", (endtime - starttime))
 
 
+def check_parallel(rdf, config):
+    """Run the checks that only report problems concurrently in worker
+    processes, then the ones that fix problems one after another.
+
+    The cycle and redundancy checks must not fix anything; see
+    hierarchy_report_only(). The prefLabel check runs concurrently too when
+    the preflabel_policy is "all", as it then only reports problems. The
+    checks that do fix problems only change skos:related, skos:altLabel and
+    skos:hiddenLabel triples, which the concurrent checks don't read, so the
+    result is the same as with check_hierarchy() and check_labels().
+    """
+    from .parallel import run_checks
+
+    checks = [
+        ('hierarchy_cycles', (False,)),
+        ('hierarchical_redundancy', (False,)),
+    ]
+    if config.keep_related:
+        checks.append(('disjoint_relations', (False,)))
+    if config.preflabel_policy == 'all':
+        checks.append(('preflabel_uniqueness', ('all',)))
+
+    recheck_top_concepts = run_checks(rdf, checks, config.workers, config.deterministic)[0]
+    if recheck_top_concepts:
+        # nothing was changed by the checks, so the top concepts are the
+        # same as before
+        logging.info(
+            "Some concepts not reached in initial cycle detection. "
+            "Re-checking for loose concepts.")
+
+    if not config.keep_related:
+        check.disjoint_relations(rdf, True)
+    if config.preflabel_policy != 'all':
+        check.preflabel_uniqueness(rdf, config.preflabel_policy)
+    check.label_overlap(rdf, True)
+
+
+def hierarchy_report_only(config):
+    """Return True if the checks will not change the skos:broader hierarchy."""
+    return not config.break_cycles and not config.eliminate_redundancy
+
+
+def _phase(monitors, rdf, description):
+    """Log the start of a processing phase and notify the monitors."""
+    logging.debug(description)
+    for monitor in monitors:
+        monitor.phase(description, rdf)
+
+
 def skosify(*sources, **config):
-    """Convert, extend, and check SKOS vocabulary."""
+    """Convert, extend, and check SKOS vocabulary.
+
+    A function given as the progress option is called with a
+    skosify.rdftools.progress.ProgressEvent at the start of each phase and
+    periodically while items are processed.
+    """
+    progress = config.pop('progress', None)
+    return Skosifier(**config).skosify(*sources, progress=progress)
+
+
+class Skosifier(object):
+    """Reusable converter for processing many vocabularies with the same
+    configuration.
+
+    The configuration is prepared once: the CURIEs of the mappings are
+    expanded when reading a config file, and the mappings are compiled into
+    matchers that remember their lookups across vocabularies. A Skosifier
+    is not modified by processing, so it can be shared between threads.
+
+    - config: a Config object, a dict of options as returned by config(),
+      or a config file name or file object
+    - options: options overriding the configuration, as for skosify()
+    """
+
+    def __init__(self, config=None, **options):
+        config = make_config(config, **options)
+        config.types = compile_mapping(config.types)
+        config.literals = compile_mapping(config.literals)
+        config.relations = compile_mapping(config.relations)
+        self.config = config
+
+    def skosify(self, *sources, progress=None):
+        """Convert, extend, and check SKOS vocabulary, reporting the progress
+        to the given function as in skosify()."""
+        config = self.config
+        tracker = Progress(progress) if progress else contextlib.nullcontext()
+        with diagnostics.Diagnostics(config.diagnostics, config.diagnostics_samples), \
+                deterministic_order(config.deterministic), tracker:
+            if config.cache_dir:
+                return _skosify_cached(sources, config)
+            return _skosify(sources, config)
+
+    __call__ = skosify
+
+
+def _skosify_cached(sources, config):
+    """Return the stored result of a previous run with the same input and
+    configuration, or run _skosify and store the result."""
+    from .cache import RunCache, run_key
+
+    key = run_key(sources, config)
+    if key is None:
+        return _skosify(sources, config)
+    cache = RunCache(config.cache_dir, config.cache_size)
+    voc = cache.load_graph(key)
+    if voc is not None:
+        logging.info("Input and configuration unchanged, "
+                     "reusing the previous result from %s", config.cache_dir)
+        return voc
+    voc = _skosify(sources, config)
+    cache.store_graph(key, voc)
+    return voc
 
-    cfg = Config()
-    for key in config:
-        if hasattr(cfg, key):
-            setattr(cfg, key, config[key])
-    config = cfg
+
+def _skosify(sources, config):
+    """Run all processing phases on the sources using the given Config,
+    notifying the requested monitors of each phase."""
+
+    monitors = []
+    if config.memory_profile:
+        from .profiling import MemoryProfiler
+        monitors.append(MemoryProfiler(config.memory_profile))
+    if config.change_report:
+        from .changes import ChangeReport
+        monitors.append(ChangeReport(config.change_report, config.change_delta))
+    if config.profile:
+        from .profiling import CallProfiler
+        monitors.append(CallProfiler(config.profile))
+    tracker = progress.active()
+    if tracker is not None:
+        monitors.append(tracker)
+
+    try:
+        voc = _run_phases(sources, config, monitors)
+        for monitor in monitors:
+            monitor.finish(voc)
+    finally:
+        # also stop profiling if a phase failed
+        for monitor in monitors:
+            monitor.close()
+    return voc
+
+
+def _run_phases(sources, config, monitors):
+    """Run all processing phases on the sources using the given Config."""
 
     namespaces = config.namespaces
     typemap = config.types
@@ -745,7 +1099,7 @@ def skosify(*sources, **config):
     logging.debug("Skosify starting. $Revision$")
     starttime = time.time()
 
-    logging.debug("Phase 1: Parsing input files")
+    _phase(monitors, None, "Phase 1: Parsing input files")
     try:
         voc = read_rdf(sources, config.from_format)
     except Exception:
@@ -755,7 +1109,7 @@ def skosify(*sources, **config):
 
     inputtime = time.time()
 
-    logging.debug("Phase 2: Performing inferences")
+    _phase(monitors, voc, "Phase 2: Performing inferences")
     if config.update_query is not None:
         transform_sparql_update(voc, config.update_query)
     if config.construct_query is not None:
@@ -765,11 +1119,16 @@ def skosify(*sources, **config):
         infer.rdfs_classes(voc)
         infer.rdfs_properties(voc)
 
-    logging.debug("Phase 3: Setting up namespaces")
+    if config.rewrite_uris or config.rewrite_namespaces or config.rewrite_map:
+        _phase(monitors, voc, "Phase 2b: Rewriting URIs")
+        transform_uris(voc, config.rewrite_uris, config.rewrite_namespaces,
+                       config.rewrite_map)
+
+    _phase(monitors, voc, "Phase 3: Setting up namespaces")
     for prefix, uri in namespaces.items():
         voc.namespace_manager.bind(prefix, uri)
 
-    logging.debug("Phase 4: Transforming concepts, literals and relations")
+    _phase(monitors, voc, "Phase 4: Transforming concepts, literals and relations")
     # transform concepts, literals and concept relations
     transform_concepts(voc, typemap)
     transform_literals(voc, literalmap)
@@ -793,12 +1152,16 @@ def skosify(*sources, **config):
         voc, cs, relationmap, config.aggregates)
     transform_deprecated_concepts(voc, cs)
 
-    logging.debug("Phase 5: Performing SKOS enrichments")
+    _phase(monitors, voc, "Phase 5: Performing SKOS enrichments")
     # enrichments: broader <-> narrower, related <-> related
-    enrich_relations(voc, config.enrich_mappings,
-                     config.narrower, config.transitive)
+    if config.sharded:
+        from .sharding import process_sharded
+        process_sharded(voc, config, 'enrich')
+    else:
+        enrich_relations(voc, config.enrich_mappings,
+                         config.narrower, config.transitive)
 
-    logging.debug("Phase 6: Cleaning up")
+    _phase(monitors, voc, "Phase 6: Cleaning up")
     # clean up unused/unnecessary class/property definitions and unreachable
     # triples
     if config.cleanup_properties:
@@ -808,22 +1171,30 @@ def skosify(*sources, **config):
     if config.cleanup_unreachable:
         cleanup_unreachable(voc)
 
-    logging.debug("Phase 7: Setting up concept schemes and top concepts")
+    _phase(monitors, voc, "Phase 7: Setting up concept schemes and top concepts")
     # setup inScheme and hasTopConcept
     setup_concept_scheme(voc, cs)
     setup_top_concepts(voc, config.mark_top_concepts)
 
-    logging.debug("Phase 8: Checking concept hierarchy")
-    # check hierarchy for cycles
-    check_hierarchy(voc, config.break_cycles,
-                    config.keep_related, config.mark_top_concepts,
-                    config.eliminate_redundancy)
+    if config.sharded:
+        from .sharding import process_sharded
+        _phase(monitors, voc, "Phase 8-9: Checking concept hierarchy and labels in shards")
+        process_sharded(voc, config, 'check')
+    elif config.parallel_checks and hierarchy_report_only(config):
+        _phase(monitors, voc, "Phase 8-9: Checking concept hierarchy and labels in parallel")
+        check_parallel(voc, config)
+    else:
+        _phase(monitors, voc, "Phase 8: Checking concept hierarchy")
+        # check hierarchy for cycles
+        check_hierarchy(voc, config.break_cycles,
+                        config.keep_related, config.mark_top_concepts,
+                        config.eliminate_redundancy)
 
-    logging.debug("Phase 9: Checking labels")
-    # check for duplicate labels
-    check_labels(voc, config.preflabel_policy)
+        _phase(monitors, voc, "Phase 9: Checking labels")
+        # check for duplicate labels
+        check_labels(voc, config.preflabel_policy)
 
-    logging.debug("Phase 10: Performing post update query")
+    _phase(monitors, voc, "Phase 10: Performing post update query")
     if config.post_update_query is not None:
         transform_sparql_update(voc, config.post_update_query)
 
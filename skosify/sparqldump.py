@@ -0,0 +1,684 @@
+# -*- coding: utf-8 -*-
+
+# Osma Suominen <osma.suominen@aalto.fi>
+# Copyright (c) 2012 Aalto University and University of Helsinki
+# MIT License
+# see README.txt for more information
+
+"""Dump the contents of a SPARQL endpoint into RDF files.
+
+Besides single and paged LIMIT/OFFSET queries (which need the SPARQLWrapper
+package), the data can be dumped in partitions: subjects are divided by the
+first hex digits of the MD5 hash of their IRI, and each partition is paged
+by subject IRI (keyset pagination) instead of OFFSET, so that the endpoint
+doesn't have to skip over the earlier results for every page. Partitions are
+fetched concurrently over a pool of keep-alive HTTP connections.
+
+Blank nodes are only meaningful within one response, so each page also
+contains the blank nodes reachable from its subjects through other blank
+nodes, such as the members of rdf:List and owl:unionOf structures, up to a
+fixed depth that is raised for pages with deeper structures. The blank node
+labels are made unique to the page. Blank nodes not linked from any
+resource are fetched, with the blank nodes reachable from them, in a query
+of their own. Blank nodes that are only linked from each other in a cycle
+are not fetched, and a blank node linked from subjects in different pages
+is dumped once for each page.
+
+The subject IRIs of each page are selected first, with their numbers of
+triples. The triples fetched for them are checked against these numbers
+and against a count of the blank node triples, so that a page truncated by
+a limit of the endpoint is fetched again in smaller parts instead of being
+silently cut short.
+
+An endpoint can also be given directly as a source to skosify() or
+read_rdf() as a SparqlSource, so that the pages are parsed into the graph
+as they arrive, without going through intermediate files.
+"""
+
+import sys
+import io
+import os
+import logging
+import queue
+import re
+import shutil
+import tempfile
+import threading
+import http.client
+import itertools
+import json
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from urllib.parse import urlsplit, urlencode
+
+# size of the blocks copied from HTTP responses to files
+BUFFER_SIZE = 1 << 20
+
+# default number of subjects fetched per page in partitioned mode
+DEFAULT_PAGE_SIZE = 10000
+
+NTRIPLES = 'application/n-triples'
+SPARQL_JSON = 'application/sparql-results+json'
+
+
+def query_to_file(endpoint, graph, output, format, limit=0, offset=0, ordered=False):
+    from SPARQLWrapper import SPARQLWrapper, XML, TURTLE
+    formatmap = {
+        'xml': XML,
+        'turtle': TURTLE,
+    }
+
+    logging.debug("Querying to file %s", output)
+    sparql = SPARQLWrapper(endpoint)
+
+    if graph:
+        graph = "GRAPH <%s>" % graph
+    else:
+        graph = ""
+
+    if limit:
+        extra = "LIMIT %s OFFSET %s" % (limit, offset)
+        if ordered:
+            extra = "ORDER BY ?s ?p ?o " + extra
+    else:
+        extra = ""
+
+    query = """
+    CONSTRUCT { ?s ?p ?o }
+    WHERE {
+      %s { ?s ?p ?o . }
+    } %s
+  """ % (graph, extra)
+    logging.debug("query: %s", query)
+    sparql.setQuery(query)
+    sparql.setReturnFormat(formatmap[format])
+    response = sparql.query().response
+
+    if output == '-':
+        out = sys.stdout.buffer
+    else:
+        out = open(output, "wb")
+
+    size = 0
+    while True:
+        data = response.read(BUFFER_SIZE)
+        size += len(data)
+        if len(data) == 0:
+            break
+        out.write(data)
+    if output != '-':
+        out.close()
+    logging.info("Wrote %d bytes to output file %s", size, output)
+    return size
+
+
+class ConnectionPool(object):
+    """A pool of keep-alive HTTP connections to a SPARQL endpoint."""
+
+    def __init__(self, endpoint):
+        url = urlsplit(endpoint)
+        if url.scheme == 'https':
+            self.connection_class = http.client.HTTPSConnection
+        elif url.scheme == 'http':
+            self.connection_class = http.client.HTTPConnection
+        else:
+            raise ValueError("Unsupported endpoint URL: %s" % endpoint)
+        self.netloc = url.netloc
+        self.path = url.path or '/'
+        if url.query:
+            self.path += '?' + url.query
+        self.idle = queue.LifoQueue()
+
+    def _connection(self):
+        try:
+            return self.idle.get_nowait(), True
+        except queue.Empty:
+            return self.connection_class(self.netloc), False
+
+    def _send(self, conn, body, accept):
+        conn.request('POST', self.path, body, {
+            'Content-Type': 'application/x-www-form-urlencoded',
+            'Accept': accept,
+            'Connection': 'keep-alive',
+        })
+        return conn.getresponse()
+
+    @contextmanager
+    def query(self, query, accept=NTRIPLES):
+        """Send a query and yield the HTTP response for reading.
+
+        The connection is returned to the pool when the block ends.
+        """
+        body = urlencode({'query': query})
+        conn, reused = self._connection()
+        try:
+            try:
+                response = self._send(conn, body, accept)
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                if not reused:
+                    raise
+                # the server closed an idle connection, retry with a new one
+                conn.close()
+                conn = self.connection_class(self.netloc)
+                response = self._send(conn, body, accept)
+            if response.status != 200:
+                raise IOError("SPARQL endpoint returned HTTP %d: %s" %
+                              (response.status, response.read(1000).decode('utf-8', 'replace')))
+            yield response
+            response.read()  # must be consumed before the connection is reused
+        except BaseException:
+            conn.close()
+            raise
+        self.idle.put(conn)
+
+    def close(self):
+        while True:
+            try:
+                self.idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+def partition_prefixes(partitions):
+    """Return the MD5 hex prefixes dividing subjects into the given number of
+    partitions, which must be a power of 16."""
+    digits = 0
+    while 16 ** digits < partitions:
+        digits += 1
+    if 16 ** digits != partitions:
+        raise ValueError("The number of partitions must be a power of 16, not %d" % partitions)
+    if digits == 0:
+        return ['']
+    return ['%0*x' % (digits, i) for i in range(partitions)]
+
+
+def _sparql_string(value):
+    return '"%s"' % value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+# levels of nested blank nodes fetched with a page at first; pages with
+# deeper blank nodes are fetched again with twice as many levels
+BLANK_DEPTH = 4
+
+
+def _in_graph(graph, pattern):
+    if graph:
+        return 'GRAPH <%s> { %s }' % (graph, pattern)
+    return pattern
+
+
+def _blank_branches(graph, start, depth, condition='', first=1):
+    """Return a UNION of patterns binding ?x ?xp ?xo to the triples of the
+    blank nodes reachable from the start variable through first to depth
+    blank nodes, including the start itself if first is 0. Only blank nodes
+    are followed, so the patterns stay within the start's own blank nodes."""
+    branches = []
+    for length in range(first, depth + 1):
+        pattern = []
+        node = start
+        for i in range(length):
+            following = '?x' if i == length - 1 else '?b%d' % i
+            pattern.append('%s ?q%d %s . FILTER(isBlank(%s))' % (node, i, following, following))
+            node = following
+        if length == 0:
+            pattern.append('%s ?xp ?xo . BIND(%s AS ?x)' % (start, start))
+        else:
+            pattern.append('?x ?xp ?xo .')
+        pattern.append(condition)
+        branches.append('{ %s }' % _in_graph(graph, ' '.join(p for p in pattern if p)))
+    return ' UNION '.join(branches)
+
+
+def _subject_conditions(prefix, after, last=None):
+    conditions = ['isIRI(?s)']
+    if prefix:
+        conditions.append('STRSTARTS(MD5(STR(?s)), "%s")' % prefix)
+    if after is not None:
+        conditions.append('STR(?s) > %s' % _sparql_string(after))
+    if last is not None:
+        conditions.append('STR(?s) <= %s' % _sparql_string(last))
+    return ' && '.join(conditions)
+
+
+def subjects_query(graph, prefix, after, limit):
+    """Return a SELECT query for the next page of a partition: at most limit
+    subject IRIs that sort after the given one, with their numbers of
+    triples."""
+    return """SELECT ?s (COUNT(*) AS ?n)
+WHERE {
+  { SELECT DISTINCT ?s WHERE { %s FILTER(%s) } ORDER BY STR(?s) LIMIT %d }
+  %s
+} GROUP BY ?s""" % (_in_graph(graph, '?s ?sp ?so .'), _subject_conditions(prefix, after),
+                    limit, _in_graph(graph, '?s ?p ?o .'))
+
+
+def _page_blanks(graph, prefix, after, last, depth):
+    return '{ SELECT DISTINCT ?s WHERE { %s FILTER(%s) } } %s' % (
+        _in_graph(graph, '?s ?sp ?so .'), _subject_conditions(prefix, after, last),
+        _blank_branches(graph, '?s', depth))
+
+
+def partition_query(graph, prefix, after, last, depth):
+    """Return a CONSTRUCT query for the triples of the subject IRIs of a
+    partition sorting after after and up to last, and of the blank nodes
+    up to depth levels below them."""
+    return """CONSTRUCT { ?s ?p ?o . ?x ?xp ?xo }
+WHERE {
+  { SELECT DISTINCT ?s WHERE { %s FILTER(%s) } }
+  { %s } UNION %s
+}""" % (_in_graph(graph, '?s ?sp ?so .'), _subject_conditions(prefix, after, last),
+        _in_graph(graph, '?s ?p ?o .'), _blank_branches(graph, '?s', depth))
+
+
+def _unlinked_blanks(graph, depth):
+    return _blank_branches(graph, '?r', depth, 'FILTER(isBlank(?r) && NOT EXISTS { ?a ?c ?r })', first=0)
+
+
+def unlinked_blanks_query(graph, depth):
+    """Return a CONSTRUCT query for the triples of the blank nodes that are
+    not linked from anything, and of the blank nodes up to depth levels
+    below them."""
+    return 'CONSTRUCT { ?x ?xp ?xo }\nWHERE {\n  %s\n}' % _unlinked_blanks(graph, depth)
+
+
+def count_blanks_query(pattern):
+    """Return a SELECT query for the number of distinct blank node triples
+    bound to ?x ?xp ?xo by the pattern."""
+    return 'SELECT (COUNT(*) AS ?n)\nWHERE {\n  { SELECT DISTINCT ?x ?xp ?xo WHERE { %s } }\n}' % pattern
+
+
+_UCHAR = re.compile(r'\\u([0-9A-Fa-f]{4})|\\U([0-9A-Fa-f]{8})')
+
+
+def _subject(line):
+    """Return the subject IRI of an N-Triples line, or None for blank node
+    subjects, comments and empty lines."""
+    line = line.lstrip()
+    if not line.startswith(b'<'):
+        return None
+    iri = line[1:line.index(b'>')].decode('utf-8')
+    if '\\' in iri:
+        iri = _UCHAR.sub(lambda m: chr(int(m.group(1) or m.group(2), 16)), iri)
+    return iri
+
+
+def _blank_object(line):
+    """Return the blank node label of the object of an N-Triples line, or
+    None if the object is not a blank node."""
+    token = line.rstrip().rsplit(None, 2)[-2:-1]
+    if token and token[0].startswith(b'_:') and b'"' not in token[0]:
+        return token[0]
+    return None
+
+
+Page = namedtuple('Page', 'data subjects blank_triples complete')
+Page.__doc__ = """A page of N-Triples with page-specific blank node labels,
+the number of distinct triples of each subject IRI and of blank nodes, and
+whether it contains all of the blank nodes below its subjects."""
+
+
+def _filter_page(data, tag, depth, unlinked=False):
+    """Return an N-Triples response as a Page, with the blank node labels
+    prefixed with tag to make them unique.
+
+    The page is complete if no blank node is more than depth levels below
+    the subject IRIs or, if unlinked is True, below the blank nodes that
+    are not linked from anything in the response.
+    """
+    lines = []
+    subjects = {}
+    blank_links = {}
+    linked = set()
+    below_subjects = set()
+    for line in dict.fromkeys(line.strip() for line in data.split(b'\n')):
+        if not line or line.startswith(b'#'):
+            continue
+        subject = line.split(None, 1)[0]
+        obj = _blank_object(line)
+        lines.append((subject, obj, line))
+        if obj is not None:
+            linked.add(obj)
+        if subject.startswith(b'_:'):
+            blank_links.setdefault(subject, []).append(obj)
+        else:
+            iri = _subject(line)
+            subjects[iri] = subjects.get(iri, 0) + 1
+            if obj is not None:
+                below_subjects.add(obj)
+
+    if unlinked:
+        level, nodes = 0, set(b for b in blank_links if b not in linked)
+    else:
+        level, nodes = 1, below_subjects
+    reached = set(nodes)
+    complete = True
+    while nodes:
+        if level > depth:
+            complete = False
+            break
+        following = set()
+        for node in nodes:
+            for obj in blank_links.get(node, ()):
+                if obj is not None and obj not in reached:
+                    reached.add(obj)
+                    following.add(obj)
+        nodes = following
+        level += 1
+
+    prefix = b'_:' + tag.encode('ascii')
+    result = []
+    for subject, obj, line in lines:
+        if subject.startswith(b'_:'):
+            line = prefix + line[2:]
+        if obj is not None:
+            head, dot = line.rsplit(None, 1)
+            line = head[:-len(obj)] + prefix + obj[2:] + b' ' + dot
+        result.append(line + b'\n')
+    blank_triples = sum(len(links) for links in blank_links.values())
+    return Page(b''.join(result), subjects, blank_triples, complete)
+
+
+def _select(pool, query):
+    with pool.query(query, accept=SPARQL_JSON) as response:
+        return json.loads(response.read().decode('utf-8'))['results']['bindings']
+
+
+def _count(pool, query):
+    return int(_select(pool, query)[0]['n']['value'])
+
+
+def _fetch_subjects(pool, graph, prefix, after, counts, tags):
+    """Return the N-Triples pages of the subject IRIs in counts, a sorted
+    list of (IRI, number of triples) pairs of IRIs sorting after after.
+
+    The response is checked against the numbers of triples; if the endpoint
+    truncated it, the subjects are fetched again in two halves.
+    """
+    last = counts[-1][0]
+    depth = BLANK_DEPTH
+    while True:
+        with pool.query(partition_query(graph, prefix, after, last, depth)) as response:
+            page = _filter_page(response.read(), next(tags), depth)
+        if page.complete:
+            break
+        depth *= 2
+    truncated = any(page.subjects.get(iri, 0) < n for iri, n in counts)
+    if not truncated and page.blank_triples:
+        expected = _count(pool, count_blanks_query(_page_blanks(graph, prefix, after, last, depth)))
+        truncated = page.blank_triples < expected
+    if not truncated:
+        return [page.data]
+    if len(counts) == 1:
+        raise IOError("SPARQL endpoint truncated the triples of %s" % last)
+    logging.debug("Response for %d subjects was truncated, fetching them in halves", len(counts))
+    half = len(counts) // 2
+    return (_fetch_subjects(pool, graph, prefix, after, counts[:half], tags) +
+            _fetch_subjects(pool, graph, prefix, counts[half - 1][0], counts[half:], tags))
+
+
+def fetch_partition(pool, graph, prefix, page_size, sink):
+    """Fetch all pages of one partition, passing each page to sink.
+
+    sink is a context manager factory; it is called once per page and the
+    page is written into the file-like object it yields. The subject IRIs
+    of each page are selected first, with their numbers of triples, so that
+    a page truncated by a limit of the endpoint is noticed and fetched
+    again in smaller parts. Returns the total number of bytes fetched.
+    """
+    after = None
+    total = 0
+    tags = ('p%s_%d_' % (prefix, i) for i in itertools.count())
+    while True:
+        # some endpoints return an empty group for an empty partition
+        counts = sorted((b['s']['value'], int(b['n']['value']))
+                        for b in _select(pool, subjects_query(graph, prefix, after, page_size)) if 's' in b)
+        if not counts:
+            return total
+        for data in _fetch_subjects(pool, graph, prefix, after, counts, tags):
+            with sink() as out:
+                out.write(data)
+            total += len(data)
+        last = counts[-1][0]
+        if after is not None and last <= after:
+            raise IOError("Paging of partition %s did not advance past %s" % (prefix, after))
+        after = last
+        logging.debug("partition %s: page with %d subjects", prefix or '-', len(counts))
+
+
+def fetch_unlinked_blanks(pool, graph, sink):
+    """Fetch the blank nodes not linked from anything in a single query.
+    Raises IOError if the endpoint truncated the response."""
+    depth = BLANK_DEPTH
+    while True:
+        with pool.query(unlinked_blanks_query(graph, depth)) as response:
+            page = _filter_page(response.read(), 'u_', depth, unlinked=True)
+        if page.complete:
+            break
+        depth *= 2
+    expected = _count(pool, count_blanks_query(_unlinked_blanks(graph, depth)))
+    if page.blank_triples < expected:
+        raise IOError("SPARQL endpoint truncated the blank nodes not linked from anything: "
+                      "got %d of %d triples" % (page.blank_triples, expected))
+    if page.data:
+        with sink() as out:
+            out.write(page.data)
+    return len(page.data)
+
+
+def partitioned_dump(endpoint, graph=None, output='-', partitions=16,
+                     page_size=DEFAULT_PAGE_SIZE, workers=4):
+    """Dump the endpoint as N-Triples in concurrently fetched partitions.
+
+    If output is a file name, each partition is written to its own file
+    named output-PREFIX, and blank nodes not linked from anything to
+    output-blank. If output is "-", the pages are written to stdout one at
+    a time.
+    Returns the total number of bytes dumped.
+    """
+    prefixes = partition_prefixes(partitions)
+    pool = ConnectionPool(endpoint)
+    lock = threading.Lock()
+
+    def sink_for(name):
+        if output == '-':
+            @contextmanager
+            def sink():
+                # collect the page first, so pages don't get interleaved
+                with tempfile.SpooledTemporaryFile(max_size=8 * BUFFER_SIZE) as buf:
+                    yield buf
+                    buf.seek(0)
+                    with lock:
+                        shutil.copyfileobj(buf, sys.stdout.buffer, BUFFER_SIZE)
+            return sink
+
+        filename = "%s-%s" % (output, name)
+        open(filename, 'wb').close()  # start with an empty file
+
+        @contextmanager
+        def sink():
+            with open(filename, 'ab', buffering=BUFFER_SIZE) as out:
+                yield out
+        return sink
+
+    logging.debug("Partitioned mode, %d partitions, %d subjects per page, %d workers",
+                  partitions, page_size, workers)
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(fetch_partition, pool, graph, prefix,
+                                       page_size, sink_for(prefix or 'all'))
+                       for prefix in prefixes]
+            futures.append(executor.submit(fetch_unlinked_blanks, pool, graph,
+                                           sink_for('blank')))
+            totalsize = sum(f.result() for f in futures)
+    finally:
+        pool.close()
+
+    if output != '-':
+        # don't leave empty files behind
+        for name in [p or 'all' for p in prefixes] + ['blank']:
+            filename = "%s-%s" % (output, name)
+            if os.path.getsize(filename) == 0:
+                os.remove(filename)
+
+    logging.info("Wrote %d bytes in %d partitions", totalsize, len(prefixes))
+    return totalsize
+
+
+class SparqlSource(object):
+    """A SPARQL endpoint to be used as a source for skosify() or read_rdf().
+
+    The triples are fetched in partitions like in partitioned_dump(). Pages
+    are fetched concurrently by worker threads and parsed into the graph by
+    the calling thread as they arrive; at most queued pages are held in
+    memory while waiting to be parsed. All pages are parsed with the same
+    blank nodes for the same (page-specific) labels.
+    """
+
+    def __init__(self, endpoint, graph=None, partitions=16,
+                 page_size=DEFAULT_PAGE_SIZE, workers=4, queued=None):
+        self.endpoint = endpoint
+        self.graph = graph
+        self.partitions = partitions
+        self.page_size = page_size
+        self.workers = workers
+        self.queued = queued or 2 * workers
+
+    def __str__(self):
+        return self.endpoint
+
+    def read_into(self, rdf):
+        """Fetch all triples of the endpoint and parse them into rdf."""
+        from .rdftools.ntriples import iter_buffer_triples
+
+        pages = queue.Queue(maxsize=self.queued)
+        bnodes = {}
+        stop = threading.Event()
+
+        @contextmanager
+        def sink():
+            buf = io.BytesIO()
+            yield buf
+            page = buf.getvalue()
+            while not stop.is_set():
+                try:
+                    pages.put(page, timeout=0.1)
+                    return
+                except queue.Full:
+                    pass
+            raise IOError("Reading from %s was interrupted" % self.endpoint)
+
+        pool = ConnectionPool(self.endpoint)
+        executor = ThreadPoolExecutor(max_workers=self.workers)
+        totalsize = 0
+        try:
+            futures = [executor.submit(fetch_partition, pool, self.graph, prefix,
+                                       self.page_size, sink)
+                       for prefix in partition_prefixes(self.partitions)]
+            futures.append(executor.submit(fetch_unlinked_blanks, pool, self.graph, sink))
+            while True:
+                try:
+                    page = pages.get(timeout=0.1)
+                except queue.Empty:
+                    # pages are queued before their fetch finishes
+                    if all(f.done() for f in futures) and pages.empty():
+                        break
+                    for f in futures:
+                        if f.done() and f.exception() is not None:
+                            raise f.exception()
+                    continue
+                if page:
+                    rdf.addN((s, p, o, rdf) for s, p, o in iter_buffer_triples(page, bnodes))
+                    totalsize += len(page)
+            for f in futures:
+                f.result()
+        finally:
+            stop.set()
+            executor.shutdown(wait=True)
+            pool.close()
+        logging.debug("Parsed %d bytes from %s", totalsize, self.endpoint)
+        return rdf
+
+
+def sparqldump(endpoint, graph=None, output='-', format='xml', multiple=0, ordered=False):
+    if multiple:
+        logging.debug(
+            "Multiple query mode, querying %d triples per request", multiple)
+        page = totalsize = lastsize = 0
+        lastfile = None
+        while True:
+            outfile = output
+            if output != '-':
+                outfile = "%s-%d" % (output, page + 1)
+            offset = page * multiple
+            size = query_to_file(endpoint, graph, outfile,
+                                 format, multiple, offset, ordered)
+            totalsize += size
+            if size < 1024 and size == lastsize:
+                logging.info(
+                    "Empty results seen, cleaning up empty files: %s %s", lastfile, outfile)
+                os.remove(outfile)
+                os.remove(lastfile)
+                return totalsize
+            lastsize = size
+            lastfile = outfile
+            page += 1
+    else:
+        logging.debug("Single query mode")
+        return query_to_file(endpoint, graph, output, format)
+
+
+def main():
+    import optparse
+
+    # process command line parameters
+    # e.g. sparqldump -g http://example.org/mygraph http://example.org/sparql
+    usage = "Usage: %prog [options] endpoint "
+    parser = optparse.OptionParser(usage=usage)
+    parser.add_option('-o', '--output', type='string', default='-',
+                      help='Output file name. Default is "-" (stdout).')
+    parser.add_option('-f', '--to-format', type='string', default='xml',
+                      help='Output format. Default is "xml". Possible values: xml, turtle. ' +
+                           'Not all endpoints will honor this setting.')
+    parser.add_option('-g', '--graph', type='string',
+                      help='Named graph to query. Default is none (i.e. use the default graph of the endpoint)')
+    parser.add_option('-m', '--multiple', type='int',
+                      help='Perform multiple queries, with given number of triples each. ' +
+                           'Useful for endpoints that limit response size.')
+    parser.add_option('-O', '--ordered', action='store_true',
+                      help='Add ORDER BY in multiple mode. This may be heavy to process for the endpoint.')
+    parser.add_option('-P', '--partitions', type='int',
+                      help='Dump N-Triples in the given number of partitions by subject hash '
+                           '(1, 16, 256...), fetched concurrently and paged by subject. '
+                           'Each partition is written to its own file.')
+    parser.add_option('--page-size', type='int', default=DEFAULT_PAGE_SIZE,
+                      help='Number of subjects per query in partitioned mode. Default is %default.')
+    parser.add_option('-j', '--workers', type='int', default=4,
+                      help='Number of concurrent queries in partitioned mode. Default is %default.')
+    parser.add_option('-D', '--debug', action="store_true",
+                      help='Show debug output.')
+    parser.add_option('-d', '--no-debug', dest="debug",
+                      action="store_false", help='Hide debug output.')
+
+    options, remainingArgs = parser.parse_args()
+    if len(remainingArgs) != 1:
+        parser.error("exactly one endpoint URL must be specified")
+
+    # configure logging
+    logformat = '%(levelname)s: %(message)s'
+    loglevel = logging.INFO
+    if options.debug:
+        loglevel = logging.DEBUG
+    logging.basicConfig(format=logformat, level=loglevel)
+
+    if options.partitions:
+        totalsize = partitioned_dump(remainingArgs[0], options.graph, options.output,
+                                     options.partitions, options.page_size, options.workers)
+    else:
+        totalsize = sparqldump(remainingArgs[0], options.graph, options.output,
+                               options.to_format, options.multiple, options.ordered)
+    logging.debug("Total %d bytes dumped.", totalsize)
+
+
+if __name__ == '__main__':
+    main()
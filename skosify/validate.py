@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+"""Read-only validation of SKOS vocabularies.
+
+The detectors of skosify.check are run on the input as it is, without the
+transforms, enrichments and inferences of skosify(), and without fixing
+anything. Instead of loading the input into a Graph, only the triples with
+the predicates that the checks look at are collected into a TripleIndex,
+which provides the part of the Graph interface that the checks use.
+"""
+
+import logging
+import time
+
+from rdflib import Graph
+
+from . import diagnostics
+from .config import make_config
+from .parallel import CHECKS, run_checks
+from .rdftools import read_rdf, deterministic_order
+from .rdftools.io import is_ntriples_file, iter_ntriples
+
+# the checks run by validate(), with the arguments that only report problems
+VALIDATIONS = (
+    ('hierarchy_cycles', (False,)),
+    ('disjoint_relations', (False,)),
+    ('hierarchical_redundancy', (False,)),
+    ('preflabel_uniqueness', ('all',)),
+    ('label_overlap', (False,)),
+)
+
+
+class TripleIndex(object):
+    """Read-only triples of the given predicates, indexed by predicate and
+    subject, with the Graph methods used by the checks."""
+
+    def __init__(self, predicates):
+        self.index = dict((pred, {}) for pred in predicates)
+        self.reverse = {}
+
+    def add_triples(self, triples):
+        """Add the triples with indexed predicates, ignoring the others."""
+        index = self.index
+        for s, p, o in triples:
+            subjects = index.get(p)
+            if subjects is None:
+                continue
+            objects = subjects.get(s)
+            if objects is None:
+                subjects[s] = set([o])
+            else:
+                objects.add(o)
+        self.reverse.clear()
+
+    def __len__(self):
+        return sum(len(objects) for subjects in self.index.values() for objects in subjects.values())
+
+    def __contains__(self, triple):
+        s, p, o = triple
+        return o in self.index[p].get(s, ())
+
+    def objects(self, subject, predicate):
+        return iter(self.index[predicate].get(subject, ()))
+
+    def subjects(self, predicate, obj):
+        # the reverse index of a predicate is built when first needed
+        if predicate not in self.reverse:
+            reverse = self.reverse[predicate] = {}
+            for s, objects in self.index[predicate].items():
+                for o in objects:
+                    reverse.setdefault(o, []).append(s)
+        return iter(self.reverse[predicate].get(obj, ()))
+
+    def subject_objects(self, predicate):
+        for s, objects in self.index[predicate].items():
+            for o in objects:
+                yield s, o
+
+    def transitive_objects(self, subject, predicate):
+        """Generate the subject and the resources reachable from it through
+        the predicate, each once."""
+        subjects = self.index[predicate]
+        seen = set()
+        stack = [subject]
+        while stack:
+            node = stack.pop()
+            if node in seen:
+                continue
+            seen.add(node)
+            yield node
+            stack.extend(subjects.get(node, ()))
+
+
+def read_index(sources, infmt, predicates):
+    """Read the triples of the given predicates from the sources into a
+    TripleIndex. Graphs and N-Triples files are read straight into the
+    index; other sources are parsed with read_rdf first."""
+    index = TripleIndex(predicates)
+    others = []
+    for source in sources:
+        if isinstance(source, Graph):
+            for pred in predicates:
+                index.add_triples(source.triples((None, pred, None)))
+        elif not hasattr(source, 'read_into') and is_ntriples_file(source, infmt):
+            logging.debug("Reading N-Triples file %s", source)
+            index.add_triples(iter_ntriples(source))
+        else:
+            others.append(source)
+    if others:
+        index.add_triples(read_rdf(others, infmt))
+    return index
+
+
+def validate(*sources, **config):
+    """Check SKOS vocabulary for hierarchy cycles, skos:related overlapping
+    with skos:broaderTransitive, redundant skos:broader relations and label
+    conflicts without converting or modifying it. Return the number of
+    problems found.
+
+    Of the options of skosify(), from_format, diagnostics,
+    diagnostics_samples, deterministic, parallel_checks and workers are
+    used. May raise an Exception if the input can't be read.
+    """
+    config = make_config(**config)
+
+    starttime = time.time()
+    predicates = set()
+    for name, args in VALIDATIONS:
+        predicates.update(CHECKS[name][1])
+    index = read_index(sources, config.from_format, predicates)
+    logging.debug("reading %d triples to check took %f seconds",
+                  len(index), time.time() - starttime)
+
+    with diagnostics.Diagnostics(config.diagnostics, config.diagnostics_samples) as diag, \
+            deterministic_order(config.deterministic):
+        if config.parallel_checks:
+            run_checks(index, VALIDATIONS, config.workers, config.deterministic)
+        else:
+            for name, args in VALIDATIONS:
+                CHECKS[name][0](index, *args)
+    problems = diag.total()
+    logging.debug("validation took %f seconds", time.time() - starttime)
+    return problems
@@ -0,0 +1,47 @@
+# encoding=utf-8
+import asyncio
+import gzip
+import shutil
+
+from rdflib import Graph
+from rdflib.compare import isomorphic
+
+import skosify
+from skosify.aio import skosify_async, serialize_async, write_async
+
+
+def test_skosify_async(tmp_path):
+    compressed = str(tmp_path / 'dctype.rdf.gz')
+    with open('examples/dctype.in.rdf', 'rb') as f, gzip.open(compressed, 'wb') as out:
+        shutil.copyfileobj(f, out)
+    config = skosify.config('examples/dctype.cfg')
+    expected = skosify.skosify('examples/dctype.in.rdf', 'examples/milk.in.ttl', **config)
+
+    async def convert():
+        return await skosify_async(compressed, 'examples/milk.in.ttl', **config)
+
+    assert isomorphic(asyncio.run(convert()), expected)
+
+
+def test_write_async(tmp_path):
+    voc = Graph().parse('examples/milk.out.ttl', format='turtle')
+    output = str(tmp_path / 'milk.nt.gz')
+
+    async def write():
+        await write_async(voc, output)
+
+    asyncio.run(write())
+    with gzip.open(output, 'rb') as f:
+        assert isomorphic(Graph().parse(data=f.read(), format='nt'), voc)
+
+
+def test_serialize_async_early_stop():
+    voc = Graph().parse('examples/milk.out.ttl', format='turtle')
+
+    async def first_chunk():
+        chunks = serialize_async(voc, 'nt', queued=1)
+        async for chunk in chunks:
+            await chunks.aclose()
+            return chunk
+
+    assert asyncio.run(first_chunk()).startswith(b'<')
@@ -0,0 +1,95 @@
+# encoding=utf-8
+import logging
+import shutil
+import sys
+
+from rdflib import Graph, URIRef, Literal
+from rdflib.compare import isomorphic
+from rdflib.namespace import SKOS
+
+import skosify
+import skosify.cli
+from skosify.cache import RunCache, fingerprint
+from skosify.config import Config
+
+EX = 'http://example.org/'
+
+
+def test_fingerprint(tmp_path):
+    filename = str(tmp_path / 'milk.ttl')
+    shutil.copyfile('examples/milk.in.ttl', filename)
+    config = Config()
+    key = fingerprint([filename], config)
+    assert fingerprint([filename], Config()) == key
+
+    config.workers = 4  # doesn't affect the result
+    assert fingerprint([filename], config) == key
+    config.types = {'Concept': 'skos:Concept'}
+    assert fingerprint([filename], config) != key
+
+    with open(filename, 'a') as f:
+        f.write('\n')
+    assert fingerprint([filename], Config()) != key
+    assert fingerprint(['-'], Config()) is None
+
+
+def test_fingerprint_graph_order():
+    triples = [(URIRef(EX + 'c%d' % i), SKOS.prefLabel, Literal('c%d' % i)) for i in range(10)]
+    a, b = Graph(), Graph()
+    for triple in triples:
+        a.add(triple)
+    for triple in reversed(triples):
+        b.add(triple)
+    assert fingerprint([a], Config()) == fingerprint([b], Config())
+    b.remove(triples[0])
+    assert fingerprint([a], Config()) != fingerprint([b], Config())
+
+
+def test_reuse_result(tmp_path, caplog):
+    cache_dir = str(tmp_path / 'cache')
+    with caplog.at_level(logging.INFO):
+        first = skosify.skosify('examples/milk.in.ttl', cache_dir=cache_dir)
+    assert 'reusing' not in caplog.text
+
+    caplog.clear()
+    with caplog.at_level(logging.INFO):
+        second = skosify.skosify('examples/milk.in.ttl', cache_dir=cache_dir)
+    assert 'reusing the previous result' in caplog.text
+    assert isomorphic(first, second)
+    assert dict(first.namespaces())['skos'] == dict(second.namespaces())['skos']
+
+
+def test_reuse_output(tmp_path, monkeypatch, caplog):
+    cache_dir = str(tmp_path / 'cache')
+    output = tmp_path / 'milk.ttl'
+    argv = ['skosify', 'examples/milk.in.ttl', '-o', str(output), '--cache-dir', cache_dir]
+    monkeypatch.setattr(sys, 'argv', argv)
+    skosify.cli.main()
+    expected = output.read_bytes()
+    output.unlink()
+
+    with caplog.at_level(logging.INFO):
+        skosify.cli.main()
+    assert 'reusing the previous result' in caplog.text
+    assert output.read_bytes() == expected
+    # only the result graph is stored, not the serialized output
+    entries = list((tmp_path / 'cache').iterdir())
+    assert len(entries) == 1
+    assert sorted(p.name for p in entries[0].iterdir()) == ['graph.nt', 'namespaces.json']
+
+
+def test_set_modified_not_cached(tmp_path, caplog):
+    cache_dir = str(tmp_path / 'cache')
+    for i in range(2):
+        with caplog.at_level(logging.INFO):
+            skosify.skosify('examples/milk.in.ttl', cache_dir=cache_dir, set_modified=True)
+    assert 'reusing' not in caplog.text
+
+
+def test_prune(tmp_path):
+    cache = RunCache(str(tmp_path), size=2)
+    for key in ('a', 'b', 'c'):
+        cache.store(key, 'result', lambda filename: open(filename, 'w').close())
+    assert sorted(p.name for p in tmp_path.iterdir()) in (['b', 'c'], ['a', 'c'])
+    assert cache.lookup('c', 'result') is not None
+    assert cache.lookup('c', 'other') is None
@@ -0,0 +1,44 @@
+# encoding=utf-8
+from rdflib import Graph, URIRef, Literal
+from rdflib.namespace import SKOS
+
+import skosify
+from skosify.changes import diff_graphs, count_by_predicate
+
+EX = 'http://example.org/'
+
+
+def test_diff_graphs():
+    a, b = URIRef(EX + 'a'), URIRef(EX + 'b')
+    old = Graph()
+    old.add((a, SKOS.broader, b))
+    old.add((a, SKOS.prefLabel, Literal('A')))
+    new = Graph()
+    new.add((a, SKOS.broader, b))
+    new.add((b, SKOS.narrower, a))
+    new.add((a, SKOS.altLabel, Literal('A')))
+
+    added, removed = diff_graphs(old, new)
+    assert sorted(added) == sorted([(b, SKOS.narrower, a), (a, SKOS.altLabel, Literal('A'))])
+    assert removed == [(a, SKOS.prefLabel, Literal('A'))]
+    assert count_by_predicate(added, removed) == {
+        SKOS.narrower: (1, 0), SKOS.altLabel: (1, 0), SKOS.prefLabel: (0, 1)}
+
+
+def test_change_report(tmp_path):
+    report = tmp_path / 'changes.txt'
+    delta = tmp_path / 'delta.rdfp'
+    voc = skosify.skosify('examples/milk.in.ttl', change_report=str(report),
+                          change_delta=str(delta))
+
+    text = report.read_text(encoding='utf-8')
+    assert text.startswith('Input to output: +')
+    assert 'Phase 7: Setting up concept schemes and top concepts: +' in text
+    assert 'skos:hasTopConcept' in text
+
+    lines = delta.read_text(encoding='utf-8').splitlines()
+    assert all(line[:2] in ('A ', 'D ') for line in lines)
+    input_graph = Graph().parse('examples/milk.in.ttl', format='turtle')
+    added, removed = diff_graphs(input_graph, voc)
+    assert len(lines) == len(added) + len(removed)
+    assert any(line.startswith('A ') and str(SKOS.inScheme) in line for line in lines)
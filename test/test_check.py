@@ -3,6 +3,7 @@ from rdflib import Graph, BNode, Literal
 from rdflib.namespace import RDF, SKOS
 
 import skosify
+from skosify.rdftools import deterministic_order
 
 
 def test_hierarchy_cycles():
@@ -25,6 +26,27 @@ def test_hierarchy_cycles():
     assert bool((a, SKOS.broader, b) in rdf) != bool((b, SKOS.broader, a) in rdf)
 
 
+def test_hierarchy_cycles_changed():
+    rdf = Graph()
+    a, b, c = BNode(), BNode(), BNode()
+    for conc in (a, b, c):
+        rdf.add((conc, RDF.type, SKOS.Concept))
+    rdf.add((a, SKOS.broader, b))
+    rdf.add((b, SKOS.broader, a))
+    rdf.add((c, SKOS.broader, a))
+
+    changed = set()
+    assert skosify.check.hierarchy_cycles(rdf, fix=False, changed=changed)
+    assert changed == set()
+
+    skosify.check.hierarchy_cycles(rdf, fix=True, changed=changed)
+    assert len(changed) == 1
+    conc = changed.pop()
+    assert conc in (a, b)
+    assert (conc, SKOS.broader, None) not in rdf
+    assert (c, SKOS.broader, a) in rdf
+
+
 def test_disjoint_relations():
     rdf = Graph()
     a, b, c = BNode(), BNode(), BNode()
@@ -173,6 +195,17 @@ def test_preflabel_uniqueness_shortest_uppercase():
     assert (a, SKOS.altLabel, Literal('Longer', 'en')) in rdf
 
 
+def test_preflabel_uniqueness_all_combined(caplog):
+    rdf = Graph()
+    a = BNode()
+    rdf.add((a, SKOS.prefLabel, Literal('short', 'en')))
+    rdf.add((a, SKOS.prefLabel, Literal('longer', 'en')))
+
+    skosify.check.preflabel_uniqueness(rdf, policy='shortest,all')
+    assert 'Unknown preflabel-policy: shortest,all' in caplog.text
+    assert (a, SKOS.prefLabel, Literal('longer', 'en')) in rdf
+
+
 def test_preflabel_uniqueness_is_deterministic():
     rdf = Graph()
     a = BNode()
@@ -203,3 +236,16 @@ def test_preflabel_uniqueness_is_deterministic():
     assert (a, SKOS.altLabel, Literal('ba', 'fi')) in rdf
     assert (a, SKOS.altLabel, Literal('bb', 'fi')) in rdf
     assert (a, SKOS.altLabel, Literal('ab', 'fi')) in rdf
+
+
+def test_label_overlap_unordered():
+    rdf = Graph()
+    a = BNode()
+
+    rdf.add((a, RDF.type, SKOS.Concept))
+    rdf.add((a, SKOS.prefLabel, Literal('Earth', 'en')))
+    rdf.add((a, SKOS.altLabel, Literal('Earth', 'en')))
+
+    with deterministic_order(False):
+        skosify.check.label_overlap(rdf, fix=True)
+    assert (a, SKOS.altLabel, Literal('Earth', 'en')) not in rdf
@@ -41,5 +41,40 @@ rdfs.comment_EN=rdfs.comment
     cfg.close()
 
 
+def test_config_file_with_rewrites():
+    cfg = StringIO(u'''
+[namespaces]
+old=http://example.org/old/
+new=http://example.org/new/
+
+[rewrite]
+old.a=new:b
+old.c=<http://example.com/c>
+old.*=new:
+''')
+    config = skosify.config(cfg)
+    assert config['rewrite_uris'] == {
+        URIRef('http://example.org/old/a'): URIRef('http://example.org/new/b'),
+        URIRef('http://example.org/old/c'): URIRef('http://example.com/c'),
+    }
+    assert config['rewrite_namespaces'] == {
+        'http://example.org/old/': URIRef('http://example.org/new/')}
+
+
+def test_config_file_with_integer_options():
+    cfg = StringIO(u'''
+[options]
+workers=4
+diagnostics_samples=1
+cache_size=3
+sharded=1
+''')
+    config = skosify.config(cfg)
+    assert config['workers'] == 4
+    assert config['diagnostics_samples'] == 1
+    assert config['cache_size'] == 3
+    assert config['sharded'] is True
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,52 @@
+# encoding=utf-8
+import logging
+import sys
+
+from skosify import diagnostics
+
+
+def test_warning_without_collector(caplog):
+    diagnostics.warning('test-kind', "Problem with %s", 'a')
+    assert ('root', logging.WARNING, 'Problem with a') in caplog.record_tuples
+
+
+def test_summary(caplog):
+    with diagnostics.Diagnostics('summary', samples=2) as collector:
+        for i in range(10):
+            diagnostics.warning('test-kind', "Problem with %d", i)
+        diagnostics.info('other-kind', "Something else")
+        assert caplog.record_tuples == []
+
+    assert collector.counts == {'test-kind': 10, 'other-kind': 1}
+    assert collector.total() == 11
+    messages = [msg for name, level, msg in caplog.record_tuples]
+    assert messages == ['Problem with 0', 'Problem with 1',
+                        'test-kind: 8 more similar messages not shown']
+
+
+def test_full(caplog):
+    with diagnostics.Diagnostics('full', samples=2) as collector:
+        for i in range(10):
+            diagnostics.warning('test-kind', "Problem with %d", i)
+    assert collector.counts['test-kind'] == 10
+    assert len(caplog.record_tuples) == 10
+
+
+def test_merge_without_examples(caplog):
+    with diagnostics.Diagnostics('summary', samples=0, log_summary=False) as worker:
+        diagnostics.warning('test-kind', "Problem with %s", 'a')
+        diagnostics.warning('test-kind', "Problem with %s", 'b')
+    assert worker.results() == [('test-kind', logging.WARNING, 2, [])]
+
+    with diagnostics.Diagnostics('summary', samples=0) as collector:
+        diagnostics.merge(worker.results())
+    assert collector.counts == {'test-kind': 2}
+    assert 'test-kind: 2 more similar messages not shown' in caplog.text
+
+
+def test_worker_samples():
+    assert diagnostics.worker_samples() == sys.maxsize
+    with diagnostics.Diagnostics('summary', samples=2):
+        assert diagnostics.worker_samples() == 2
+        with diagnostics.Diagnostics('full'):
+            assert diagnostics.worker_samples() == sys.maxsize
@@ -50,5 +50,18 @@ def test_sources():
     expect_rdf(voc1, voc2)
 
 
+@pytest.mark.parametrize('infile', glob.glob('examples/*.in.*'))
+def test_example_not_deterministic(infile):
+    conffile = re.sub(r'\.in\.[^.]+$', r'.cfg', infile)
+    config = skosify.config(conffile) if os.path.isfile(conffile) else {}
+
+    voc1 = skosify.skosify(infile, **config)
+    config['deterministic'] = False
+    voc2 = skosify.skosify(infile, **config)
+
+    assert len(voc1) == len(voc2)
+    expect_rdf(voc1, voc2)
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,89 @@
+# encoding=utf-8
+import bz2
+import gzip
+import io
+import lzma
+import os
+import sys
+
+import pytest
+from rdflib import Graph, URIRef, BNode, Literal
+from rdflib.compare import isomorphic
+from rdflib.namespace import RDF, RDFS, SKOS
+
+from skosify.rdftools import read_rdf, write_rdf
+
+EX = 'http://example.org/'
+
+
+@pytest.fixture
+def graph():
+    g = Graph()
+    for i in range(10):
+        g.add((URIRef(EX + 'c%d' % i), SKOS.prefLabel, Literal(u'käsite %d' % i, lang='fi')))
+    return g
+
+
+@pytest.mark.parametrize('ext,module', [('gz', gzip), ('bz2', bz2), ('xz', lzma)])
+def test_compressed_roundtrip(graph, tmp_path, ext, module):
+    filename = str(tmp_path / ('voc.ttl.' + ext))
+    write_rdf(graph, filename, None)
+    with module.open(filename, 'rb') as f:
+        assert b'@prefix' in f.read()  # format guessed from the inner extension
+    assert isomorphic(read_rdf([filename], None), graph)
+
+
+def test_compression_detected_by_magic(graph, tmp_path):
+    filename = str(tmp_path / 'voc.nt')
+    with gzip.open(filename, 'wb') as f:
+        f.write(graph.serialize(format='nt', encoding='utf-8'))
+    assert isomorphic(read_rdf([filename], None), graph)
+
+
+def test_compressed_stdin_stdout(graph, monkeypatch):
+    data = bz2.compress(graph.serialize(format='nt', encoding='utf-8'))
+    monkeypatch.setattr(sys, 'stdin', io.TextIOWrapper(io.BufferedReader(io.BytesIO(data))))
+    assert isomorphic(read_rdf(['-'], 'nt'), graph)
+
+    buf = io.BytesIO()
+    monkeypatch.setattr(sys, 'stdout', io.TextIOWrapper(buf))
+    write_rdf(graph, '-', 'nt', compression='xz')
+    assert not sys.stdout.closed
+    result = Graph().parse(data=lzma.decompress(buf.getvalue()), format='nt')
+    assert isomorphic(result, graph)
+
+
+def test_unknown_compression(graph, tmp_path):
+    with pytest.raises(ValueError):
+        write_rdf(graph, str(tmp_path / 'voc.nt'), None, compression='zip')
+
+
+def test_write_split(tmp_path):
+    rdf = Graph()
+    for cs in ('scheme', 'deprecatedconceptscheme'):
+        rdf.add((URIRef(EX + cs), RDF.type, SKOS.ConceptScheme))
+        for i in range(3):
+            conc = URIRef(EX + '%s/c%d' % (cs, i))
+            rdf.add((conc, SKOS.inScheme, URIRef(EX + cs)))
+            rdf.add((conc, SKOS.prefLabel, Literal('c%d' % i, lang='en')))
+    note = BNode()
+    rdf.add((URIRef(EX + 'scheme/c0'), SKOS.note, note))
+    rdf.add((note, RDF.value, Literal('a note')))
+    rdf.add((URIRef(EX + 'other'), RDFS.label, Literal('unrelated')))
+
+    output = str(tmp_path / 'voc.ttl.gz')
+    files = write_rdf(rdf, output, None, split=True, workers=2)
+    assert [os.path.basename(f) for f in files] == [
+        'voc-deprecatedconceptscheme.ttl.gz', 'voc-scheme.ttl.gz', 'voc-other.ttl.gz']
+
+    parts = [read_rdf([f], None) for f in files]
+    assert len(parts[0]) == 7
+    assert (None, RDF.value, Literal('a note')) in parts[1]
+    assert len(parts[2]) == 1
+    union = Graph()
+    for part in parts:
+        union += part
+    assert isomorphic(union, rdf)
+
+    with pytest.raises(ValueError):
+        write_rdf(rdf, '-', 'turtle', split=True)
@@ -0,0 +1,75 @@
+# encoding=utf-8
+import pytest
+from rdflib import Graph, URIRef, BNode, Literal
+from rdflib.namespace import RDF, RDFS, SKOS
+
+from skosify.rdftools import delete_uri, delete_uris, rewrite_uris
+
+EX = 'http://example.org/'
+
+
+def make_graph(size):
+    rdf = Graph()
+    for i in range(size):
+        conc = URIRef(EX + 'c%d' % i)
+        rdf.add((conc, RDF.type, SKOS.Concept))
+        rdf.add((conc, SKOS.prefLabel, Literal('c%d' % i)))
+        rdf.add((conc, SKOS.broader, URIRef(EX + 'c%d' % (i // 2))))
+    return rdf
+
+
+@pytest.mark.parametrize('count', [1, 50])
+def test_delete_uris(count):
+    rdf = make_graph(100)
+    expected = make_graph(100)
+    uris = [URIRef(EX + 'c%d' % i) for i in range(count)]
+    for uri in uris:
+        delete_uri(expected, uri)
+
+    delete_uris(rdf, uris)
+    assert set(rdf) == set(expected)
+    assert all(uri not in rdf.all_nodes() for uri in uris)
+
+
+@pytest.mark.parametrize('count', [1, 50])
+def test_delete_uris_subjects_only(count):
+    rdf = make_graph(100)
+    uris = [URIRef(EX + 'c%d' % i) for i in range(count)]
+    delete_uris(rdf, uris, subjects_only=True)
+    assert all((uri, None, None) not in rdf for uri in uris)
+    assert (URIRef(EX + 'c99'), SKOS.broader, URIRef(EX + 'c49')) in rdf
+    assert (URIRef(EX + 'c2'), SKOS.broader, URIRef(EX + 'c1')) in rdf or count > 2
+
+
+def test_delete_bnode():
+    rdf = Graph()
+    node = BNode()
+    rdf.add((URIRef(EX + 'a'), RDFS.seeAlso, node))
+    rdf.add((node, RDFS.label, Literal('x')))
+    delete_uris(rdf, [node])
+    assert len(rdf) == 0
+
+
+@pytest.mark.parametrize('size', [10, 1000])  # a full pass and index lookups
+def test_rewrite_uris(size):
+    rdf = make_graph(size)
+    old, new = URIRef(EX + 'c1'), URIRef('http://example.com/one')
+    count = rewrite_uris(rdf, {old: new})
+    assert count == 5  # three triples of c1, and c2 and c3 as narrower concepts
+    assert old not in rdf.all_nodes()
+    assert (new, SKOS.prefLabel, Literal('c1')) in rdf
+    assert (URIRef(EX + 'c3'), SKOS.broader, new) in rdf
+    assert len(rdf) == size * 3
+
+
+def test_rewrite_namespaces():
+    rdf = Graph()
+    rdf.add((URIRef(EX + 'a'), RDFS.seeAlso, URIRef(EX + 'sub/b')))
+    rdf.add((URIRef(EX + 'sub/b'), RDFS.label, Literal(EX + 'a')))
+    count = rewrite_uris(rdf, {EX + 'a': 'http://example.com/A'},
+                         {EX: 'http://example.net/', EX + 'sub/': 'http://example.net/s/'})
+    assert count == 2
+    assert set(rdf) == set([
+        (URIRef('http://example.com/A'), RDFS.seeAlso, URIRef('http://example.net/s/b')),
+        (URIRef('http://example.net/s/b'), RDFS.label, Literal(EX + 'a')),
+    ])
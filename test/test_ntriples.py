@@ -0,0 +1,115 @@
+# encoding=utf-8
+from io import BytesIO
+
+import pytest
+from rdflib import Graph, URIRef, BNode, Literal
+from rdflib.collection import Collection
+from rdflib.compare import isomorphic
+from rdflib.namespace import RDF, SKOS, XSD
+
+from skosify.rdftools import read_rdf
+from skosify.rdftools.io import read_ntriples
+from skosify.rdftools.ntriples import parse_line, format_triple, write_canonical, iter_buffer_triples
+
+
+def test_parse_format_roundtrip():
+    triples = [
+        (URIRef('http://example.org/a'), SKOS.prefLabel, Literal('line\n"quoted"', 'en')),
+        (BNode('b1'), SKOS.broader, URIRef('http://example.org/a')),
+        (URIRef('http://example.org/a'), SKOS.notation, Literal('1', datatype=XSD.integer)),
+    ]
+    for triple in triples:
+        assert parse_line(format_triple(triple)) == triple
+    assert parse_line('# comment\n') is None
+    assert parse_line('<http://example.org/\\u0061> <http://example.org/p> "\\u00e4" .') == \
+        (URIRef('http://example.org/a'), URIRef('http://example.org/p'), Literal(u'\xe4'))
+
+
+def canonical(rdf):
+    out = BytesIO()
+    write_canonical(rdf, out, chunk_size=2)
+    return out.getvalue()
+
+
+def test_write_canonical():
+    def build():
+        rdf = Graph()
+        a = URIRef('http://example.org/a')
+        b1, b2 = BNode(), BNode()
+        rdf.add((a, RDF.type, SKOS.Concept))
+        rdf.add((a, SKOS.note, b1))
+        rdf.add((b1, RDF.value, Literal('first')))
+        rdf.add((a, SKOS.note, b2))
+        rdf.add((b2, RDF.value, Literal('second')))
+        return rdf
+
+    data = canonical(build())
+    # blank node labels must not depend on the identifiers given by rdflib
+    assert data == canonical(build())
+
+    lines = data.decode('utf-8').splitlines()
+    assert len(lines) == 5
+    assert lines == sorted(lines)
+    assert len(Graph().parse(data=data, format='nt')) == 5
+
+
+def test_write_canonical_long_lists():
+    def build():
+        # two lists that only differ in their last members
+        rdf = Graph()
+        a = URIRef('http://example.org/a')
+        for last in ('x', 'y'):
+            head = BNode()
+            members = [URIRef('http://example.org/m%d' % i) for i in range(6)]
+            Collection(rdf, head, members + [URIRef('http://example.org/' + last)])
+            rdf.add((a, SKOS.member, head))
+        return rdf
+
+    data = canonical(build())
+    for i in range(8):
+        assert canonical(build()) == data
+
+
+NTRIPLES = u'''\ufeff# comment
+<http://example.org/a> <http://www.w3.org/2004/02/skos/core#prefLabel> "\u00e4pple\\n"@en .
+<http://example.org/a> <http://www.w3.org/2004/02/skos/core#broader> _:b1 .\r
+_:b1 <http://www.w3.org/2004/02/skos/core#notation> "1"^^<http://www.w3.org/2001/XMLSchema#integer> .
+
+  <http://example.org/\\u00e4> <http://www.w3.org/2004/02/skos/core#broader> _:b1 . # trailing comment
+<http://example.org/b> <http://www.w3.org/2004/02/skos/core#prefLabel> "say \\"hi\\"" .'''
+
+
+def test_read_ntriples(tmp_path):
+    path = tmp_path / 'test.nt'
+    path.write_bytes(NTRIPLES.encode('utf-8'))
+    expected = Graph().parse(data=NTRIPLES.lstrip(u'\ufeff'), format='nt')
+
+    rdf = read_ntriples(str(path))
+    assert isomorphic(rdf, expected)
+    assert isomorphic(read_rdf([str(path)], None), expected)
+    assert (URIRef(u'http://example.org/\xe4'), SKOS.broader, None) in rdf
+
+    # repeated IRIs are shared, blank node labels map to a single node
+    triples = list(iter_buffer_triples(NTRIPLES.encode('utf-8')))
+    broaders = [t for t in triples if t[1] == SKOS.broader]
+    assert broaders[0][1] is broaders[1][1]
+    assert broaders[0][2] is broaders[1][2]
+
+    empty = tmp_path / 'empty.nt'
+    empty.write_bytes(b'')
+    assert len(read_ntriples(str(empty))) == 0
+
+
+def test_read_ntriples_invalid():
+    data = b'<http://example.org/a> <http://example.org/p> "x" .\n<http://example.org/a> oops .\n'
+    with pytest.raises(ValueError) as excinfo:
+        list(iter_buffer_triples(data))
+    assert 'line 2' in str(excinfo.value)
+
+
+def test_buffer_shared_bnodes():
+    first = b'<http://example.org/a> <http://example.org/p> _:b1 .\n'
+    second = b'_:b1 <http://example.org/q> "x" .\n'
+    assert list(iter_buffer_triples(first))[0][2] != list(iter_buffer_triples(second))[0][0]
+    bnodes = {}
+    assert list(iter_buffer_triples(first, bnodes))[0][2] == list(iter_buffer_triples(second, bnodes))[0][0]
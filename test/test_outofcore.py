@@ -0,0 +1,61 @@
+# encoding=utf-8
+import pytest
+from rdflib import Graph, URIRef, Literal
+from rdflib.namespace import RDF, SKOS, OWL
+
+from skosify.outofcore import skosify_ntriples
+from skosify.rdftools.extsort import external_sort
+
+EX = 'http://example.org/'
+
+INPUT = u'''
+<http://example.org/a> <http://www.w3.org/1999/02/22-rdf-syntax-ns#type> <http://www.w3.org/2002/07/owl#Class> .
+<http://example.org/a> <http://example.org/label> " Apple "@en .
+<http://example.org/a> <http://example.org/bt> <http://example.org/b> .
+<http://example.org/b> <http://www.w3.org/1999/02/22-rdf-syntax-ns#type> <http://www.w3.org/2002/07/owl#Class> .
+<http://example.org/b> <http://www.w3.org/2004/02/skos/core#prefLabel> "Fruit" .
+<http://example.org/b> <http://www.w3.org/2004/02/skos/core#related> <http://example.org/c> .
+<http://example.org/c> <http://www.w3.org/2004/02/skos/core#exactMatch> <http://example.org/d> .
+'''
+
+
+def test_external_sort():
+    lines = ['%d\n' % (i % 7) for i in range(100)]
+    assert list(external_sort(lines, chunk_size=10)) == sorted(lines)
+    assert list(external_sort(lines, chunk_size=10, unique=True)) == \
+        ['%d\n' % i for i in range(7)]
+
+
+def test_skosify_ntriples(tmp_path):
+    infile = tmp_path / 'in.nt'
+    infile.write_text(INPUT, encoding='utf-8')
+    outfile = tmp_path / 'out.nt'
+
+    count = skosify_ntriples(
+        str(infile), output=str(outfile), chunk_size=3,
+        default_language='en',
+        types={OWL.Class: [(SKOS.Concept, False)]},
+        literals={URIRef(EX + 'label'): [(SKOS.prefLabel, False)]},
+        relations={URIRef(EX + 'bt'): [(SKOS.broader, False)]})
+
+    voc = Graph().parse(str(outfile), format='nt')
+    assert len(voc) == count
+    a, b, c, d = (URIRef(EX + x) for x in 'abcd')
+    assert (a, RDF.type, SKOS.Concept) in voc
+    assert (a, RDF.type, OWL.Class) not in voc
+    assert (a, SKOS.prefLabel, Literal('Apple', 'en')) in voc
+    assert (b, SKOS.prefLabel, Literal('Fruit', 'en')) in voc
+    assert (a, SKOS.broader, b) in voc
+    assert (b, SKOS.narrower, a) in voc
+    assert (c, SKOS.related, b) in voc
+    assert (d, SKOS.exactMatch, c) in voc
+
+
+def test_skosify_ntriples_unsupported_option(tmp_path):
+    infile = tmp_path / 'in.nt'
+    infile.write_text(INPUT, encoding='utf-8')
+    with pytest.raises(ValueError):
+        skosify_ntriples(str(infile), output=str(tmp_path / 'out.nt'),
+                         break_cycles=True)
+    with pytest.raises(ValueError):
+        skosify_ntriples(str(infile), output=str(tmp_path / 'out.ttl'))
@@ -0,0 +1,71 @@
+# encoding=utf-8
+import logging
+
+import pytest
+from rdflib import Graph, URIRef, Literal
+from rdflib.compare import isomorphic
+from rdflib.namespace import RDF, SKOS
+
+import skosify
+from skosify.parallel import run_checks
+
+EX = 'http://example.org/'
+
+
+def problem_graph():
+    rdf = Graph()
+    cs = URIRef(EX + 'scheme')
+    rdf.add((cs, RDF.type, SKOS.ConceptScheme))
+    for i in range(10):
+        c = URIRef(EX + 'c%d' % i)
+        rdf.add((c, RDF.type, SKOS.Concept))
+        rdf.add((c, SKOS.inScheme, cs))
+        rdf.add((c, SKOS.prefLabel, Literal('c%d' % i, 'en')))
+        if i > 0:
+            rdf.add((c, SKOS.broader, URIRef(EX + 'c%d' % ((i - 1) // 2))))
+    c = URIRef(EX + 'c%d')
+    # a cycle not reachable from the top, redundancy, related vs broader,
+    # two prefLabels and a label overlap
+    rdf.add((c % 11, RDF.type, SKOS.Concept))
+    rdf.add((c % 12, RDF.type, SKOS.Concept))
+    rdf.add((c % 11, SKOS.broader, c % 12))
+    rdf.add((c % 12, SKOS.broader, c % 11))
+    rdf.add((c % 7, SKOS.broader, c % 0))
+    rdf.add((c % 8, SKOS.related, c % 1))
+    rdf.add((c % 5, SKOS.prefLabel, Literal('five', 'en')))
+    rdf.add((c % 6, SKOS.altLabel, Literal('c6', 'en')))
+    return rdf
+
+
+def test_run_checks():
+    assert run_checks(problem_graph(), [('hierarchy_cycles', (False,)),
+                                        ('hierarchical_redundancy', (False,))],
+                      workers=2) == [True, None]
+
+
+@pytest.mark.parametrize('options', [
+    dict(keep_related=True),
+    dict(keep_related=False, preflabel_policy='longest'),
+    dict(keep_related=True, preflabel_policy='all'),
+])
+def test_parallel_checks_match_sequential(caplog, options):
+    config = dict(namespace=EX, label='Test', **options)
+    with caplog.at_level(logging.WARNING):
+        expected = skosify.skosify(problem_graph(), **config)
+    sequential_log = sorted(r.getMessage() for r in caplog.records)
+    caplog.clear()
+
+    with caplog.at_level(logging.WARNING):
+        result = skosify.skosify(problem_graph(), parallel_checks=True, workers=2, **config)
+    parallel_log = sorted(r.getMessage() for r in caplog.records)
+
+    assert isomorphic(result, expected)
+    assert parallel_log == sequential_log
+    assert len(parallel_log) >= 5
+
+
+def test_parallel_checks_without_samples(caplog):
+    with caplog.at_level(logging.WARNING):
+        skosify.skosify(problem_graph(), namespace=EX, label='Test', parallel_checks=True,
+                        workers=2, diagnostics_samples=0)
+    assert 'hierarchy-cycle: 1 more similar messages not shown' in caplog.text
@@ -0,0 +1,93 @@
+# encoding=utf-8
+from rdflib import Graph, URIRef, BNode, Literal
+from rdflib.namespace import RDF, SKOS
+
+import cProfile
+import os
+import pstats
+import sys
+import tracemalloc
+
+import pytest
+
+import skosify
+from skosify.profiling import count_terms, collapsed_stacks, CallProfiler
+
+
+def test_count_terms():
+    rdf = Graph()
+    a = URIRef('http://example.org/a')
+    rdf.add((a, RDF.type, SKOS.Concept))
+    rdf.add((a, SKOS.prefLabel, Literal('a', 'en')))
+    rdf.add((BNode(), SKOS.broader, a))
+
+    counts = count_terms(rdf)
+    assert counts['Literal'] == 1
+    assert counts['BNode'] == 1
+    assert counts['URIRef'] >= 4
+
+
+def test_memory_profile(tmp_path):
+    report = tmp_path / 'memory.txt'
+    skosify.skosify('examples/milk.in.ttl', memory_profile=str(report))
+
+    text = report.read_text(encoding='utf-8')
+    assert 'Phase 1: Parsing input files' in text
+    assert 'Phase 10: Performing post update query' in text
+    assert 'peak RSS' in text
+    assert 'Literal objects:' in text
+
+
+def _inner():
+    return sum(range(20000))
+
+
+def _outer():
+    return [_inner() for _ in range(20)]
+
+
+def test_collapsed_stacks():
+    profile = cProfile.Profile()
+    profile.enable()
+    _outer()
+    profile.disable()
+    stats = pstats.Stats(profile)
+    stacks = collapsed_stacks(stats)
+    names = [[func[2] for func in stack] for stack in stacks]
+    assert any(stack[0] == '_outer' and stack[-2:] == ['_inner', '<built-in method builtins.sum>']
+               for stack in names)
+    # all of the self time is distributed to the stacks
+    assert abs(sum(stacks.values()) - stats.total_tt * 1e6) < 1
+
+
+def test_call_profile(tmp_path):
+    skosify.skosify('examples/milk.in.ttl', profile=str(tmp_path))
+
+    summary = (tmp_path / 'summary.txt').read_text(encoding='utf-8')
+    assert 'Phase 4: Transforming concepts, literals and relations: ' in summary
+    assert ' calls  ' in summary
+    stats = pstats.Stats(str(tmp_path / '01-phase-1-parsing-input-files.pstats'))
+    assert stats.total_tt > 0
+    folded = (tmp_path / '01-phase-1-parsing-input-files.folded').read_text(encoding='utf-8')
+    line = folded.splitlines()[0]
+    assert line.rsplit(' ', 1)[1].isdigit()
+    assert any('read_rdf' in line for line in folded.splitlines())
+
+
+def test_call_profile_close(tmp_path):
+    profiler = CallProfiler(str(tmp_path))
+    profiler.phase('Phase 1: Parsing input files', None)
+    assert sys.getprofile() is not None
+    profiler.close()
+    assert sys.getprofile() is None
+    assert os.listdir(str(tmp_path)) == []
+
+
+def test_failed_run_stops_profiling(tmp_path):
+    with pytest.raises(Exception):
+        skosify.skosify('examples/milk.in.ttl', profile=str(tmp_path / 'calls'),
+                        memory_profile=str(tmp_path / 'memory.txt'),
+                        post_update_query='THIS IS NOT SPARQL')
+    assert sys.getprofile() is None
+    assert not tracemalloc.is_tracing()
+    assert not (tmp_path / 'memory.txt').exists()
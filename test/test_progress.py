@@ -0,0 +1,74 @@
+# encoding=utf-8
+import io
+
+from rdflib import Graph, URIRef
+from rdflib.namespace import RDF, SKOS
+
+import skosify
+from skosify.cli import ProgressDisplay
+from skosify.rdftools import progress
+from skosify.rdftools.progress import Progress, ProgressEvent, CHECK_EVERY
+
+EX = 'http://example.org/'
+
+
+def test_inactive():
+    items = [1, 2, 3]
+    assert progress.iterate(items, 'items') is items
+    assert progress.step('items') is None
+
+
+def test_iterate():
+    events = []
+    with Progress(events.append, interval=0) as tracker:
+        tracker.phase('Counting', None)
+        assert list(progress.iterate(range(250), 'items')) == list(range(250))
+    assert progress.active() is None
+    assert [e.done for e in events] == [0, CHECK_EVERY, 2 * CHECK_EVERY, 250]
+    assert events[0] == ProgressEvent('Counting', None, 0, None, 0.0)
+    assert all(e.phase == 'Counting' and e.total == 250 for e in events[1:])
+    assert events[-1].step == 'items'
+
+
+def test_interval():
+    events = []
+    with Progress(events.append, interval=3600):
+        step = progress.step('items', 1000)
+        for i in range(1000):
+            step.add()
+        step.close()
+    assert [(e.done, e.total) for e in events] == [(1000, 1000)]
+
+
+def test_skosify_progress():
+    rdf = Graph()
+    for i in range(300):
+        conc = URIRef(EX + 'c%d' % i)
+        rdf.add((conc, RDF.type, SKOS.Concept))
+        if i:
+            rdf.add((conc, SKOS.broader, URIRef(EX + 'c%d' % ((i - 1) // 2))))
+
+    events = []
+    skosify.skosify(rdf, label='Test', progress=events.append)
+    phases = [e.phase for e in events if e.step is None]
+    assert phases[0] == 'Phase 1: Parsing input files'
+    assert phases[-1] == 'Phase 10: Performing post update query'
+    assert ('Phase 1: Parsing input files', 'triples', len(rdf), len(rdf)) in \
+        [(e.phase, e.step, e.done, e.total) for e in events]
+    visited = [e for e in events if e.step == 'concepts']
+    assert visited[-1].phase == 'Phase 8: Checking concept hierarchy'
+    assert visited[-1].done == visited[-1].total == 300
+
+
+def test_display():
+    out = io.StringIO()
+    display = ProgressDisplay(out)
+    display(ProgressEvent('Phase 8: Checking concept hierarchy', None, 0, None, 0.0))
+    display(ProgressEvent('Phase 8: Checking concept hierarchy', 'concepts', 50, 200, 1234.5))
+    display.last = 0  # as if the interval had passed
+    display(ProgressEvent('Phase 8: Checking concept hierarchy', 'concepts', 100, 200, 1234.5))
+    display(ProgressEvent('Phase 8: Checking concept hierarchy', 'concepts', 200, 200, 1234.5))
+    assert out.getvalue().splitlines() == [
+        'Phase 8: Checking concept hierarchy',
+        'Phase 8: Checking concept hierarchy: 100/200 concepts (50%), 1234/s',
+    ]
@@ -0,0 +1,70 @@
+# encoding=utf-8
+import logging
+import re
+
+from rdflib import Graph, URIRef, Literal
+from rdflib.compare import isomorphic
+from rdflib.namespace import RDF, SKOS
+
+import skosify
+from skosify.sharding import partition
+
+EX = 'http://example.org/'
+
+
+def scheme_graph(schemes=4, concepts=20):
+    rdf = Graph()
+    for i in range(schemes):
+        cs = URIRef(EX + 'scheme%d' % i)
+        rdf.add((cs, RDF.type, SKOS.ConceptScheme))
+        rdf.add((cs, SKOS.prefLabel, Literal('Scheme %d' % i, 'en')))
+        for j in range(concepts):
+            c = URIRef(EX + 's%dc%d' % (i, j))
+            rdf.add((c, RDF.type, SKOS.Concept))
+            rdf.add((c, SKOS.inScheme, cs))
+            rdf.add((c, SKOS.prefLabel, Literal('c%d' % j, 'en')))
+            rdf.add((c, SKOS.prefLabel, Literal('concept %d' % j, 'en')))
+            if j > 0:
+                rdf.add((c, SKOS.broader, URIRef(EX + 's%dc%d' % (i, (j - 1) // 2))))
+        # a cycle, a redundant broader and a related overlapping with broader
+        rdf.add((URIRef(EX + 's%dc0' % i), SKOS.broader, URIRef(EX + 's%dc3' % i)))
+        rdf.add((URIRef(EX + 's%dc7' % i), SKOS.broader, URIRef(EX + 's%dc0' % i)))
+        rdf.add((URIRef(EX + 's%dc9' % i), SKOS.related, URIRef(EX + 's%dc1' % i)))
+        # links to the next scheme that don't join the schemes
+        rdf.add((URIRef(EX + 's%dc5' % i), SKOS.exactMatch,
+                 URIRef(EX + 's%dc5' % ((i + 1) % schemes))))
+    return rdf
+
+
+def test_partition_keeps_components_together():
+    rdf = scheme_graph()
+    # schemes 1 and 2 are joined by a hierarchical mapping
+    rdf.add((URIRef(EX + 's1c4'), SKOS.broadMatch, URIRef(EX + 's2c6')))
+
+    shards = partition(rdf, 8)
+    assert sum(len(triples) for triples in shards) == len(rdf)
+    assert len(shards) == 3
+    schemes = []
+    for triples in shards:
+        schemes.append(sorted(set(re.search(r'\d+', s).group() for s, p, o in triples)))
+    assert sorted(schemes) == [['0'], ['1', '2'], ['3']]
+
+    # without mapping enrichment, broadMatch is just a link
+    assert len(partition(rdf, 8, enrich_mappings=False)) == 4
+
+
+def test_sharded_matches_sequential(caplog):
+    config = dict(break_cycles=True, eliminate_redundancy=True,
+                  transitive=True, namespace=EX, label='Test')
+    with caplog.at_level(logging.WARNING):
+        expected = skosify.skosify(scheme_graph(), **config)
+    sequential_log = sorted(r.getMessage() for r in caplog.records)
+    caplog.clear()
+
+    with caplog.at_level(logging.WARNING):
+        result = skosify.skosify(scheme_graph(), sharded=True, workers=3, **config)
+    sharded_log = sorted(r.getMessage() for r in caplog.records)
+
+    assert isomorphic(result, expected)
+    assert any('cycle' in msg for msg in sharded_log)
+    assert sharded_log == sequential_log
@@ -0,0 +1,205 @@
+# encoding=utf-8
+import logging
+import os
+import random
+
+import pytest
+from rdflib import Graph, URIRef, Literal
+from rdflib.compare import isomorphic
+from rdflib.namespace import RDF, RDFS, SKOS
+
+import skosify
+from skosify.skosify import transform_sparql_update, transform_sparql_construct, prepare_query, read_query
+from skosify.skosify import Skosifier, MappingMatcher, mapping_get, transform_collections, transform_concepts
+from skosify.rdftools import deterministic_order
+
+EX = 'http://example.org/'
+
+
+def test_sparql_update_and_construct(tmp_path):
+    rdf = Graph()
+    rdf.bind('ex', EX)
+    rdf.add((URIRef(EX + 'a'), RDFS.label, Literal('A')))
+
+    queryfile = tmp_path / 'update.rq'
+    queryfile.write_text(u'INSERT { ?s skos:prefLabel ?l } WHERE { ?s rdfs:label ?l }')
+    transform_sparql_update(rdf, '@' + str(queryfile))
+    assert (URIRef(EX + 'a'), SKOS.prefLabel, Literal('A')) in rdf
+
+    # prefixes bound in the graph can be used without declaring them
+    result = transform_sparql_construct(
+        rdf, 'CONSTRUCT { ?s a ex:Thing } WHERE { ?s skos:prefLabel ?l }')
+    assert set(result) == set([(URIRef(EX + 'a'), RDF.type, URIRef(EX + 'Thing'))])
+
+
+def test_prepared_query_cache(tmp_path):
+    rdf = Graph()
+    queryfile = tmp_path / 'query.rq'
+    queryfile.write_text(u'CONSTRUCT { ?s ?p ?o } WHERE { ?s ?p ?o }')
+    query = '@' + str(queryfile)
+    prepared = prepare_query(rdf, 'query', query)
+    assert prepare_query(Graph(), 'query', query) is prepared
+
+    queryfile.write_text(u'CONSTRUCT { ?o ?p ?s } WHERE { ?s ?p ?o }')
+    os.utime(str(queryfile), ns=(0, 1))  # make sure the modification time changes
+    assert prepare_query(rdf, 'query', query) is not prepared
+
+
+def test_skosifier_reuse():
+    config = skosify.config('examples/dctype.cfg')
+    skosifier = Skosifier(config, label='Test')
+    assert isinstance(skosifier.config.types, MappingMatcher)
+    first = skosifier('examples/dctype.in.rdf')
+    second = skosifier.skosify('examples/dctype.in.rdf')
+    assert isomorphic(first, second)
+    assert isomorphic(first, skosify.skosify('examples/dctype.in.rdf', **dict(config, label='Test')))
+    assert skosifier.config.types.cache  # lookups are remembered
+
+
+def test_mapping_matcher():
+    mapping = MappingMatcher({
+        URIRef('http://example.org/Thing'): [(SKOS.Concept, False)],
+        'Group': [(SKOS.Collection, False)],
+        '*Concept': [(SKOS.Concept, False)],
+        '*DeprecatedConcept': [(None, False)],
+    })
+    assert mapping.targets(URIRef('http://example.org/Thing')) == [(SKOS.Concept, False)]
+    assert mapping.targets(URIRef('http://example.com/Group')) == [(SKOS.Collection, False)]
+    assert mapping.targets(URIRef('http://example.com/MyConcept')) == [(SKOS.Concept, False)]
+    assert mapping.targets(URIRef('http://example.com/MyDeprecatedConcept')) == [(None, False)]
+    assert mapping.targets(URIRef('http://example.com/Other')) is None
+    assert mapping_get(URIRef('http://example.com/Group'), mapping) == [(SKOS.Collection, False)]
+
+
+def transform_collections_reference(rdf):
+    """The earlier implementation of transform_collections, querying the
+    graph for each collection."""
+    from skosify.rdftools.namespace import SKOSEXT
+    from skosify.rdftools import localname
+    from skosify.skosify import COLLECTION_REMOVED_RELATIONS
+    for coll in sorted(rdf.subjects(RDF.type, SKOS.Collection)):
+        for prop in (SKOS.broader, SKOSEXT.broaderGeneric):
+            broaders = set(rdf.objects(coll, prop))
+            narrowers = set(rdf.subjects(prop, coll))
+            for b in broaders:
+                rdf.remove((coll, prop, b))
+            for n in narrowers:
+                rdf.remove((n, prop, coll))
+                rdf.add((coll, SKOS.member, n))
+                for b in broaders:
+                    rdf.add((n, prop, b))
+        for relProp in COLLECTION_REMOVED_RELATIONS:
+            for o in sorted(rdf.objects(coll, relProp)):
+                logging.warning("Removing concept relation %s -> %s from collection %s",
+                                localname(relProp), o, coll)
+                rdf.remove((coll, relProp, o))
+            for s in sorted(rdf.subjects(relProp, coll)):
+                logging.warning("Removing concept relation %s <- %s from collection %s",
+                                localname(relProp), s, coll)
+                rdf.remove((s, relProp, coll))
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_transform_collections_equivalent(seed, caplog):
+    from skosify.rdftools.namespace import SKOSEXT
+    rnd = random.Random(seed)
+    nodes = [URIRef(EX + 'n%d' % i) for i in range(30)]
+    rdf = Graph()
+    for node in rnd.sample(nodes, 10):
+        rdf.add((node, RDF.type, SKOS.Collection))
+    props = (SKOS.broader, SKOSEXT.broaderGeneric, SKOS.related, SKOS.exactMatch)
+    for _ in range(80):
+        rdf.add((rnd.choice(nodes), rnd.choice(props), rnd.choice(nodes)))
+    expected = Graph()
+    expected += rdf
+
+    caplog.set_level(logging.WARNING)
+    transform_collections_reference(expected)
+    expected_warnings = [r.getMessage() for r in caplog.records]
+    assert expected_warnings
+    caplog.clear()
+    transform_collections(rdf)
+    assert set(rdf) == set(expected)
+    assert [r.getMessage() for r in caplog.records] == expected_warnings
+
+
+def test_setup_top_concepts_after_breaking_cycles():
+    from skosify.skosify import setup_concept_scheme, setup_top_concepts, check_hierarchy
+    cs = URIRef(EX + 'scheme')
+    a, b, c, top = (URIRef(EX + name) for name in ('a', 'b', 'c', 'top'))
+    rdf = Graph()
+    rdf.add((cs, RDF.type, SKOS.ConceptScheme))
+    for conc in (a, b, c, top):
+        rdf.add((conc, RDF.type, SKOS.Concept))
+    rdf.add((a, SKOS.broader, b))
+    rdf.add((b, SKOS.broader, a))
+    rdf.add((c, SKOS.broader, top))
+    rdf.add((top, SKOS.topConceptOf, cs))
+
+    setup_concept_scheme(rdf, cs)
+    assert set(rdf.subjects(SKOS.inScheme, cs)) == set([a, b, c, top])
+    setup_top_concepts(rdf, True)
+    assert set(rdf.objects(cs, SKOS.hasTopConcept)) == set()  # top was already marked
+
+    check_hierarchy(rdf, True, False, True, False)
+    # the cycle was broken, so a or b is now a top concept
+    assert len(set(rdf.objects(cs, SKOS.hasTopConcept))) == 1
+    assert set(rdf.objects(cs, SKOS.hasTopConcept)) <= set([a, b])
+
+
+def test_cleanup_properties_order():
+    from rdflib.namespace import OWL
+    from skosify.skosify import cleanup_properties
+    a, b, c, d = (URIRef(EX + name) for name in ('a', 'b', 'c', 'd'))
+    rdf = Graph()
+    for prop in (a, b, c, d):
+        rdf.add((prop, RDF.type, OWL.ObjectProperty))
+    # b is only used by the definition of a, which is removed before b is
+    # checked, so b is removed too
+    rdf.add((a, b, Literal('x')))
+    # c is used by the definition of d, which is only removed after c has
+    # been checked, so c is kept
+    rdf.add((d, c, Literal('y')))
+    cleanup_properties(rdf)
+    assert (a, None, None) not in rdf
+    assert (b, None, None) not in rdf
+    assert (c, None, None) in rdf
+    assert (d, None, None) not in rdf
+
+
+def test_rewrite_map(tmp_path, caplog):
+    mapfile = tmp_path / 'rewrite.txt'
+    mapfile.write_text(u'# old new\n'
+                       u'<http://purl.org/dc/dcmitype/Text> http://example.org/Text\n'
+                       u'http://purl.org/dc/dcmitype/* http://example.org/type/\n')
+    caplog.set_level(logging.INFO)
+    config = dict(skosify.config('examples/dctype.cfg'), rewrite_map=str(mapfile))
+    voc = skosify.skosify('examples/dctype.in.rdf', **config)
+    assert (URIRef('http://example.org/Text'), RDF.type, SKOS.Concept) in voc
+    assert (URIRef('http://example.org/type/Image'), RDF.type, SKOS.Concept) in voc
+    assert not any(str(s).startswith('http://purl.org/dc/dcmitype/') for s in voc.subjects())
+    assert 'Rewrote ' in caplog.text
+
+
+def test_transform_concepts_chained_without_deterministic():
+    # the mappings are applied in sorted order even with deterministic
+    # ordering disabled, as chained mappings depend on the order
+    for i in range(20):
+        rdf = Graph()
+        types = [URIRef('http://example.org/T%02d' % j) for j in range(10)]
+        for j, t in enumerate(types):
+            rdf.add((URIRef('http://example.org/r%d' % j), RDF.type, t))
+        typemap = dict((t, [(u, None)]) for t, u in zip(types, types[1:]))
+        typemap[types[-1]] = [(SKOS.Concept, None)]
+        with deterministic_order(False):
+            transform_concepts(rdf, typemap)
+        assert set(rdf.objects(None, RDF.type)) == {SKOS.Concept}
+
+
+def test_read_query_file_changed(tmp_path):
+    filename = tmp_path / 'query.rq'
+    filename.write_text('SELECT * WHERE { ?s ?p ?o }')
+    assert read_query('@%s' % filename) == 'SELECT * WHERE { ?s ?p ?o }'
+    filename.write_text('ASK { ?s ?p ?o }')
+    os.utime(str(filename), ns=(0, 10 ** 9))
+    assert read_query('@%s' % filename) == 'ASK { ?s ?p ?o }'
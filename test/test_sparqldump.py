@@ -0,0 +1,178 @@
+# encoding=utf-8
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+from urllib.parse import parse_qs
+
+import pytest
+from rdflib import Graph, URIRef, BNode, Literal
+from rdflib.collection import Collection
+from rdflib.compare import isomorphic
+from rdflib.namespace import RDF, OWL, SKOS
+
+import skosify
+from skosify.rdftools import read_rdf
+from skosify.sparqldump import partition_prefixes, partitioned_dump, partition_query, SparqlSource
+
+EX = 'http://example.org/'
+
+
+class StubServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+class StubEndpoint(BaseHTTPRequestHandler):
+    """Answers SPARQL queries posted as forms by evaluating them with rdflib."""
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        length = int(self.headers['Content-Length'])
+        query = parse_qs(self.rfile.read(length).decode('utf-8'))['query'][0]
+        if self.server.graph is None:
+            self.send_error(500)
+            return
+        if self.server.max_subjects:
+            # an endpoint that returns fewer results than asked for
+            query = re.sub(r'LIMIT (\d+)',
+                           lambda m: 'LIMIT %d' % min(int(m.group(1)), self.server.max_subjects), query)
+        with self.server.lock:
+            self.server.connections.add(self.client_address)
+            self.server.queries += 1
+            result = self.server.graph.query(query)
+        if result.type == 'SELECT':
+            data = result.serialize(format='json')
+            content_type = 'application/sparql-results+json'
+        else:
+            data = result.serialize(format='nt')
+            content_type = 'application/n-triples'
+            if self.server.max_triples:
+                # an endpoint that cuts off the triples of a response
+                data = b''.join(data.splitlines(True)[:self.server.max_triples])
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def endpoint():
+    g = Graph()
+    for i in range(40):
+        c = URIRef(EX + u'c%dä' % i)
+        g.add((c, RDF.type, SKOS.Concept))
+        g.add((c, SKOS.prefLabel, Literal('concept %d' % i, lang='en')))
+    note = BNode()
+    g.add((note, RDF.value, Literal('a note')))
+    # blank node structures: a list whose members have blank nodes of
+    # their own, and an unlinked blank node with a nested one
+    members = [URIRef(EX + u'c%dä' % i) for i in range(6)]
+    union = BNode()
+    Collection(g, union, members)
+    g.add((URIRef(EX + 'aggregate'), OWL.unionOf, union))
+    for i, member in enumerate(members):
+        definition = BNode()
+        g.add((member, SKOS.definition, definition))
+        g.add((definition, RDF.value, Literal('definition %d' % i)))
+    nested = BNode()
+    g.add((note, SKOS.related, nested))
+    g.add((nested, RDF.value, Literal('nested')))
+
+    server = StubServer(('127.0.0.1', 0), StubEndpoint)
+    server.graph = g
+    server.lock = threading.Lock()
+    server.connections = set()
+    server.queries = 0
+    server.max_subjects = None
+    server.max_triples = None
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def endpoint_url(server):
+    return 'http://127.0.0.1:%d/sparql' % server.server_address[1]
+
+
+def test_partition_prefixes():
+    assert partition_prefixes(1) == ['']
+    assert partition_prefixes(16) == ['%x' % i for i in range(16)]
+    assert len(partition_prefixes(256)) == 256
+    assert partition_prefixes(256)[-1] == 'ff'
+    with pytest.raises(ValueError):
+        partition_prefixes(10)
+
+
+def test_partition_query(endpoint):
+    # the page of the aggregate has its list, but not the blank nodes of
+    # the list members
+    aggregate = EX + 'aggregate'
+    result = endpoint.graph.query(partition_query(None, '', EX + 'a', aggregate, 8))
+    union = endpoint.graph.value(URIRef(aggregate), OWL.unionOf)
+    assert len(result) == 1 + 2 * len(list(Collection(endpoint.graph, union)))
+
+    # the list is six levels deep
+    result = endpoint.graph.query(partition_query(None, '', EX + 'a', aggregate, 4))
+    assert len(result) == 1 + 2 * 4
+
+
+@pytest.mark.parametrize('partitions', [1, 16])
+def test_partitioned_dump(endpoint, tmp_path, partitions):
+    output = str(tmp_path / 'dump')
+    size = partitioned_dump(endpoint_url(endpoint), output=output, partitions=partitions,
+                            page_size=3, workers=3)
+
+    files = sorted(tmp_path.iterdir())
+    assert sum(f.stat().st_size for f in files) == size
+    result = Graph()
+    for f in files:
+        result.parse(str(f), format='nt')
+    assert isomorphic(result, endpoint.graph)
+
+    # several pages per partition were fetched over few connections
+    assert endpoint.queries > len(files)
+    assert len(endpoint.connections) <= 3
+
+
+def test_read_sparql_source(endpoint):
+    source = SparqlSource(endpoint_url(endpoint), page_size=3, workers=2, queued=1)
+    rdf = read_rdf([source], None)
+    assert isomorphic(rdf, endpoint.graph)
+
+
+def test_short_pages(endpoint):
+    endpoint.max_subjects = 2
+    rdf = read_rdf([SparqlSource(endpoint_url(endpoint), partitions=1, page_size=5)], None)
+    assert isomorphic(rdf, endpoint.graph)
+
+
+def test_truncated_pages(endpoint):
+    endpoint.max_triples = 16
+    rdf = read_rdf([SparqlSource(endpoint_url(endpoint), partitions=1, page_size=20)], None)
+    assert isomorphic(rdf, endpoint.graph)
+
+    endpoint.max_triples = 1
+    with pytest.raises(IOError):
+        read_rdf([SparqlSource(endpoint_url(endpoint), partitions=1)], None)
+
+
+def test_skosify_sparql_source(endpoint):
+    rdf = skosify.skosify(SparqlSource(endpoint_url(endpoint), partitions=1, page_size=10),
+                          label='Test')
+    concepts = set(rdf.subjects(RDF.type, SKOS.Concept))
+    assert concepts == set(endpoint.graph.subjects(RDF.type, SKOS.Concept))
+    assert len(set(rdf.objects(None, SKOS.inScheme))) == 1
+
+
+def test_sparql_source_error(endpoint):
+    endpoint.graph = None  # the stub endpoint fails every query
+    with pytest.raises(IOError):
+        read_rdf([SparqlSource(endpoint_url(endpoint))], None)
@@ -0,0 +1,32 @@
+# encoding=utf-8
+"""Start-up checks for the command line client.
+
+Loading rdflib dominates the start-up time, so the command line client must
+not import it before it is actually needed.
+"""
+import subprocess
+import sys
+
+HELP = '''
+import sys
+import skosify.cli
+sys.argv = ['skosify', '--help']
+try:
+    skosify.cli.main()
+except SystemExit:
+    pass
+assert 'rdflib' not in sys.modules, 'rdflib was imported'
+'''
+
+
+def run_python(code):
+    """Run code in a new interpreter, failing if it raises."""
+    subprocess.check_call([sys.executable, '-c', code], stdout=subprocess.DEVNULL)
+
+
+def test_import_does_not_load_rdflib():
+    run_python("import sys, skosify; assert 'rdflib' not in sys.modules")
+
+
+def test_help_does_not_load_rdflib():
+    run_python(HELP)
@@ -0,0 +1,89 @@
+# encoding=utf-8
+import logging
+import sys
+
+import pytest
+from rdflib import Graph, URIRef, Literal
+from rdflib.namespace import RDF, SKOS
+
+import skosify
+import skosify.cli
+from skosify import diagnostics
+from skosify.parallel import CHECKS
+from skosify.validate import VALIDATIONS, TripleIndex
+
+EX = 'http://example.org/'
+
+
+@pytest.fixture
+def graph():
+    rdf = Graph()
+    c = [URIRef(EX + 'c%d' % i) for i in range(6)]
+    for conc in c:
+        rdf.add((conc, RDF.type, SKOS.Concept))
+        rdf.add((conc, SKOS.prefLabel, Literal(conc.split('/')[-1], 'en')))
+    rdf.add((URIRef(EX + 'cs'), SKOS.hasTopConcept, c[0]))
+    rdf.add((c[1], SKOS.broader, c[0]))
+    rdf.add((c[2], SKOS.broader, c[1]))
+    rdf.add((c[2], SKOS.broader, c[0]))  # redundant
+    rdf.add((c[2], SKOS.related, c[0]))  # overlaps with broader
+    rdf.add((c[3], SKOS.broader, c[4]))  # cycle
+    rdf.add((c[4], SKOS.broader, c[3]))
+    rdf.add((c[5], SKOS.prefLabel, Literal('other', 'en')))  # two prefLabels
+    rdf.add((c[5], SKOS.altLabel, Literal('other', 'en')))  # overlap
+    return rdf
+
+
+def test_validate(graph, caplog):
+    before = set(graph)
+    with caplog.at_level(logging.WARNING):
+        problems = skosify.validate(graph)
+    assert set(graph) == before
+    assert problems == 5
+    for msg in ('Hierarchy cycle', 'skos:broaderTransitive and skos:related',
+                'Redundant hierarchical relationship', 'more than one prefLabel',
+                'both prefLabel and altLabel'):
+        assert msg in caplog.text
+
+    # the same problems are found by the checks on the whole graph
+    with diagnostics.Diagnostics(log_summary=False) as diag:
+        for name, args in VALIDATIONS:
+            CHECKS[name][0](graph, *args)
+    assert diag.total() == problems
+
+    assert skosify.validate(graph, parallel_checks=True, workers=2) == problems
+
+
+def test_validate_clean():
+    rdf = Graph()
+    rdf.add((URIRef(EX + 'a'), SKOS.broader, URIRef(EX + 'b')))
+    assert skosify.validate(rdf) == 0
+
+
+def test_index_matches_graph(graph):
+    index = TripleIndex([SKOS.broader, RDF.type])
+    index.add_triples(graph)
+    assert len(index) == 11
+    for conc in graph.subjects(RDF.type, SKOS.Concept):
+        assert set(index.transitive_objects(conc, SKOS.broader)) == \
+            set(graph.transitive_objects(conc, SKOS.broader))
+        assert set(index.subjects(SKOS.broader, conc)) == set(graph.subjects(SKOS.broader, conc))
+    assert (URIRef(EX + 'c1'), SKOS.broader, URIRef(EX + 'c0')) in index
+    assert (URIRef(EX + 'c0'), SKOS.broader, URIRef(EX + 'c1')) not in index
+
+
+def test_validate_cli(graph, tmp_path, monkeypatch):
+    filename = str(tmp_path / 'voc.nt')
+    graph.serialize(filename, format='nt')
+    monkeypatch.setattr(sys, 'argv', ['skosify', '--validate', filename])
+    with pytest.raises(SystemExit) as excinfo:
+        skosify.cli.main()
+    assert excinfo.value.code == 1
+
+    monkeypatch.setattr(sys, 'argv', ['skosify', '--validate', 'examples/milk.in.ttl'])
+    skosify.cli.main()
+
+    monkeypatch.setattr(sys, 'argv', ['skosify', '--validate', str(tmp_path / 'missing.ttl')])
+    with pytest.raises(SystemExit) as excinfo:
+        skosify.cli.main()
+    assert excinfo.value.code == 2